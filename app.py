@@ -1,21 +1,81 @@
-from flask import Flask, jsonify, request, session, render_template_string, send_from_directory
+from flask import Flask, jsonify, request, session, render_template_string, send_from_directory, send_file, g, has_request_context, Response
 from flask_cors import CORS
 from werkzeug.security import generate_password_hash, check_password_hash
 import psycopg2
+import psycopg2.extensions
 import psycopg2.extras
 import secrets
+import hashlib
+import html
+import codecs
+import csv
+import io
 import json
 import logging
 import traceback
 import os
+import threading
+import itertools
+import time
+import queue
+import random
+import select
+import socket
+import subprocess
+import sys
+import glob
+import mimetypes
+import re
+import zlib
+import atexit
+import fcntl
+import mmap
+import multiprocessing
+import multiprocessing.forkserver
+import tempfile
+from collections import namedtuple, OrderedDict
+from concurrent.futures import ProcessPoolExecutor
 from dotenv import load_dotenv
 from functools import wraps
+from werkzeug.datastructures import Headers
+from werkzeug.http import parse_accept_header
 # Import additional modules at the top
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 import smtplib
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 
+# Make psycopg2 cooperative when served by gevent workers (gunicorn -k gevent)
+try:
+    from gevent import monkey
+    ASYNC_WORKER = monkey.is_module_patched('socket')
+    if ASYNC_WORKER:
+        from psycogreen.gevent import patch_psycopg
+        patch_psycopg()
+except ImportError:
+    ASYNC_WORKER = False
+
+# Optional response compression codecs; gzip is always available
+try:
+    import brotli
+except ImportError:
+    brotli = None
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+def run_blocking(func, *args):
+    """Run CPU-bound work such as password hashing on a native thread under gevent.
+
+    hashlib releases the GIL, so the worker keeps serving other requests meanwhile
+    instead of stalling them for the ~150ms a hash takes.
+    """
+    if ASYNC_WORKER:
+        from gevent import get_hub
+        return get_hub().threadpool.apply(func, args)
+    return func(*args)
+
 
 
 # Load environment variables
@@ -27,11 +87,66 @@ app.secret_key = os.getenv('SECRET_KEY', secrets.token_hex(16))
 app.config['SESSION_COOKIE_HTTPONLY'] = True
 app.config['SESSION_COOKIE_SECURE'] = False  # Set to True in production with HTTPS
 app.config['SESSION_COOKIE_SAMESITE'] = 'Lax'
+# Lifetime of "remember me" sessions; the others end when the browser closes
+app.config['PERMANENT_SESSION_LIFETIME'] = timedelta(days=30)
+
+
+# Static assets
+# `python -m backend.build_assets` writes minified, fingerprinted copies of the frontend with
+# gzip/brotli variants to frontend/dist. Fingerprinted names change with their content, so they
+# are cached for a year; pages keep their names and are revalidated on every visit.
+ASSET_DIST_DIR = os.path.join(app.root_path, 'frontend', 'dist')
+# Behind nginx, the URL prefix of an internal location aliased to frontend/dist. The app then
+# answers with X-Accel-Redirect and nginx sends the file (gzip_static/brotli_static pick the variant)
+ASSET_ACCEL_PREFIX = os.getenv('ASSET_ACCEL_PREFIX', '').rstrip('/')
+ASSET_ENCODINGS = [('br', '.br'), ('gzip', '.gz')]
+
+def load_asset_manifest():
+    try:
+        with open(os.path.join(ASSET_DIST_DIR, 'manifest.json')) as f:
+            manifest = json.load(f)
+    except FileNotFoundError:
+        return {'assets': {}, 'pages': []}
+    manifest['files'] = set(manifest['assets'].values())
+    return manifest
+
+asset_manifest = load_asset_manifest()
 
+def send_asset(relative_path, immutable):
+    """Send a built file from frontend/dist in the best encoding the client accepts"""
+    if ASSET_ACCEL_PREFIX:
+        response = Response(mimetype=mimetypes.guess_type(relative_path)[0])
+        response.headers['X-Accel-Redirect'] = f"{ASSET_ACCEL_PREFIX}/{relative_path}"
+    else:
+        path = os.path.join(ASSET_DIST_DIR, relative_path)
+        encoding = next((name for name, suffix in ASSET_ENCODINGS
+                         if request.accept_encodings[name] and os.path.exists(path + suffix)), None)
+        if encoding:
+            response = send_file(path + dict(ASSET_ENCODINGS)[encoding],
+                                 mimetype=mimetypes.guess_type(relative_path)[0], conditional=True, etag=True)
+            # The ETag comes from the variant's own file, so each encoding gets its own
+            response.headers['Content-Encoding'] = encoding
+        else:
+            response = send_file(path, conditional=True, etag=True)
+        response.vary.add('Accept-Encoding')
+    response.headers['Cache-Control'] = 'public, max-age=31536000, immutable' if immutable else 'no-cache'
+    return response
+
+def send_page(filename):
+    """Send a page from the asset build if there is one, else the source page"""
+    if filename in asset_manifest['pages']:
+        return send_asset(f'pages/{filename}', immutable=False)
+    return send_from_directory('frontend', filename)
+
+@app.route('/dist/<path:filename>')
+def serve_dist(filename):
+    if filename not in asset_manifest['files']:
+        return jsonify({'status': 'error', 'message': 'Not found'}), 404
+    return send_asset(filename, immutable=True)
 
 @app.route("/admin_dashboard.html")
 def admin_dashboard():
-    return send_from_directory('frontend', 'admin_dashboard.html')
+    return send_page('admin_dashboard.html')
 
 @app.route('/css/<path:filename>')
 def serve_css(filename):
@@ -46,7 +161,162 @@ def serve_assets(filename):
     return send_from_directory('frontend/assets', filename)
 
 
+# Response compression - a WSGI layer that compresses JSON, HTML and other text responses in the
+# best encoding the client accepts. Bodies with an ETag are cached compressed, keyed by ETag, so
+# unchanged files and pages are compressed once per worker. Streamed responses are compressed as
+# they are produced. `python -m backend.compression_levels` measures the cost of each level
+COMPRESSION = os.getenv('COMPRESSION', '1') != '0'
+COMPRESSION_MIN_SIZE = int(os.getenv('COMPRESSION_MIN_SIZE', '1024'))  # bytes
+COMPRESSION_CACHE_BYTES = int(os.getenv('COMPRESSION_CACHE_BYTES', str(16 * 1024 * 1024)))
+COMPRESSION_TYPES = {
+    'application/json', 'text/html', 'text/css', 'text/javascript', 'application/javascript',
+    'text/plain', 'text/csv', 'image/svg+xml'
+}
+# Server preference among encodings the client accepts equally; missing modules are skipped
+COMPRESSION_CODECS = {'zstd': zstandard, 'br': brotli, 'gzip': zlib}
+COMPRESSION_ENCODINGS = [
+    encoding for encoding in os.getenv('COMPRESSION_ENCODINGS', 'zstd,br,gzip').split(',')
+    if COMPRESSION_CODECS.get(encoding) is not None
+]
+COMPRESSION_LEVELS = {
+    'zstd': int(os.getenv('COMPRESSION_ZSTD_LEVEL', '1')),
+    'br': int(os.getenv('COMPRESSION_BR_LEVEL', '4')),
+    'gzip': int(os.getenv('COMPRESSION_GZIP_LEVEL', '5')),
+}
+# Larger bodies are compressed on a native thread under gevent, like password hashes
+COMPRESSION_OFFLOAD_SIZE = 64 * 1024
+
+def make_compressor(encoding, level):
+    """Return (compress, finish) callables of a streaming compressor"""
+    if encoding == 'zstd':
+        compressor = zstandard.ZstdCompressor(level=level).compressobj()
+        return compressor.compress, compressor.flush
+    if encoding == 'br':
+        compressor = brotli.Compressor(quality=level)
+        return compressor.process, compressor.finish
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    return compressor.compress, compressor.flush
+
+def compress_body(encoding, level, body):
+    compress, finish = make_compressor(encoding, level)
+    return compress(body) + finish()
+
+class CompressionMiddleware:
+    def __init__(self, wsgi_app, encodings, levels, min_size, cache_bytes):
+        self.wsgi_app = wsgi_app
+        self.encodings = encodings
+        self.levels = levels
+        self.min_size = min_size
+        self.cache_bytes = cache_bytes
+        self._cache = OrderedDict()  # (path, etag, encoding, level) -> body
+        self._cached_bytes = 0
+        self._lock = threading.Lock()
+
+    def negotiate(self, environ):
+        accept = parse_accept_header(environ.get('HTTP_ACCEPT_ENCODING', ''))
+        accepted = [encoding for encoding in self.encodings if accept[encoding] > 0]
+        # max() keeps the first of equal qualities, so ties go to the server's preference
+        return max(accepted, key=lambda encoding: accept[encoding], default=None)
+
+    def compressible(self, status, headers):
+        if int(status.split(' ', 1)[0]) in (204, 206, 304) or 'Content-Encoding' in headers:
+            return False
+        if 'no-transform' in headers.get('Cache-Control', ''):
+            return False
+        if headers.get('Content-Type', '').split(';', 1)[0].strip() not in COMPRESSION_TYPES:
+            return False
+        length = headers.get('Content-Length')
+        return length is None or int(length) >= self.min_size
+
+    def __call__(self, environ, start_response):
+        if environ['REQUEST_METHOD'] == 'HEAD':
+            return self.wsgi_app(environ, start_response)
+        captured = []
+        written = []
+
+        def capture(status, headers, exc_info=None):
+            captured[:] = [status, headers, exc_info]
+            return written.append
+
+        app_iter = self.wsgi_app(environ, capture)
+        status, header_list, exc_info = captured
+        headers = Headers(header_list)
+        if not self.compressible(status, headers):
+            start_response(status, header_list, exc_info)
+            return itertools.chain(written, app_iter) if written else app_iter
+
+        if 'accept-encoding' not in headers.get('Vary', '').lower():
+            headers['Vary'] = ', '.join(filter(None, [headers.get('Vary'), 'Accept-Encoding']))
+        encoding = self.negotiate(environ)
+        if encoding is None:
+            start_response(status, headers.to_wsgi_list(), exc_info)
+            return itertools.chain(written, app_iter) if written else app_iter
+
+        level = self.levels[encoding]
+        headers['Content-Encoding'] = encoding
+        etag = headers.get('ETag')
+        if etag and not etag.startswith('W/'):
+            # The compressed body differs byte for byte but means the same, as nginx marks it
+            headers['ETag'] = 'W/' + etag
+        if 'Content-Length' not in headers:
+            start_response(status, headers.to_wsgi_list(), exc_info)
+            return self.stream(encoding, level, itertools.chain(written, app_iter), app_iter)
+
+        key = (environ.get('PATH_INFO'), environ.get('QUERY_STRING'), etag, encoding, level) if etag else None
+        body = self.cache_get(key)
+        if body is None:
+            try:
+                raw = b''.join(itertools.chain(written, app_iter))
+            finally:
+                if hasattr(app_iter, 'close'):
+                    app_iter.close()
+            if len(raw) >= COMPRESSION_OFFLOAD_SIZE:
+                body = run_blocking(compress_body, encoding, level, raw)
+            else:
+                body = compress_body(encoding, level, raw)
+            self.cache_put(key, body)
+        elif hasattr(app_iter, 'close'):
+            app_iter.close()
+        headers['Content-Length'] = str(len(body))
+        start_response(status, headers.to_wsgi_list(), exc_info)
+        return [body]
+
+    def stream(self, encoding, level, chunks, app_iter):
+        compress, finish = make_compressor(encoding, level)
+        try:
+            for chunk in chunks:
+                data = compress(chunk)
+                if data:
+                    yield data
+            yield finish()
+        finally:
+            if hasattr(app_iter, 'close'):
+                app_iter.close()
+
+    def cache_get(self, key):
+        if key is None:
+            return None
+        with self._lock:
+            body = self._cache.get(key)
+            if body is not None:
+                self._cache.move_to_end(key)
+            return body
 
+    def cache_put(self, key, body):
+        if key is None or len(body) > self.cache_bytes // 4:
+            return
+        with self._lock:
+            if key in self._cache:
+                return
+            self._cache[key] = body
+            self._cached_bytes += len(body)
+            while self._cached_bytes > self.cache_bytes:
+                _, evicted = self._cache.popitem(last=False)
+                self._cached_bytes -= len(evicted)
+
+if COMPRESSION and COMPRESSION_ENCODINGS:
+    app.wsgi_app = CompressionMiddleware(app.wsgi_app, COMPRESSION_ENCODINGS, COMPRESSION_LEVELS,
+                                         COMPRESSION_MIN_SIZE, COMPRESSION_CACHE_BYTES)
 
 
 # Configure logging
@@ -66,6 +336,9 @@ def login_required(f):
     def decorated_function(*args, **kwargs):
         if 'user_id' not in session:
             return jsonify({'status': 'error', 'message': 'Authentication required'}), 401
+        error = enforce_user_state()
+        if error:
+            return error
         return f(*args, **kwargs)
     return decorated_function
 
@@ -74,25 +347,916 @@ def admin_required(f):
     def decorated_function(*args, **kwargs):
         if 'user_id' not in session:
             return jsonify({'status': 'error', 'message': 'Authentication required'}), 401
+        error = enforce_user_state()
+        if error:
+            return error
         if session.get('user_role') != 'platform_admin':
             return jsonify({'status': 'error', 'message': 'Admin access required'}), 403
         return f(*args, **kwargs)
+    decorated_function.admission_class = 'admin'
     return decorated_function
 
-# Database connection
-def get_db_connection():
+def read_only(f):
+    """Mark a route as read-only so its queries may be served by a replica"""
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        g.db_read_only = True
+        return f(*args, **kwargs)
+    return decorated_function
+
+# Admission control - each class of route gets its own budget of concurrent requests per
+# worker, so slow exports or a stalled SMTP server cannot tie up the capacity that cheap
+# routes like /api/check-auth need. A request that cannot get a slot within its class's
+# queue timeout is turned away with 503 and Retry-After instead of timing out
+ADMISSION_CONTROL = os.getenv('ADMISSION_CONTROL', '1') != '0'
+# class -> (concurrent requests, seconds a request may queue, Retry-After seconds)
+ADMISSION_DEFAULTS = {
+    'public': (64, 1, 1),
+    'auth': (8, 2, 2),
+    'write': (16, 2, 2),
+    'admin': (8, 5, 5),
+    'export': (2, 0, 10),
+}
+AUTH_ENDPOINTS = {'login', 'register', 'request_password_reset', 'reset_password'}
+
+def admission_setting(route_class, name, default):
+    return float(os.getenv(f'ADMISSION_{route_class.upper()}_{name}', default))
+
+def admission_class(name, paged_by=()):
+    """Put a route in another admission class; classes without a budget ('exempt') are never limited.
+
+    paged_by lists the query arguments with which the route returns a bounded page or delta
+    instead of everything; such requests are admitted as ordinary admin reads.
+    """
+    def decorator(f):
+        f.admission_class = name
+        f.paged_by = paged_by
+        return f
+    return decorator
+
+class AdmissionClass:
+    def __init__(self, name, limit, queue_timeout, retry_after):
+        self.name = name
+        self.limit = limit
+        self.queue_timeout = queue_timeout
+        self.retry_after = retry_after
+        self._slots = threading.BoundedSemaphore(limit)
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.queued = 0
+        self.peak_in_flight = 0
+        self.admitted = 0
+        self.rejected = 0
+        self.wait_seconds = 0.0
+
+    def acquire(self):
+        started = time.monotonic()
+        admitted = self._slots.acquire(blocking=False)
+        if not admitted and self.queue_timeout > 0:
+            with self._lock:
+                self.queued += 1
+            try:
+                admitted = self._slots.acquire(timeout=self.queue_timeout)
+            finally:
+                with self._lock:
+                    self.queued -= 1
+        with self._lock:
+            if admitted:
+                self.admitted += 1
+                self.in_flight += 1
+                self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+                self.wait_seconds += time.monotonic() - started
+            else:
+                self.rejected += 1
+        return admitted
+
+    def release(self):
+        with self._lock:
+            self.in_flight -= 1
+        self._slots.release()
+
+    def status(self):
+        with self._lock:
+            return {
+                'limit': self.limit,
+                'in_flight': self.in_flight,
+                'queued': self.queued,
+                'saturation': round(self.in_flight / self.limit, 2),
+                'peak_in_flight': self.peak_in_flight,
+                'admitted': self.admitted,
+                'rejected': self.rejected,
+                'mean_wait_ms': round(self.wait_seconds / self.admitted * 1000, 1) if self.admitted else 0.0
+            }
+
+admission_classes = {
+    name: AdmissionClass(
+        name,
+        int(admission_setting(name, 'LIMIT', limit)),
+        admission_setting(name, 'QUEUE_TIMEOUT', queue_timeout),
+        int(admission_setting(name, 'RETRY_AFTER', retry_after))
+    )
+    for name, (limit, queue_timeout, retry_after) in ADMISSION_DEFAULTS.items()
+}
+
+def classify_request():
+    """The admission class of the current request"""
+    view = app.view_functions.get(request.endpoint)
+    route_class = getattr(view, 'admission_class', None)
+    if route_class == 'export':
+        # A page or a delta of an export route is no more work than any admin read
+        return 'admin' if any(arg in request.args for arg in view.paged_by) else 'export'
+    if route_class:
+        return route_class
+    if request.endpoint in AUTH_ENDPOINTS:
+        return 'auth'
+    if request.method in ('GET', 'HEAD', 'OPTIONS'):
+        return 'public'
+    return 'write'
+
+@app.before_request
+def admit_request():
+    g.route_class = classify_request()
+    admission = admission_classes.get(g.route_class) if ADMISSION_CONTROL else None
+    if admission is None:
+        return None
+    if not admission.acquire():
+        response = jsonify({'status': 'error', 'message': 'Server busy, please retry shortly'})
+        response.headers['Retry-After'] = str(admission.retry_after)
+        return response, 503
+    g.admission = admission
+    return None
+
+@app.teardown_request
+def release_admission(exc):
+    admission = g.pop('admission', None)
+    if admission is not None:
+        admission.release()
+
+@app.route('/api/admission', methods=['GET'])
+@admission_class('exempt')  # must answer while the admin class is saturated
+@admin_required
+def get_admission_status():
+    """Per-class concurrency and rejections in this worker, with its connection pool"""
+    return jsonify({
+        'enabled': ADMISSION_CONTROL,
+        'classes': {name: admission.status() for name, admission in admission_classes.items()},
+        'db_pool': db_pool.status()
+    }), 200
+
+# Read replica routing
+DB_REPLICA_URLS = [dsn.strip() for dsn in os.getenv('DB_REPLICA_URLS', '').split(',') if dsn.strip()]
+DB_REPLICA_STRATEGY = os.getenv('DB_REPLICA_STRATEGY', 'round_robin')  # or 'least_connections'
+DB_REPLICA_MAX_LAG = float(os.getenv('DB_REPLICA_MAX_LAG', '5'))  # seconds
+DB_REPLICA_LAG_CHECK_INTERVAL = float(os.getenv('DB_REPLICA_LAG_CHECK_INTERVAL', '2'))  # seconds
+DB_REPLICA_RETRY_AFTER = float(os.getenv('DB_REPLICA_RETRY_AFTER', '30'))  # seconds a failed replica is skipped
+READ_YOUR_WRITES_WINDOW = float(os.getenv('READ_YOUR_WRITES_WINDOW', '5'))  # seconds reads stay on the primary after a write
+
+class TrackedConnection(psycopg2.extensions.connection):
+    """psycopg2 connection that tells its replica when it is closed"""
+    replica = None
+
+    def close(self):
+        if self.replica is not None:
+            self.replica.release()
+            self.replica = None
+        super().close()
+
+class Replica:
+    def __init__(self, dsn):
+        self.dsn = dsn
+        self.active_connections = 0
+        self.lag = None
+        self.lag_checked_at = 0.0
+        self.down_until = 0.0
+        self.lock = threading.Lock()
+
+    def release(self):
+        with self.lock:
+            self.active_connections = max(self.active_connections - 1, 0)
+
+    def is_available(self, now):
+        # A lag reading older than the check interval is not trusted either way, so a replica that
+        # lagged once gets picked, and measured, again instead of being skipped for good
+        lag_is_current = now - self.lag_checked_at < DB_REPLICA_LAG_CHECK_INTERVAL
+        return now >= self.down_until and (
+            self.lag is None or self.lag <= DB_REPLICA_MAX_LAG or not lag_is_current)
+
+class ReplicaRouter:
+    """Spread read-only connections over the replicas, skipping lagging or unreachable ones"""
+
+    def __init__(self, dsns, strategy='round_robin'):
+        self.replicas = [Replica(dsn) for dsn in dsns]
+        self.strategy = strategy
+        self._counter = itertools.count()
+        self._lock = threading.Lock()
+
+    def _pick(self, exclude):
+        now = time.monotonic()
+        candidates = [r for r in self.replicas if r not in exclude and r.is_available(now)]
+        if not candidates:
+            return None
+        if self.strategy == 'least_connections':
+            return min(candidates, key=lambda r: r.active_connections)
+        with self._lock:
+            return candidates[next(self._counter) % len(candidates)]
+
+    def _check_lag(self, replica, conn):
+        """Refresh the replica's replay lag at most every DB_REPLICA_LAG_CHECK_INTERVAL seconds"""
+        now = time.monotonic()
+        if now - replica.lag_checked_at < DB_REPLICA_LAG_CHECK_INTERVAL:
+            return replica.lag is None or replica.lag <= DB_REPLICA_MAX_LAG
+
+        cursor = conn.cursor()
+        # A fully replayed replica reports zero lag even if the primary has been idle
+        cursor.execute('''
+            SELECT CASE
+                WHEN NOT pg_is_in_recovery() THEN 0
+                WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+                ELSE COALESCE(EXTRACT(EPOCH FROM NOW() - pg_last_xact_replay_timestamp()), 0)
+            END
+        ''')
+        replica.lag = float(cursor.fetchone()[0])
+        replica.lag_checked_at = now
+        cursor.close()
+        conn.rollback()
+
+        if replica.lag > DB_REPLICA_MAX_LAG:
+            logger.warning(f"Replica lag {replica.lag:.1f}s exceeds {DB_REPLICA_MAX_LAG}s, reading from primary")
+            return False
+        return True
+
+    def connect(self):
+        """Return a replica connection, or None when no replica is usable"""
+        tried = set()
+        while len(tried) < len(self.replicas):
+            replica = self._pick(tried)
+            if replica is None:
+                return None
+            tried.add(replica)
+
+            conn = None
+            try:
+                conn = psycopg2.connect(replica.dsn, connect_timeout=DB_CONNECT_TIMEOUT,
+                                        connection_factory=TrackedConnection)
+                if not self._check_lag(replica, conn):
+                    conn.close()
+                    continue
+            except psycopg2.Error as err:
+                logger.error(f"Replica connection error, skipping for {DB_REPLICA_RETRY_AFTER}s: {err}")
+                replica.down_until = time.monotonic() + DB_REPLICA_RETRY_AFTER
+                if conn is not None and not conn.closed:
+                    conn.close()
+                continue
+
+            with replica.lock:
+                replica.active_connections += 1
+            conn.replica = replica
+            return conn
+        return None
+
+    def status(self):
+        now = time.monotonic()
+        return [{
+            'replica': index,
+            'available': replica.is_available(now),
+            'lag_seconds': replica.lag,
+            'active_connections': replica.active_connections
+        } for index, replica in enumerate(self.replicas)]
+
+replica_router = ReplicaRouter(DB_REPLICA_URLS, DB_REPLICA_STRATEGY)
+
+def should_read_from_replica():
+    """Read-only routes go to a replica unless this session wrote recently"""
+    if not replica_router.replicas or not has_request_context() or not g.get('db_read_only'):
+        return False
+    last_write_at = session.get('last_write_at')
+    return not (last_write_at and time.time() - last_write_at < READ_YOUR_WRITES_WINDOW)
+
+@app.after_request
+def remember_last_write(response):
+    # Lets the session read its own writes from the primary for READ_YOUR_WRITES_WINDOW seconds
+    if replica_router.replicas and request.method not in ('GET', 'HEAD', 'OPTIONS') and response.status_code < 400:
+        session['last_write_at'] = time.time()
+    return response
+
+# Primary connection pool - a gevent worker serves many requests at once, and opening a
+# connection per request costs a TCP and auth round trip each time
+DB_POOL_SIZE = int(os.getenv('DB_POOL_SIZE', '10'))  # connections per worker process
+DB_POOL_TIMEOUT = float(os.getenv('DB_POOL_TIMEOUT', '5'))  # seconds a request waits for a free connection
+DB_POOL_MAX_IDLE = float(os.getenv('DB_POOL_MAX_IDLE', '300'))  # seconds before an idle connection is closed
+DB_CONNECT_TIMEOUT = int(os.getenv('DB_CONNECT_TIMEOUT', '3'))  # seconds; libpq rounds anything below 2 up to 2
+
+# Circuit breaker - after DB_BREAKER_FAILURES connection or query failures in a row, requests
+# fail at once instead of each waiting out the timeouts. After DB_BREAKER_RESET seconds one
+# request probes the primary, and its result closes or reopens the breaker
+DB_BREAKER_FAILURES = int(os.getenv('DB_BREAKER_FAILURES', '5'))
+DB_BREAKER_RESET = float(os.getenv('DB_BREAKER_RESET', '10'))
+
+# Per-request statement_timeout by route class (milliseconds), set with SET LOCAL on the
+# request's first transaction. Background work outside a request is not limited
+STATEMENT_TIMEOUTS = {
+    route_class: int(os.getenv(f'STATEMENT_TIMEOUT_{route_class.upper()}', default))
+    for route_class, default in {
+        'public': 2000, 'auth': 5000, 'write': 5000, 'admin': 10000, 'export': 25000
+    }.items()
+}
+
+class DatabaseUnavailable(psycopg2.OperationalError):
+    """Raised without trying while the circuit breaker is open"""
+
+class CircuitBreaker:
+    def __init__(self, failure_threshold, reset_timeout):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = 'closed'
+        self.failures = 0
+        self.opened_at = 0.0
+        self.probe_started_at = 0.0
+        self.times_opened = 0
+        self.rejected = 0
+        self._lock = threading.Lock()
+
+    def allow(self):
+        """Raise DatabaseUnavailable while open; return True if the caller is the half-open probe"""
+        if self.state == 'closed':
+            return False
+        now = time.monotonic()
+        with self._lock:
+            if self.state == 'closed':
+                return False
+            # A probe that never reported back (a hung server) is replaced after reset_timeout
+            probe_due = self.opened_at if self.state == 'open' else self.probe_started_at
+            if now - probe_due >= self.reset_timeout:
+                self.state = 'half_open'
+                self.probe_started_at = now
+                return True
+            self.rejected += 1
+        raise DatabaseUnavailable('Database unavailable (circuit breaker open)')
+
+    def record_success(self):
+        if self.state == 'closed' and not self.failures:
+            return
+        with self._lock:
+            if self.state != 'closed':
+                logger.info("Database circuit breaker closed")
+            self.state = 'closed'
+            self.failures = 0
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == 'half_open' or (self.state == 'closed' and self.failures >= self.failure_threshold):
+                if self.state == 'closed':
+                    self.times_opened += 1
+                    logger.warning(f"Database circuit breaker open after {self.failures} failures")
+                self.state = 'open'
+                self.opened_at = time.monotonic()
+
+    def status(self):
+        with self._lock:
+            return {
+                'state': self.state,
+                'consecutive_failures': self.failures,
+                'times_opened': self.times_opened,
+                'rejected': self.rejected
+            }
+
+db_breaker = CircuitBreaker(DB_BREAKER_FAILURES, DB_BREAKER_RESET)
+
+def is_connection_failure(err):
+    """Whether an error means the server could not be reached, rather than a statement failing on it"""
+    # Errors raised by libpq itself (a dropped socket) carry no SQLSTATE. Class 08 is a connection
+    # exception and 57P0x the server shutting down or not yet accepting connections
+    return err.pgcode is None or err.pgcode.startswith(('08', '57P'))
+
+_tracked_cursor_classes = {}
+
+def tracked_cursor_class(base):
+    """A subclass of the cursor class that reports query outcomes to the circuit breaker"""
+    tracked = _tracked_cursor_classes.get(base)
+    if tracked is None:
+        def execute(self, query, vars=None):
+            try:
+                result = base.execute(self, query, vars)
+            except psycopg2.OperationalError as err:
+                # Only a lost or refused connection counts. Statement timeouts, lock timeouts and
+                # other errors the server answered with show it is up, however slow one query is
+                if is_connection_failure(err):
+                    db_breaker.record_failure()
+                else:
+                    db_breaker.record_success()
+                raise
+            db_breaker.record_success()
+            return result
+        tracked = _tracked_cursor_classes.setdefault(base, type(base.__name__, (base,), {'execute': execute}))
+    return tracked
+
+class BreakerConnection(psycopg2.extensions.connection):
+    """Primary pool connection whose cursors report to the circuit breaker"""
+
+    def cursor(self, *args, **kwargs):
+        base = kwargs.get('cursor_factory') or self.cursor_factory or psycopg2.extensions.cursor
+        kwargs['cursor_factory'] = tracked_cursor_class(base)
+        return super().cursor(*args, **kwargs)
+
+class PooledConnection:
+    """A checked-out pool connection. close() returns it to the pool once; later calls
+    do nothing, so a second close() can never touch a connection another request now holds"""
+
+    def __init__(self, pool, conn):
+        object.__setattr__(self, '_pool', pool)
+        object.__setattr__(self, '_conn', conn)
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+    def __setattr__(self, name, value):
+        setattr(self._conn, name, value)
+
+    @property
+    def closed(self):
+        return self._pool is None or self._conn.closed
+
+    def close(self):
+        pool, conn = self._pool, self._conn
+        if pool is not None:
+            object.__setattr__(self, '_pool', None)
+            object.__setattr__(self, '_conn', None)
+            pool.release(conn)
+
+class ConnectionPool:
+    """Reuses idle primary connections, with at most `size` checked out at once"""
+
+    def __init__(self, size, timeout):
+        self.size = size
+        self.timeout = timeout
+        self._idle = []
+        self._slots = threading.BoundedSemaphore(size)
+        self._lock = threading.Lock()
+
+    def get(self):
+        probe = db_breaker.allow()
+        if not self._slots.acquire(timeout=self.timeout):
+            raise psycopg2.OperationalError(f"No database connection free within {self.timeout}s")
+        try:
+            conn = None
+            with self._lock:
+                # Most recently used first; anything idle too long may have been dropped by the server
+                while self._idle and conn is None:
+                    conn, released_at = self._idle.pop()
+                    if time.monotonic() - released_at > DB_POOL_MAX_IDLE:
+                        conn.close()
+                        conn = None
+            if conn is None or conn.closed:
+                try:
+                    conn = connect_primary(connection_factory=BreakerConnection)
+                except psycopg2.Error:
+                    db_breaker.record_failure()
+                    raise
+                db_breaker.record_success()
+            elif probe:
+                # A reused connection proves nothing until a query gets through it. Ending the probe's
+                # transaction hands the caller a connection that can still SET TRANSACTION
+                conn.cursor().execute('SELECT 1')
+                conn.rollback()
+        except Exception:
+            if conn is not None and not conn.closed and probe:
+                conn.close()
+            self._slots.release()
+            raise
+        return PooledConnection(self, conn)
+
+    def release(self, conn):
+        # Only connections back in their default state are reused; autocommit ones (LISTEN,
+        # index builds) and broken ones are closed. rollback() is free when no transaction is open
+        reusable = not conn.closed and not conn.autocommit and conn.isolation_level is None and conn.readonly is None
+        if reusable:
+            try:
+                conn.rollback()
+            except psycopg2.Error:
+                reusable = False
+        if reusable:
+            with self._lock:
+                self._idle.append((conn, time.monotonic()))
+        elif not conn.closed:
+            conn.close()
+        self._slots.release()
+
+    def clear(self):
+        """Close the idle connections, so a forked child never shares a socket with its parent"""
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for conn, _ in idle:
+            conn.close()
+
+    def status(self):
+        with self._lock:
+            idle = len(self._idle)
+        return {'size': self.size, 'idle': idle, 'breaker': db_breaker.status()}
+
+db_pool = ConnectionPool(DB_POOL_SIZE, DB_POOL_TIMEOUT)
+os.register_at_fork(before=db_pool.clear)
+
+def connect_primary(**kwargs):
+    """A new connection to the primary, outside the pool"""
     try:
         return psycopg2.connect(
             host=os.getenv('DB_HOST', 'localhost'),
             port=os.getenv('DB_PORT', '5432'),
             user=os.getenv('DB_USER'),
             password=os.getenv('DB_PASSWORD'),
-            dbname=os.getenv('DB_NAME')
+            dbname=os.getenv('DB_NAME'),
+            connect_timeout=DB_CONNECT_TIMEOUT,
+            **kwargs
         )
     except psycopg2.Error as err:
         logger.error(f"Database connection error: {err}")
         raise
 
+# Database connection
+def get_db_connection():
+    conn = replica_router.connect() if should_read_from_replica() else None
+    if conn is None:
+        conn = db_pool.get()
+
+    timeout = STATEMENT_TIMEOUTS.get(g.get('route_class')) if has_request_context() else None
+    if timeout:
+        try:
+            conn.cursor().execute('SET LOCAL statement_timeout = %s', (timeout,))
+        except Exception:
+            conn.close()
+            raise
+    return conn
+
+
+# Postgres notifications - one LISTEN connection per worker, shared by the per-worker caches and
+# the admin event stream, with each notification routed to its channel's callbacks
+NOTIFICATION_POLL_SECONDS = 60
+
+class NotificationDispatcher:
+    """The worker's listener thread, following every channel a part of the app asked for
+
+    on_notify(payloads, cursor) gets each poll's payloads for the channel, in order. on_listen(cursor)
+    runs whenever the channel starts being listened on, including after a reconnect, so a cache can
+    load what changed while it was not listening. on_disconnect() runs when the connection is lost.
+    """
+
+    def __init__(self):
+        self._channels = {}  # channel -> (on_notify, on_listen, on_disconnect)
+        self._pending = []   # channels not yet listened on by the current connection
+        self._thread = None
+        self._wakeup = None  # pipe that interrupts the thread's select to take on new channels
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def listen(self, channel, on_notify, on_listen=None, on_disconnect=None):
+        """Follow a channel from now on, starting the thread if this worker has none running"""
+        if channel in self._channels and self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if channel not in self._channels:
+                self._channels[channel] = (on_notify, on_listen, on_disconnect)
+                self._pending.append(channel)
+                if self._wakeup is not None and self._pid == os.getpid():
+                    os.write(self._wakeup[1], b'\0')
+            if self._thread is None or not self._thread.is_alive():
+                if self._pid != os.getpid():
+                    # A forked worker shares the parent's pipe; it needs its own
+                    self._wakeup = os.pipe()
+                    self._pid = os.getpid()
+                self._thread = threading.Thread(target=self._run, name='notification-listener', daemon=True)
+                self._thread.start()
+
+    def _listen_pending(self, cursor):
+        with self._lock:
+            channels, self._pending = self._pending, []
+        for channel in channels:
+            cursor.execute(f'LISTEN {channel}')
+        # Listen first, then load, so no change falls between the two
+        for channel in channels:
+            on_listen = self._channels[channel][1]
+            if on_listen is not None:
+                on_listen(cursor)
+
+    def _run(self):
+        wakeup = self._wakeup[0]
+        while True:
+            try:
+                # Held for as long as the worker runs, so it does not take a pool slot
+                db = connect_primary()
+                db.set_isolation_level(psycopg2.extensions.ISOLATION_LEVEL_AUTOCOMMIT)
+                cursor = db.cursor()
+                with self._lock:
+                    self._pending = list(self._channels)
+                logger.info("Listening for notifications")
+
+                while True:
+                    self._listen_pending(cursor)
+                    ready = select.select([db, wakeup], [], [], NOTIFICATION_POLL_SECONDS)[0]
+                    if wakeup in ready:
+                        os.read(wakeup, 512)
+                    if db not in ready:
+                        continue
+                    db.poll()
+                    payloads = {}
+                    while db.notifies:
+                        notification = db.notifies.pop(0)
+                        payloads.setdefault(notification.channel, []).append(notification.payload)
+                    for channel, channel_payloads in payloads.items():
+                        self._channels[channel][0](channel_payloads, cursor)
+            except Exception as e:
+                logger.error(f"Notification listener error: {e}")
+                if 'db' in locals() and not db.closed:
+                    db.close()
+                with self._lock:
+                    handlers = list(self._channels.values())
+                for _, _, on_disconnect in handlers:
+                    if on_disconnect is not None:
+                        on_disconnect()
+                time.sleep(5)
+
+notifications = NotificationDispatcher()
+
+
+# Live admin updates - Postgres LISTEN/NOTIFY fanned out over Server-Sent Events
+ADMIN_EVENTS_CHANNEL = 'admin_events'
+SSE_MAX_CLIENTS = int(os.getenv('SSE_MAX_CLIENTS', '50'))  # per worker
+SSE_KEEPALIVE_SECONDS = 15
+SSE_CLIENT_QUEUE_SIZE = 100
+
+def json_default(value):
+    """json.dumps fallback for dates and decimals coming back from Postgres"""
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    return str(value)
+
+def notify_admins(cursor, event, data):
+    """Queue an admin event; Postgres delivers it to listeners when the transaction commits"""
+    cursor.execute('SELECT pg_notify(%s, %s)', (
+        ADMIN_EVENTS_CHANNEL,
+        json.dumps({'event': event, 'data': data}, default=json_default)
+    ))
+
+def notify_admins_many(cursor, event, items):
+    """notify_admins for a whole batch in a single round trip"""
+    cursor.execute('SELECT pg_notify(%s, payload) FROM unnest(%s::text[]) AS payload', (
+        ADMIN_EVENTS_CHANNEL,
+        [json.dumps({'event': event, 'data': item}, default=json_default) for item in items]
+    ))
+
+class AdminEventBroadcaster:
+    """The worker's admin events, fanned out to every connected admin"""
+
+    def __init__(self, max_clients):
+        self.max_clients = max_clients
+        self.clients = set()
+        self._lock = threading.Lock()
+
+    def subscribe(self):
+        """Return a queue of events for a new client, or None when the worker is full"""
+        with self._lock:
+            if len(self.clients) >= self.max_clients:
+                return None
+            client = queue.Queue(maxsize=SSE_CLIENT_QUEUE_SIZE)
+            self.clients.add(client)
+        # Events may have been missed while disconnected
+        notifications.listen(ADMIN_EVENTS_CHANNEL, self._publish_notifications,
+                             on_disconnect=lambda: self.publish({'event': 'resync', 'data': {}}))
+        return client
+
+    def unsubscribe(self, client):
+        with self._lock:
+            self.clients.discard(client)
+
+    def publish(self, message):
+        with self._lock:
+            clients = list(self.clients)
+        for client in clients:
+            try:
+                client.put_nowait(message)
+            except queue.Full:
+                # Slow client - drop its backlog and tell it to reload instead
+                while not client.empty():
+                    try:
+                        client.get_nowait()
+                    except queue.Empty:
+                        break
+                client.put_nowait({'event': 'resync', 'data': {}})
+
+    def _publish_notifications(self, payloads, cursor):
+        # The channel stays followed once a client has come, but nobody needs events parsed until another does
+        if not self.clients:
+            return
+        for payload in payloads:
+            try:
+                self.publish(json.loads(payload))
+            except ValueError:
+                logger.warning(f"Ignoring malformed admin event: {payload}")
+
+admin_events = AdminEventBroadcaster(SSE_MAX_CLIENTS)
+
+@app.route('/api/events', methods=['GET'])
+@admission_class('exempt')  # long-lived; SSE_MAX_CLIENTS limits these
+@admin_required
+def stream_admin_events():
+    """Stream purchase, contact and review events to the admin dashboard"""
+    if not ASYNC_WORKER:
+        # Each stream would hold a sync worker for as long as the tab is open
+        return jsonify({'status': 'error', 'message': 'Live updates require gevent workers'}), 503
+
+    client = admin_events.subscribe()
+    if client is None:
+        response = jsonify({'status': 'error', 'message': 'Too many live update connections'})
+        response.headers['Retry-After'] = '30'
+        return response, 503
+
+    def generate():
+        try:
+            yield 'retry: 5000\n\n'
+            while True:
+                try:
+                    message = client.get(timeout=SSE_KEEPALIVE_SECONDS)
+                except queue.Empty:
+                    yield ': keepalive\n\n'
+                    continue
+                yield f"event: {message['event']}\ndata: {json.dumps(message['data'], default=json_default)}\n\n"
+        finally:
+            admin_events.unsubscribe(client)
+
+    return Response(generate(), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
+    })
+
+
+# Shared user state - suspension and role for every user id, one byte each, in a file mapped
+# by every worker on the node. A single listener per node applies changes published by Postgres.
+USER_STATE_CHANNEL = 'user_state'
+# Named after the database, so deployments sharing a node (staging next to production) keep separate indexes
+USER_STATE_PATH = os.getenv('USER_STATE_PATH', os.path.join(
+    '/dev/shm' if os.path.isdir('/dev/shm') else tempfile.gettempdir(),
+    f"netdash-user-state-{os.getenv('DB_NAME', 'product_website')}"
+))
+USER_STATE_CAPACITY = int(os.getenv('USER_STATE_CAPACITY', str(4 * 1024 * 1024)))  # highest user id held, 1 byte each
+
+USER_STATE_KNOWN = 0x01
+USER_STATE_SUSPENDED = 0x02
+USER_STATE_DELETED = 0x04
+USER_STATE_ROLES = ['platform_admin', 'company_admin', 'guest']  # stored in bits 4-5 as index + 1
+
+class UserStateIndex:
+    """Array of user id -> (suspended, role) shared by the workers through a memory-mapped file
+
+    Each entry is a single byte, so reads and writes need no locking. A reload can briefly
+    overwrite a change committed after its snapshot, but the listener is already subscribed
+    by then and re-applies that change right after.
+    """
+
+    def __init__(self, path, capacity):
+        self.path = path
+        self.capacity = capacity
+        self._map = None
+        self._pid = None
+        self._listener_fd = None
+        self._listener_pid = None
+        self._listener_attempt_at = 0.0
+        self._lock = threading.Lock()
+
+    def _mapping(self):
+        if self._pid != os.getpid():
+            with self._lock:
+                if self._pid != os.getpid():
+                    fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+                    if os.fstat(fd).st_size < self.capacity:
+                        os.ftruncate(fd, self.capacity)
+                    self._map = mmap.mmap(fd, self.capacity)
+                    os.close(fd)
+                    self._pid = os.getpid()
+        return self._map
+
+    @staticmethod
+    def encode(role, suspended, deleted=False):
+        value = USER_STATE_KNOWN
+        if suspended:
+            value |= USER_STATE_SUSPENDED
+        if deleted:
+            value |= USER_STATE_DELETED
+        if role in USER_STATE_ROLES:
+            value |= (USER_STATE_ROLES.index(role) + 1) << 4
+        return value
+
+    @staticmethod
+    def decode(value):
+        role_code = (value >> 4) & 0x03
+        return {
+            'role': USER_STATE_ROLES[role_code - 1] if role_code else None,
+            'suspended': bool(value & USER_STATE_SUSPENDED),
+            'deleted': bool(value & USER_STATE_DELETED)
+        }
+
+    def get(self, user_id):
+        """Return the user's state, or None when this node does not know it yet"""
+        if not 0 < user_id < self.capacity:
+            return None
+        value = self._mapping()[user_id]
+        return self.decode(value) if value & USER_STATE_KNOWN else None
+
+    def set(self, user_id, role=None, suspended=False, deleted=False):
+        if 0 < user_id < self.capacity:
+            self._mapping()[user_id] = self.encode(role, suspended, deleted)
+
+    def reload(self, cursor):
+        """Rebuild the whole index from the users table"""
+        cursor.execute('''
+            SELECT id, role, is_suspended, deletion_requested_at IS NOT NULL FROM users WHERE id < %s
+        ''', (self.capacity,))
+        state = bytearray(self.capacity)
+        for user_id, role, suspended, deleted in cursor:
+            state[user_id] = self.encode(role, suspended, deleted)
+        self._mapping()[:] = bytes(state)
+        logger.info(f"User state index loaded ({cursor.rowcount} users)")
+
+    def apply(self, change):
+        if change.get('deleted'):
+            self.set(change['id'], deleted=True)
+        else:
+            self.set(change['id'], change.get('role'), change.get('suspended'))
+
+    def ensure_started(self):
+        """Make this worker the node's listener, unless another worker already is"""
+        pid = os.getpid()
+        if self._listener_pid == pid or time.monotonic() < self._listener_attempt_at:
+            return
+        with self._lock:
+            if self._listener_pid == pid or time.monotonic() < self._listener_attempt_at:
+                return
+            # The others try again every 5 seconds, to take over if the listening worker exits
+            self._listener_attempt_at = time.monotonic() + 5
+            if self._listener_fd is None or self._listener_fd[1] != pid:
+                # A lock taken through a descriptor inherited across fork would be the parent's
+                self._listener_fd = (os.open(self.path + '.listener', os.O_RDWR | os.O_CREAT, 0o600), pid)
+            try:
+                fcntl.flock(self._listener_fd[0], fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                return
+            self._listener_pid = pid
+        notifications.listen(USER_STATE_CHANNEL, self._apply_notifications, on_listen=self.reload)
+
+    def _apply_notifications(self, payloads, cursor):
+        for payload in payloads:
+            try:
+                change = json.loads(payload)
+            except ValueError:
+                logger.warning(f"Ignoring malformed user state change: {payload}")
+                continue
+            if change.get('reload'):
+                self.reload(cursor)
+            else:
+                self.apply(change)
+
+user_state = UserStateIndex(USER_STATE_PATH, USER_STATE_CAPACITY)
+
+@app.before_request
+def start_user_state_listener():
+    user_state.ensure_started()
+
+def lookup_user_state(user_id):
+    """Current state of a user - from the shared index, or the database if the index has no entry yet"""
+    state = user_state.get(user_id)
+    if state is not None:
+        return state
+
+    try:
+        db = get_db_connection()
+        cursor = db.cursor()
+        cursor.execute('SELECT role, is_suspended, deletion_requested_at IS NOT NULL FROM users WHERE id = %s', (user_id,))
+        row = cursor.fetchone()
+        if row is None:
+            return {'role': None, 'suspended': False, 'deleted': True}
+        return {'role': row[0], 'suspended': bool(row[1]), 'deleted': row[2]}
+    except Exception as e:
+        # Without the database the session is all there is to go on
+        logger.error(f"User state lookup error: {e}")
+        return None
+    finally:
+        if 'db' in locals():
+            db.close()
+
+def enforce_user_state():
+    """Return an error response if the session's user was suspended or deleted; refresh its role"""
+    state = lookup_user_state(session['user_id'])
+    if state is None:
+        return None
+    if state['deleted']:
+        session.clear()
+        return jsonify({'status': 'error', 'message': 'Authentication required'}), 401
+    if state['suspended']:
+        session.clear()
+        return jsonify({'status': 'error', 'message': 'Account is suspended'}), 403
+    if state['role'] and state['role'] != session.get('user_role'):
+        session['user_role'] = state['role']
+    return None
+
 
 # Initialize database
 def init_db():
@@ -232,11 +1396,623 @@ def update_database_schema():
             db.close()
 
 
+# Secondary indexes for the hot query paths (index name -> table and columns)
+SCHEMA_INDEXES = {
+    'idx_users_lower_email_unique': 'users (lower(email))',
+    'idx_users_id_covering': 'users (id) INCLUDE (name, email)',
+    'idx_purchases_user_id': 'purchases (user_id)',
+    'idx_purchases_status': 'purchases (status)',
+    'idx_purchases_purchase_date': 'purchases (purchase_date DESC) INCLUDE (id, user_id, plan_id, amount, status)',
+    'idx_purchases_pending': "purchases (purchase_date) WHERE status = 'pending'",
+    'idx_purchases_subscription': "purchases (user_id, (status = 'completed') DESC, (status = 'pending') DESC, purchase_date DESC)",
+    'idx_reviews_created_at': 'reviews (created_at DESC)',
+    'idx_reviews_is_approved': 'reviews (is_approved, created_at DESC)',
+    'idx_contacts_status_created_at': 'contacts (status, created_at DESC)',
+    'idx_demo_sessions_expiry_time': 'demo_sessions (expiry_time)',
+    'idx_demo_sessions_email': 'demo_sessions (email)',
+    'idx_reviews_user_id': 'reviews (user_id)',
+    'idx_password_reset_tokens_expires_at': 'password_reset_tokens (expires_at)',
+    'idx_users_change_xid': 'users (change_xid)',
+    'idx_reviews_change_xid': 'reviews (change_xid)',
+    'idx_contacts_change_xid': 'contacts (change_xid)',
+    'idx_purchases_change_xid': 'purchases (change_xid)',
+    'idx_deleted_rows_table_change_xid': 'deleted_rows (table_name, change_xid)',
+    'idx_job_runs_job_started_at': 'job_runs (job, started_at DESC)',
+}
+# Sign-in matches emails in any letter case, so no two accounts may differ only by case
+UNIQUE_INDEXES = {'idx_users_lower_email_unique'}
+# Indexes superseded by a SCHEMA_INDEXES entry (old name -> replacement), dropped once the replacement is valid
+RETIRED_INDEXES = {'idx_users_lower_email': 'idx_users_lower_email_unique'}
+
+# Advisory lock key so only one gunicorn worker builds indexes at a time
+INDEX_BUILD_LOCK_KEY = 726001
+
+# Tables whose admin lists support delta sync with ?since=
+CHANGE_TRACKED_TABLES = ['users', 'reviews', 'contacts', 'purchases']
+CHANGE_TRACKING_LOCK_KEY = 726002
+# Tombstones older than this are pruned, and ?since= tokens that may need them get 410
+DELETED_ROWS_RETENTION_DAYS = int(os.getenv('DELETED_ROWS_RETENTION_DAYS', '7'))
+
+def column_exists(cursor, table_name, column_name):
+    """Checked before ADD COLUMN IF NOT EXISTS, which takes an ACCESS EXCLUSIVE lock on the table
+    even when the column is already there"""
+    cursor.execute('''
+        SELECT 1 FROM information_schema.columns
+        WHERE table_schema = 'public' AND table_name = %s AND column_name = %s
+    ''', (table_name, column_name))
+    return cursor.fetchone() is not None
+
+def create_change_tracking():
+    """Add updated_at/change_xid columns, their triggers and the deleted_rows tombstone table"""
+    try:
+        db = get_db_connection()
+        cursor = db.cursor()
+
+        # Serialize with other workers running the same migration at startup
+        cursor.execute('SELECT pg_advisory_xact_lock(%s)', (CHANGE_TRACKING_LOCK_KEY,))
+
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS deleted_rows (
+                id BIGSERIAL PRIMARY KEY,
+                table_name TEXT NOT NULL,
+                row_id INT NOT NULL,
+                change_xid XID8 NOT NULL DEFAULT pg_current_xact_id(),
+                deleted_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+        # The newest change_xid among pruned tombstones; a token at or below it may miss deletions
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS deleted_rows_horizon (
+                id INT PRIMARY KEY CHECK (id = 1),
+                change_xid XID8 NOT NULL
+            )
+        ''')
+
+        # change_xid is the writing transaction's id. A client that saw everything up to a
+        # snapshot's xmin has seen every row whose change_xid is below it, whatever the commit order
+        cursor.execute('''
+            CREATE OR REPLACE FUNCTION track_row_change() RETURNS trigger AS $$
+            BEGIN
+                NEW.updated_at := CURRENT_TIMESTAMP;
+                NEW.change_xid := pg_current_xact_id();
+                RETURN NEW;
+            END;
+            $$ LANGUAGE plpgsql
+        ''')
+        cursor.execute('''
+            CREATE OR REPLACE FUNCTION record_deleted_row() RETURNS trigger AS $$
+            BEGIN
+                -- On a partitioned table TG_TABLE_NAME is the partition, so the parent is passed in
+                INSERT INTO deleted_rows (table_name, row_id) VALUES (COALESCE(TG_ARGV[0], TG_TABLE_NAME), OLD.id);
+                RETURN OLD;
+            END;
+            $$ LANGUAGE plpgsql
+        ''')
+
+        for table_name in CHANGE_TRACKED_TABLES:
+            # Neither column needs a table rewrite: a constant default and a nullable column
+            if not column_exists(cursor, table_name, 'updated_at'):
+                cursor.execute(f'ALTER TABLE {table_name} ADD COLUMN updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP')
+            if not column_exists(cursor, table_name, 'change_xid'):
+                cursor.execute(f'ALTER TABLE {table_name} ADD COLUMN change_xid XID8')
+
+            for trigger_name, definition in [
+                (f'{table_name}_track_change', f'BEFORE INSERT OR UPDATE ON {table_name} FOR EACH ROW EXECUTE FUNCTION track_row_change()'),
+                (f'{table_name}_record_delete', f"AFTER DELETE ON {table_name} FOR EACH ROW EXECUTE FUNCTION record_deleted_row('{table_name}')"),
+            ]:
+                cursor.execute('''
+                    SELECT 1 FROM pg_trigger
+                    WHERE tgname = %s AND tgrelid = %s::regclass
+                ''', (trigger_name, table_name))
+                if cursor.fetchone() is None:
+                    cursor.execute(f'CREATE TRIGGER {trigger_name} {definition}')
+
+        db.commit()
+        logger.info("Change tracking created or already exists")
+
+        cursor.close()
+        db.close()
+
+    except Exception as e:
+        logger.error(f"Change tracking setup error: {e}")
+        if 'db' in locals():
+            db.close()
+
+USER_STATE_LOCK_KEY = 726003
+
+def create_user_state_triggers():
+    """Publish role, suspension and deletion changes on the user_state channel for every node's index"""
+    try:
+        db = get_db_connection()
+        cursor = db.cursor()
+        cursor.execute('SELECT pg_advisory_xact_lock(%s)', (USER_STATE_LOCK_KEY,))
+
+        # Statement-level so a bulk change becomes a single reload instead of a notification per row
+        cursor.execute('''
+            CREATE OR REPLACE FUNCTION publish_user_state() RETURNS trigger AS $$
+            DECLARE
+                payloads TEXT[];
+            BEGIN
+                IF TG_OP = 'INSERT' THEN
+                    SELECT array_agg(json_build_object('id', id, 'role', role, 'suspended', COALESCE(is_suspended, FALSE))::text)
+                    INTO payloads FROM new_rows;
+                ELSIF TG_OP = 'UPDATE' THEN
+                    SELECT array_agg(json_build_object(
+                        'id', n.id, 'role', n.role, 'suspended', COALESCE(n.is_suspended, FALSE),
+                        'deleted', n.deletion_requested_at IS NOT NULL
+                    )::text)
+                    INTO payloads
+                    FROM new_rows n JOIN old_rows o ON o.id = n.id
+                    WHERE n.role IS DISTINCT FROM o.role OR n.is_suspended IS DISTINCT FROM o.is_suspended
+                       OR n.deletion_requested_at IS DISTINCT FROM o.deletion_requested_at;
+                ELSE
+                    SELECT array_agg(json_build_object('id', id, 'deleted', TRUE)::text)
+                    INTO payloads FROM old_rows;
+                END IF;
+
+                IF payloads IS NULL THEN
+                    RETURN NULL;
+                ELSIF array_length(payloads, 1) > 500 THEN
+                    PERFORM pg_notify('user_state', '{"reload": true}');
+                ELSE
+                    PERFORM pg_notify('user_state', payload) FROM unnest(payloads) AS payload;
+                END IF;
+                RETURN NULL;
+            END;
+            $$ LANGUAGE plpgsql
+        ''')
+
+        # Transition tables allow only one event per trigger
+        for trigger_name, definition in [
+            ('users_publish_insert', 'AFTER INSERT ON users REFERENCING NEW TABLE AS new_rows'),
+            ('users_publish_update', 'AFTER UPDATE ON users REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows'),
+            ('users_publish_delete', 'AFTER DELETE ON users REFERENCING OLD TABLE AS old_rows'),
+        ]:
+            cursor.execute('''
+                SELECT 1 FROM pg_trigger
+                WHERE tgname = %s AND tgrelid = 'users'::regclass
+            ''', (trigger_name,))
+            if cursor.fetchone() is None:
+                cursor.execute(f'CREATE TRIGGER {trigger_name} {definition} FOR EACH STATEMENT EXECUTE FUNCTION publish_user_state()')
+
+        db.commit()
+        logger.info("User state triggers created or already exist")
+
+        cursor.close()
+        db.close()
+
+    except Exception as e:
+        logger.error(f"User state trigger setup error: {e}")
+        if 'db' in locals():
+            db.close()
+
+SUBSCRIPTION_LOCK_KEY = 726004
+# Users hash into this many lock slots, so a bulk change takes a bounded number of locks
+SUBSCRIPTION_LOCK_SLOTS = 256
+
+def create_subscription_tracking():
+    """Backfill the subscriptions table and publish its changes on the entitlements channel"""
+    try:
+        db = get_db_connection()
+        cursor = db.cursor()
+        cursor.execute('SELECT pg_advisory_xact_lock(%s)', (SUBSCRIPTION_LOCK_KEY,))
+
+        cursor.execute('SELECT EXISTS (SELECT 1 FROM subscriptions)')
+        if not cursor.fetchone()[0]:
+            cursor.execute(f'''
+                INSERT INTO subscriptions (user_id, plan_id, purchase_id, status, started_at)
+                SELECT DISTINCT ON (user_id) user_id, plan_id, id, {SUBSCRIPTION_STATUS_SQL}, purchase_date
+                FROM purchases
+                WHERE user_id IS NOT NULL
+                ORDER BY user_id, {SUBSCRIPTION_PRIORITY_SQL}
+            ''')
+            logger.info(f"Backfilled {cursor.rowcount} subscriptions")
+
+        cursor.execute('''
+            CREATE OR REPLACE FUNCTION publish_entitlement() RETURNS trigger AS $$
+            BEGIN
+                IF TG_TABLE_NAME = 'plans' THEN
+                    PERFORM pg_notify('entitlements', '{"plans": true}');
+                ELSIF TG_OP = 'DELETE' THEN
+                    PERFORM pg_notify('entitlements', json_build_object('user_id', OLD.user_id)::text);
+                ELSE
+                    PERFORM pg_notify('entitlements', json_build_object(
+                        'user_id', NEW.user_id, 'plan_id', NEW.plan_id, 'status', NEW.status
+                    )::text);
+                END IF;
+                RETURN NULL;
+            END;
+            $$ LANGUAGE plpgsql
+        ''')
+
+        for table_name, trigger_name, definition in [
+            ('subscriptions', 'subscriptions_publish', 'AFTER INSERT OR UPDATE OR DELETE ON subscriptions FOR EACH ROW'),
+            ('plans', 'plans_publish', 'AFTER INSERT OR UPDATE OR DELETE ON plans FOR EACH STATEMENT'),
+        ]:
+            cursor.execute('''
+                SELECT 1 FROM pg_trigger
+                WHERE tgname = %s AND tgrelid = %s::regclass
+            ''', (trigger_name, table_name))
+            if cursor.fetchone() is None:
+                cursor.execute(f'CREATE TRIGGER {trigger_name} {definition} EXECUTE FUNCTION publish_entitlement()')
+
+        db.commit()
+        logger.info("Subscription tracking created or already exists")
+
+        cursor.close()
+        db.close()
+
+    except Exception as e:
+        logger.error(f"Subscription tracking setup error: {e}")
+        if 'db' in locals():
+            db.close()
+
+LANDING_LOCK_KEY = 726006
+# Tables behind the landing page bundle; each is one section of /api/landing
+LANDING_SECTIONS = ['plans', 'reviews', 'features', 'guides', 'downloads']
+
+def create_landing_tracking():
+    """Publish the name of every landing table that changes on the landing channel"""
+    try:
+        db = get_db_connection()
+        cursor = db.cursor()
+        cursor.execute('SELECT pg_advisory_xact_lock(%s)', (LANDING_LOCK_KEY,))
+
+        # Statement-level, and Postgres folds identical notifications within a transaction,
+        # so a bulk load is a single reload of its section
+        cursor.execute('''
+            CREATE OR REPLACE FUNCTION publish_landing() RETURNS trigger AS $$
+            BEGIN
+                PERFORM pg_notify('landing', TG_TABLE_NAME);
+                RETURN NULL;
+            END;
+            $$ LANGUAGE plpgsql
+        ''')
+
+        for table_name in LANDING_SECTIONS:
+            trigger_name = f'{table_name}_publish_landing'
+            cursor.execute('''
+                SELECT 1 FROM pg_trigger
+                WHERE tgname = %s AND tgrelid = %s::regclass
+            ''', (trigger_name, table_name))
+            if cursor.fetchone() is None:
+                cursor.execute(f'CREATE TRIGGER {trigger_name} AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON {table_name} '
+                               'FOR EACH STATEMENT EXECUTE FUNCTION publish_landing()')
+
+        db.commit()
+        logger.info("Landing tracking created or already exists")
+
+        cursor.close()
+        db.close()
+
+    except Exception as e:
+        logger.error(f"Landing tracking setup error: {e}")
+        if 'db' in locals():
+            db.close()
+
+# Monthly range partitions of purchases (purchases_YYYY_MM)
+PURCHASE_PARTITIONS_AHEAD = int(os.getenv('PURCHASE_PARTITIONS_AHEAD', '3'))  # months created in advance
+PURCHASE_RETENTION_MONTHS = int(os.getenv('PURCHASE_RETENTION_MONTHS', '0'))  # 0 keeps every month
+PURCHASE_RETENTION_ACTION = os.getenv('PURCHASE_RETENTION_ACTION', 'archive')  # or 'drop'
+PURCHASE_ARCHIVE_SCHEMA = 'archive'
+PARTITION_MAINTENANCE_LOCK_KEY = 726005
+
+def create_purchase_partitioning():
+    """Define create_purchase_partitions(), which adds any missing monthly partitions in a date range"""
+    try:
+        db = get_db_connection()
+        cursor = db.cursor()
+        cursor.execute('SELECT pg_advisory_xact_lock(%s)', (PARTITION_MAINTENANCE_LOCK_KEY,))
+
+        # A no-op until purchases is partitioned, so seed scripts can call it either way
+        cursor.execute('''
+            CREATE OR REPLACE FUNCTION create_purchase_partitions(from_date DATE, to_date DATE, parent TEXT DEFAULT 'purchases')
+            RETURNS INT AS $$
+            DECLARE
+                month DATE := date_trunc('month', from_date);
+                partition_name TEXT;
+                created INT := 0;
+            BEGIN
+                IF (SELECT relkind FROM pg_class WHERE oid = to_regclass(parent)) IS DISTINCT FROM 'p' THEN
+                    RETURN 0;
+                END IF;
+                WHILE month <= to_date LOOP
+                    partition_name := 'purchases_' || to_char(month, 'YYYY_MM');
+                    IF to_regclass(partition_name) IS NULL THEN
+                        EXECUTE format('CREATE TABLE %I PARTITION OF %I FOR VALUES FROM (%L) TO (%L)',
+                                       partition_name, parent, month, month + INTERVAL '1 month');
+                        created := created + 1;
+                    END IF;
+                    month := month + INTERVAL '1 month';
+                END LOOP;
+                RETURN created;
+            END;
+            $$ LANGUAGE plpgsql
+        ''')
+
+        db.commit()
+        cursor.close()
+        db.close()
+
+    except Exception as e:
+        logger.error(f"Purchase partitioning setup error: {e}")
+        if 'db' in locals():
+            db.close()
+
+def maintain_purchase_partitions():
+    """Create the coming months' purchases partitions and retire those past PURCHASE_RETENTION_MONTHS"""
+    try:
+        db = get_db_connection()
+        # DETACH PARTITION CONCURRENTLY cannot run inside a transaction block
+        db.autocommit = True
+        cursor = db.cursor()
+
+        cursor.execute('SELECT pg_try_advisory_lock(%s)', (PARTITION_MAINTENANCE_LOCK_KEY,))
+        if not cursor.fetchone()[0]:
+            db.close()
+            return
+
+        try:
+            cursor.execute(
+                "SELECT create_purchase_partitions(CURRENT_DATE, (CURRENT_DATE + %s * INTERVAL '1 month')::date)",
+                (PURCHASE_PARTITIONS_AHEAD,)
+            )
+            created = cursor.fetchone()[0]
+            if created:
+                logger.info(f"Created {created} purchases partitions")
+
+            if PURCHASE_RETENTION_MONTHS > 0:
+                # Retention drops whole months, so no DELETE and no table bloat
+                cursor.execute('''
+                    SELECT c.relname, i.inhdetachpending
+                    FROM pg_inherits i
+                    JOIN pg_class c ON c.oid = i.inhrelid
+                    WHERE i.inhparent = 'purchases'::regclass
+                      AND c.relname ~ '^purchases_[0-9]{4}_[0-9]{2}$'
+                      AND to_date(right(c.relname, 7), 'YYYY_MM') < date_trunc('month', CURRENT_DATE) - %s * INTERVAL '1 month'
+                    ORDER BY c.relname
+                ''', (PURCHASE_RETENTION_MONTHS,))
+                for partition, detach_pending in cursor.fetchall():
+                    retire_purchase_partition(cursor, partition, detach_pending)
+        finally:
+            cursor.execute('SELECT pg_advisory_unlock(%s)', (PARTITION_MAINTENANCE_LOCK_KEY,))
+
+        cursor.close()
+        db.close()
+
+    except Exception as e:
+        logger.error(f"Purchase partition maintenance error: {e}")
+        if 'db' in locals():
+            db.close()
+
+def retire_purchase_partition(cursor, partition, detach_pending=False):
+    """Detach a month of purchases without blocking writes, then archive or drop it"""
+    if detach_pending:
+        # A previous concurrent detach was interrupted
+        cursor.execute(f'ALTER TABLE purchases DETACH PARTITION {partition} FINALIZE')
+    else:
+        cursor.execute(f'ALTER TABLE purchases DETACH PARTITION {partition} CONCURRENTLY')
+
+    # The month's rows leave purchases without delete triggers, so no tombstones record them.
+    # Moving the ?since= horizon past the detach sends clients holding them back to a full load
+    cursor.execute('''
+        INSERT INTO deleted_rows_horizon (id, change_xid)
+        VALUES (1, pg_current_xact_id())
+        ON CONFLICT (id) DO UPDATE
+            SET change_xid = GREATEST(deleted_rows_horizon.change_xid, EXCLUDED.change_xid)
+    ''')
+
+    if PURCHASE_RETENTION_ACTION == 'drop':
+        cursor.execute(f'DROP TABLE {partition}')
+        logger.info(f"Dropped purchases partition {partition}")
+    else:
+        cursor.execute(f'CREATE SCHEMA IF NOT EXISTS {PURCHASE_ARCHIVE_SCHEMA}')
+        cursor.execute(f'ALTER TABLE {partition} SET SCHEMA {PURCHASE_ARCHIVE_SCHEMA}')
+        logger.info(f"Archived purchases partition {partition} to {PURCHASE_ARCHIVE_SCHEMA}.{partition}")
+
+def get_change_token(cursor):
+    """Token for ?since= - the oldest transaction still invisible to this snapshot"""
+    cursor.execute('SELECT pg_snapshot_xmin(pg_current_snapshot())::text AS token')
+    row = cursor.fetchone()
+    return row['token'] if isinstance(row, dict) else row[0]
+
+def parse_change_token():
+    """Return the ?since= token from the request, None when absent, or raise ValueError"""
+    since = request.args.get('since')
+    if since is None:
+        return None
+    if not since.isdigit():
+        raise ValueError('Invalid change token')
+    return since
+
+def get_deleted_ids(cursor, table_name, since):
+    """Ids deleted since the token, or None when some of their tombstones may have been pruned"""
+    # One statement, so a purge cannot slip in between the horizon check and the read
+    cursor.execute('''
+        SELECT COALESCE((SELECT change_xid >= %(since)s::xid8 FROM deleted_rows_horizon), FALSE) AS expired,
+               ARRAY(
+                   SELECT DISTINCT row_id FROM deleted_rows
+                   WHERE table_name = %(table_name)s AND change_xid >= %(since)s::xid8
+               ) AS deleted
+    ''', {'table_name': table_name, 'since': since})
+    row = cursor.fetchone()
+    return None if row['expired'] else row['deleted']
+
+def change_set_response(rows, token, since, cursor, table_name):
+    """Full list on first load, only the changes and deletions when ?since= is given"""
+    if since is None:
+        response = jsonify(rows)
+    else:
+        deleted = get_deleted_ids(cursor, table_name, since)
+        if deleted is None:
+            return jsonify({
+                'status': 'error',
+                'message': 'Change token expired, reload the full list',
+                'resync': True
+            }), 410
+        response = jsonify({
+            'changed': rows,
+            'deleted': deleted,
+            'token': token
+        })
+    response.headers['X-Change-Token'] = token
+    return response
+
+def drop_invalid_index(cursor, index_name):
+    """An interrupted concurrent build leaves an INVALID index behind - drop it so it is rebuilt"""
+    cursor.execute('''
+        SELECT i.indisvalid
+        FROM pg_index i
+        JOIN pg_class c ON c.oid = i.indexrelid
+        WHERE c.relname = %s
+    ''', (index_name,))
+    existing = cursor.fetchone()
+    if existing and not existing[0]:
+        logger.warning(f"Dropping invalid index {index_name}")
+        cursor.execute(f'DROP INDEX CONCURRENTLY IF EXISTS {index_name}')
+
+def create_partitioned_index(cursor, index_name, table_name, columns):
+    """CONCURRENTLY is not allowed on a partitioned table, so build each partition's index online and attach it"""
+    # ON ONLY creates an invalid parent index without touching the partitions; it turns
+    # valid once every partition's index is attached
+    cursor.execute(f'CREATE INDEX IF NOT EXISTS {index_name} ON ONLY {table_name} {columns}')
+
+    # Partitions created later get their copy of the index automatically, so only
+    # partitions without one attached need building
+    cursor.execute('''
+        SELECT c.relname
+        FROM pg_inherits i
+        JOIN pg_class c ON c.oid = i.inhrelid
+        WHERE i.inhparent = %s::regclass
+          AND NOT EXISTS (
+              SELECT 1
+              FROM pg_inherits attached
+              JOIN pg_index x ON x.indexrelid = attached.inhrelid
+              WHERE attached.inhparent = %s::regclass AND x.indrelid = c.oid
+          )
+        ORDER BY c.relname
+    ''', (table_name, index_name))
+    for (partition,) in cursor.fetchall():
+        partition_index = f"{index_name}_{partition[len(table_name) + 1:]}"
+        drop_invalid_index(cursor, partition_index)
+        cursor.execute(f'CREATE INDEX CONCURRENTLY IF NOT EXISTS {partition_index} ON {partition} {columns}')
+        cursor.execute(f'ALTER INDEX {index_name} ATTACH PARTITION {partition_index}')
+
+def create_indexes():
+    """Build missing secondary indexes online with CREATE INDEX CONCURRENTLY"""
+    try:
+        db = get_db_connection()
+        # CREATE INDEX CONCURRENTLY cannot run inside a transaction block
+        db.autocommit = True
+        cursor = db.cursor()
+
+        cursor.execute('SELECT pg_try_advisory_lock(%s)', (INDEX_BUILD_LOCK_KEY,))
+        if not cursor.fetchone()[0]:
+            logger.info("Index build already running in another worker, skipping")
+            db.close()
+            return
+
+        try:
+            for index_name, definition in SCHEMA_INDEXES.items():
+                try:
+                    table_name, columns = definition.split(' ', 1)
+                    cursor.execute('SELECT relkind FROM pg_class WHERE oid = to_regclass(%s)', (table_name,))
+                    if cursor.fetchone() == ('p',):
+                        create_partitioned_index(cursor, index_name, table_name, columns)
+                    else:
+                        drop_invalid_index(cursor, index_name)
+                        unique = 'UNIQUE ' if index_name in UNIQUE_INDEXES else ''
+                        cursor.execute(f'CREATE {unique}INDEX CONCURRENTLY IF NOT EXISTS {index_name} ON {definition}')
+                    logger.info(f"{index_name} index created or already exists")
+                except psycopg2.Error as e:
+                    logger.error(f"Error creating {index_name} index: {e}")
+
+            for index_name, replacement in RETIRED_INDEXES.items():
+                cursor.execute('''
+                    SELECT i.indisvalid FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid
+                    WHERE c.relname = %s
+                ''', (replacement,))
+                if cursor.fetchone() == (True,):
+                    cursor.execute(f'DROP INDEX CONCURRENTLY IF EXISTS {index_name}')
+        finally:
+            cursor.execute('SELECT pg_advisory_unlock(%s)', (INDEX_BUILD_LOCK_KEY,))
+
+        cursor.close()
+        db.close()
+
+    except Exception as e:
+        logger.error(f"Index creation error: {e}")
+        if 'db' in locals():
+            db.close()
+
+
+# Sparse fieldsets - ?fields=a,b narrows a route's SELECT list and its JSON to those fields.
+# Each resource allowlists its fields as name -> SQL expression, in default output order
+API_FIELDS = {
+    'profile': {
+        'id': 'id', 'email': 'email', 'first_name': 'first_name', 'last_name': 'last_name', 'name': 'name',
+        'role': 'role', 'is_suspended': 'is_suspended', 'created_at': 'created_at', 'updated_at': 'updated_at'
+    },
+    'users': {
+        'id': 'id', 'first_name': 'first_name', 'last_name': 'last_name', 'email': 'email', 'role': 'role',
+        'is_suspended': 'is_suspended', 'created_at': 'created_at', 'updated_at': 'updated_at'
+    },
+    'reviews': {
+        'id': 'id', 'user_id': 'user_id', 'name': 'name', 'rating': 'rating', 'comment': 'comment',
+        'is_approved': 'is_approved', 'created_at': 'created_at', 'updated_at': 'updated_at'
+    },
+    'contacts': {
+        'id': 'id', 'name': 'name', 'email': 'email', 'message': 'message', 'status': 'status',
+        'created_at': 'created_at', 'updated_at': 'updated_at'
+    },
+    # Fields outside p.* join their table; without them idx_purchases_purchase_date covers the page
+    'purchases': {
+        'id': 'p.id', 'user_id': 'p.user_id', 'plan_id': 'p.plan_id', 'amount': 'p.amount', 'status': 'p.status',
+        'purchase_date': 'p.purchase_date', 'user_name': 'u.name', 'email': 'u.email', 'plan_name': 'pl.name'
+    },
+}
+API_FIELD_ROUTES = {
+    'profile': '/api/profile', 'users': '/api/users', 'reviews': '/api/reviews',
+    'contacts': '/api/contacts', 'purchases': '/api/purchases'
+}
+
+def requested_fields(resource):
+    """Names of the fields ?fields= asks for (all by default) and their SQL select list.
+    Raises ValueError for a field the resource does not allowlist"""
+    available = API_FIELDS[resource]
+    if not request.args.get('fields'):
+        names = list(available)
+    else:
+        names = list(dict.fromkeys(name.strip() for name in request.args['fields'].split(',') if name.strip()))
+        unknown = [name for name in names if name not in available]
+        if unknown:
+            raise ValueError(f"Unknown {resource} fields: {', '.join(unknown)}")
+        # Delta sync merges rows by id, so every row keeps it
+        if 'id' not in names:
+            names.insert(0, 'id')
+    return names, ', '.join(f'{available[name]} AS {name}' for name in names)
+
+@app.route('/api/schema', methods=['GET'])
+@login_required
+def get_api_schema():
+    """The fields each route accepts in ?fields="""
+    return jsonify({
+        resource: {'path': API_FIELD_ROUTES[resource], 'fields': list(fields)}
+        for resource, fields in API_FIELDS.items()
+    }), 200
+
+
 # Routes
 @app.route('/')
 @app.route('/index.html')
 def index():
-    return send_from_directory('frontend', 'index.html')
+    if LANDING_PAGE:
+        try:
+            return landing_page.response()
+        except Exception as e:
+            logger.error(f"Landing page error: {e}")
+    # The static page loads the same data from /api/landing
+    return send_page('index.html')
 
 
 
@@ -257,12 +2033,15 @@ def register():
                 'message': 'All fields are required'
             }), 400
         
+        # Stored in lower case; idx_users_lower_email_unique refuses the same address in another case
+        data['email'] = data['email'].strip().lower()
+        
+        # Hash password before taking a pool connection
+        hashed_password = run_blocking(generate_password_hash, data['password'])
+        
         db = get_db_connection()
         cursor = db.cursor()
         
-        # Hash password
-        hashed_password = generate_password_hash(data['password'])
-        
         # Create name from first_name and last_name
         name = f"{data.get('first_name', '')} {data.get('last_name', '')}".strip()
         
@@ -323,22 +2102,25 @@ def register():
 # Profile Routes
 @app.route('/api/profile', methods=['GET'])
 @login_required
+@read_only
 def get_profile():
     try:
+        _, columns = requested_fields('profile')
         db = get_db_connection()
         cursor = db.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
         
-        cursor.execute('SELECT * FROM users WHERE id = %s', (session['user_id'],))
+        # Only allowlisted columns, so the password hash never leaves the database
+        cursor.execute(f'SELECT {columns} FROM users WHERE id = %s', (session['user_id'],))
         user = cursor.fetchone()
         
         if not user:
             return jsonify({'status': 'error', 'message': 'User not found'}), 404
         
-        # Remove sensitive data
-        user.pop('password_hash', None)
-        
         return jsonify(user), 200
     
+    except ValueError as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 400
+    
     except Exception as e:
         logger.error(f"Profile error: {e}")
         return jsonify({'status': 'error', 'message': 'An unexpected error occurred'}), 500
@@ -352,12 +2134,13 @@ def get_profile():
 def guest_dashboard():
     if session.get('user_role') != 'guest':
         return jsonify({'status': 'error', 'message': 'Access denied'}), 403
-    return send_from_directory('frontend', 'guest_dashboard.html')
+    return send_page('guest_dashboard.html')
 
 
 # Analytics Routes
 @app.route('/api/analytics', methods=['GET'])
 @admin_required
+@read_only
 def get_analytics():
     try:
         db = get_db_connection()
@@ -384,6 +2167,15 @@ def get_analytics():
         # Calculate active subscriptions (you can decide whether to include pending ones)
         active_subscriptions = completed_subscriptions + pending_subscriptions
 
+        # Revenue this month - the date range prunes the scan to this month's partition
+        cursor.execute('''
+            SELECT COALESCE(SUM(amount), 0) AS revenue FROM purchases
+            WHERE status = 'completed'
+              AND purchase_date >= date_trunc('month', CURRENT_DATE)
+              AND purchase_date < date_trunc('month', CURRENT_DATE) + INTERVAL '1 month'
+        ''')
+        revenue_this_month = float(cursor.fetchone()['revenue'])
+
         # Get total reviews
         cursor.execute('SELECT COUNT(*) as count FROM reviews')
         total_reviews = cursor.fetchone()['count']
@@ -397,6 +2189,7 @@ def get_analytics():
             'active_subscriptions': active_subscriptions,
             'completed_subscriptions': completed_subscriptions,
             'pending_subscriptions': pending_subscriptions,
+            'revenue_this_month': revenue_this_month,
             'total_reviews': total_reviews,
             'pending_contacts': pending_contacts
         }), 200
@@ -410,30 +2203,151 @@ def get_analytics():
             db.close()
 
 
+# Admin dashboard bootstrap - the profile, analytics and the first page of every panel in one
+# response. Postgres builds the whole document in a single statement, so it costs one round trip
+# (psycopg2 has no pipeline mode) and comes back as JSON text that is sent as is
+ADMIN_BOOTSTRAP_PAGE_SIZE = int(os.getenv('ADMIN_BOOTSTRAP_PAGE_SIZE', '50'))
+ADMIN_BOOTSTRAP_MAX_PAGE_SIZE = 500
+
+ADMIN_BOOTSTRAP_SQL = '''
+    SELECT json_build_object(
+        'token', pg_snapshot_xmin(pg_current_snapshot())::text,
+        'profile', (SELECT to_jsonb(u) - 'password_hash' - 'change_xid' FROM users u WHERE u.id = %(user_id)s),
+        'analytics', (
+            SELECT json_build_object(
+                'total_users', (SELECT COUNT(*) FROM users),
+                'active_subscriptions', p.completed + p.pending,
+                'completed_subscriptions', p.completed,
+                'pending_subscriptions', p.pending,
+                'revenue_this_month', (
+                    SELECT COALESCE(SUM(amount), 0)::float FROM purchases
+                    WHERE status = 'completed'
+                      AND purchase_date >= date_trunc('month', CURRENT_DATE)
+                      AND purchase_date < date_trunc('month', CURRENT_DATE) + INTERVAL '1 month'
+                ),
+                'total_reviews', (SELECT COUNT(*) FROM reviews),
+                'pending_contacts', (SELECT COUNT(*) FROM contacts WHERE status = 'new')
+            )
+            FROM (
+                SELECT COUNT(*) FILTER (WHERE status = 'completed') AS completed,
+                       COUNT(*) FILTER (WHERE status = 'pending') AS pending
+                FROM purchases
+                WHERE status IN ('completed', 'pending')
+            ) p
+        ),
+        'users', (
+            SELECT COALESCE(json_agg(u ORDER BY u.id), '[]') FROM (
+                SELECT id, first_name, last_name, email, role, is_suspended, created_at, updated_at
+                FROM users ORDER BY id LIMIT %(limit)s
+            ) u
+        ),
+        'plans', (
+            SELECT COALESCE(json_agg(pl ORDER BY pl.id), '[]') FROM (
+                SELECT id, name, price::text AS price,
+                       CASE WHEN json_typeof(features) = 'array' THEN features ELSE '[]' END AS features,
+                       is_active, created_at
+                FROM plans
+            ) pl
+        ),
+        'reviews', (
+            SELECT COALESCE(json_agg(r ORDER BY r.created_at DESC), '[]') FROM (
+                SELECT id, user_id, name, rating, comment, is_approved, created_at, updated_at
+                FROM reviews ORDER BY created_at DESC LIMIT %(limit)s
+            ) r
+        ),
+        'contacts', (
+            SELECT COALESCE(json_agg(c ORDER BY c.created_at DESC), '[]') FROM (
+                SELECT id, name, email, message, status, created_at, updated_at
+                FROM contacts ORDER BY created_at DESC LIMIT %(limit)s
+            ) c
+        ),
+        'purchases', (
+            SELECT COALESCE(json_agg(p ORDER BY p.purchase_date DESC), '[]') FROM (
+                SELECT p.id, p.user_id, p.plan_id, p.amount::text AS amount, p.status, p.purchase_date,
+                       u.name AS user_name, u.email, pl.name AS plan_name
+                FROM purchases p
+                LEFT JOIN users u ON p.user_id = u.id
+                JOIN plans pl ON p.plan_id = pl.id
+                ORDER BY p.purchase_date DESC
+                LIMIT %(limit)s
+            ) p
+        )
+    )::text
+'''
+
+@app.route('/api/admin/bootstrap', methods=['GET'])
+@admin_required
+@read_only
+def get_admin_bootstrap():
+    """Everything the admin dashboard shows on load, from one consistent snapshot.
+    `token` works as ?since= for each of the lists"""
+    try:
+        limit = min(request.args.get('limit', ADMIN_BOOTSTRAP_PAGE_SIZE, type=int), ADMIN_BOOTSTRAP_MAX_PAGE_SIZE)
+        if limit < 1:
+            return jsonify({'status': 'error', 'message': 'limit must be positive'}), 400
+
+        db = get_db_connection()
+        cursor = db.cursor()
+        # Only SET LOCAL has run in this transaction, so its isolation can still be chosen. One
+        # snapshot keeps the counts in line with the lists and lets one change token cover them all
+        cursor.execute('SET TRANSACTION ISOLATION LEVEL REPEATABLE READ, READ ONLY')
+        cursor.execute(ADMIN_BOOTSTRAP_SQL, {'user_id': session['user_id'], 'limit': limit})
+        body = cursor.fetchone()[0]
+
+        response = Response(body, mimetype='application/json')
+        response.headers['Cache-Control'] = 'no-store'
+        return response, 200
+
+    except Exception as e:
+        logger.error(f"Admin bootstrap error: {e}")
+        return jsonify({'status': 'error', 'message': 'An unexpected error occurred'}), 500
+
+    finally:
+        if 'db' in locals():
+            db.close()
+
+
 # User Management Routes
 @app.route('/api/users', methods=['GET'])
+@admission_class('export', paged_by=('since',))
 @admin_required
+@read_only
 def get_users():
     try:
         db = get_db_connection()
         cursor = db.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
         
         search_term = request.args.get('search', '')
+        since = parse_change_token()
+        _, columns = requested_fields('users')
         
-        if search_term:
-            cursor.execute('''
-                SELECT id, first_name, last_name, email, role, is_suspended, created_at 
+        # Taken before reading so nothing committed in between is missed next time
+        token = get_change_token(cursor)
+        
+        if since is not None:
+            cursor.execute(f'''
+                SELECT {columns} 
+                FROM users 
+                WHERE change_xid >= %s::xid8
+                AND (%s = '' OR email LIKE %s OR first_name LIKE %s OR last_name LIKE %s)
+            ''', (since, search_term, f'%{search_term}%', f'%{search_term}%', f'%{search_term}%'))
+        elif search_term:
+            cursor.execute(f'''
+                SELECT {columns} 
                 FROM users 
                 WHERE email LIKE %s OR first_name LIKE %s OR last_name LIKE %s
             ''', (f'%{search_term}%', f'%{search_term}%', f'%{search_term}%'))
         else:
-            cursor.execute('''
-                SELECT id, first_name, last_name, email, role, is_suspended, created_at 
+            cursor.execute(f'''
+                SELECT {columns} 
                 FROM users
             ''')
         
         users = cursor.fetchall()
-        return jsonify(users), 200
+        return change_set_response(users, token, since, cursor, 'users')
+    
+    except ValueError as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 400
     
     except Exception as e:
         logger.error(f"Users error: {e}")
@@ -445,6 +2359,7 @@ def get_users():
 
 @app.route('/api/users/<int:user_id>', methods=['GET'])
 @admin_required
+@read_only
 def get_user_details(user_id):
     try:
         db = get_db_connection()
@@ -462,7 +2377,9 @@ def get_user_details(user_id):
         
         # Add name field for compatibility
         user['name'] = f"{user.get('first_name', '')} {user.get('last_name', '')}".strip()
-        user['plan_name'] = 'Free Trial'  # Placeholder
+        entitlement = get_entitlements(user_id, cursor)
+        user['plan_name'] = entitlement['plan_name'] if entitlement['status'] == 'active' else None
+        user['subscription_status'] = entitlement['status']
         
         return jsonify(user), 200
     
@@ -481,8 +2398,17 @@ def suspend_user(user_id):
         db = get_db_connection()
         cursor = db.cursor()
         
-        cursor.execute('UPDATE users SET is_suspended = TRUE WHERE id = %s', (user_id,))
+        cursor.execute('''
+            UPDATE users SET is_suspended = TRUE WHERE id = %s
+            RETURNING role, deletion_requested_at IS NOT NULL
+        ''', (user_id,))
+        row = cursor.fetchone()
         db.commit()
+
+        # Other nodes hear about it through the users_publish_update trigger. The entry is
+        # written whole, so it carries the user's pending deletion along with the new suspension
+        if row:
+            user_state.set(user_id, row[0], suspended=True, deleted=row[1])
         
         return jsonify({'status': 'success', 'message': 'User suspended successfully'}), 200
     
@@ -501,8 +2427,17 @@ def unsuspend_user(user_id):
         db = get_db_connection()
         cursor = db.cursor()
         
-        cursor.execute('UPDATE users SET is_suspended = FALSE WHERE id = %s', (user_id,))
+        cursor.execute('''
+            UPDATE users SET is_suspended = FALSE WHERE id = %s
+            RETURNING role, deletion_requested_at IS NOT NULL
+        ''', (user_id,))
+        row = cursor.fetchone()
         db.commit()
+
+        # Other nodes hear about it through the users_publish_update trigger. The entry is
+        # written whole, so it carries the user's pending deletion along with the new suspension
+        if row:
+            user_state.set(user_id, row[0], suspended=False, deleted=row[1])
         
         return jsonify({'status': 'success', 'message': 'User unsuspended successfully'}), 200
     
@@ -517,6 +2452,7 @@ def unsuspend_user(user_id):
 # Plans Routes
 @app.route('/api/plans', methods=['GET'])
 @login_required
+@read_only
 def get_plans():
     try:
         db = get_db_connection()
@@ -583,16 +2519,37 @@ def create_plan():
 
 # Reviews Routes
 @app.route('/api/reviews', methods=['GET'])
+@admission_class('export', paged_by=('since',))
 @admin_required
+@read_only
 def get_reviews():
     try:
         db = get_db_connection()
         cursor = db.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
         
-        cursor.execute('SELECT * FROM reviews ORDER BY created_at DESC')
+        since = parse_change_token()
+        _, columns = requested_fields('reviews')
+        token = get_change_token(cursor)
+        
+        if since is not None:
+            cursor.execute(f'''
+                SELECT {columns} 
+                FROM reviews 
+                WHERE change_xid >= %s::xid8
+                ORDER BY created_at DESC
+            ''', (since,))
+        else:
+            cursor.execute(f'''
+                SELECT {columns} 
+                FROM reviews 
+                ORDER BY created_at DESC
+            ''')
         reviews = cursor.fetchall()
         
-        return jsonify(reviews), 200
+        return change_set_response(reviews, token, since, cursor, 'reviews')
+    
+    except ValueError as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 400
     
     except Exception as e:
         logger.error(f"Reviews error: {e}")
@@ -605,16 +2562,37 @@ def get_reviews():
 
 # Contacts Routes
 @app.route('/api/contacts', methods=['GET'])
+@admission_class('export', paged_by=('since',))
 @admin_required
+@read_only
 def get_contacts():
     try:
         db = get_db_connection()
         cursor = db.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
         
-        cursor.execute('SELECT * FROM contacts ORDER BY created_at DESC')
+        since = parse_change_token()
+        _, columns = requested_fields('contacts')
+        token = get_change_token(cursor)
+        
+        if since is not None:
+            cursor.execute(f'''
+                SELECT {columns} 
+                FROM contacts 
+                WHERE change_xid >= %s::xid8
+                ORDER BY created_at DESC
+            ''', (since,))
+        else:
+            cursor.execute(f'''
+                SELECT {columns} 
+                FROM contacts 
+                ORDER BY created_at DESC
+            ''')
         contacts = cursor.fetchall()
         
-        return jsonify(contacts), 200
+        return change_set_response(contacts, token, since, cursor, 'contacts')
+    
+    except ValueError as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 400
     
     except Exception as e:
         logger.error(f"Contacts error: {e}")
@@ -624,33 +2602,281 @@ def get_contacts():
         if 'db' in locals():
             db.close()
 
+# Buffered contact ingestion - the public form is acknowledged before the row reaches Postgres
+CONTACT_BATCH_SIZE = int(os.getenv('CONTACT_BATCH_SIZE', '200'))
+CONTACT_FLUSH_INTERVAL = float(os.getenv('CONTACT_FLUSH_INTERVAL', '1'))  # seconds
+CONTACT_BUFFER_LIMIT = int(os.getenv('CONTACT_BUFFER_LIMIT', '5000'))  # unflushed contacts per worker
+CONTACT_SYNC_FALLBACK_LIMIT = int(os.getenv('CONTACT_SYNC_FALLBACK_LIMIT', '4'))  # direct inserts at once when full
+CONTACT_SPOOL_DIR = os.getenv('CONTACT_SPOOL_DIR', os.path.join(app.root_path, 'spool'))
+
+def insert_contacts(cursor, contacts):
+    """Insert contact dicts with one multi-row INSERT and notify the admin dashboards"""
+    rows = psycopg2.extras.execute_values(cursor, '''
+        INSERT INTO contacts (name, email, message, status) VALUES %s
+        RETURNING id, name, email, message, status, created_at
+    ''', [(c['name'], c['email'], c['message'], 'new') for c in contacts], page_size=len(contacts), fetch=True)
+
+    notify_admins_many(cursor, 'contact_created', [{
+        'id': contact_id,
+        'name': name,
+        'email': email,
+        'message': message[:500],
+        'status': status,
+        'created_at': created_at
+    } for contact_id, name, email, message, status, created_at in rows])
+
+class ContactBuffer:
+    """Per-worker write-behind buffer for contact submissions.
+
+    Every submission is appended to a spool file and synced to disk before it is
+    acknowledged. A flush renames the spool file to a .batch file and inserts it,
+    so a worker that dies leaves its unflushed contacts on disk for the next worker.
+    Files are named after an owner id unique to each process start, whose .lock
+    file the process holds for as long as it runs.
+    """
+
+    def __init__(self, spool_dir):
+        self.spool_dir = spool_dir
+        self.pending = []
+        self.unflushed = 0  # buffered plus written to batch files but not yet inserted
+        self._pid = None
+        self._owner = None
+        self._owner_lock = None
+        self._spool = None
+        self._sequence = itertools.count()
+        self._lock = threading.Lock()
+        self._insert_lock = threading.Lock()
+        self._wakeup = threading.Event()
+
+    def _spool_path(self):
+        return os.path.join(self.spool_dir, f'contacts-{self._owner}.jsonl')
+
+    def ensure_started(self):
+        """Start the flusher in this process - threads and open files do not survive a fork"""
+        if self._pid != os.getpid():
+            with self._lock:
+                if self._pid != os.getpid():
+                    self._start()
+
+    def _start(self):
+        self._pid = os.getpid()
+        # Pids are reused, across restarts of a container in particular, so they cannot name the files
+        self._owner = f'{self._pid}_{secrets.token_hex(4)}'
+        self.pending = []
+        self.unflushed = 0
+        os.makedirs(self.spool_dir, exist_ok=True)
+        self._owner_lock = os.open(os.path.join(self.spool_dir, f'contacts-{self._owner}.lock'),
+                                   os.O_RDWR | os.O_CREAT, 0o600)
+        fcntl.flock(self._owner_lock, fcntl.LOCK_EX)
+        self._spool = open(self._spool_path(), 'a')
+        fsync_dir(self.spool_dir)
+        threading.Thread(target=self._run, name='contact-flusher', daemon=True).start()
+        atexit.register(self.flush)
+
+    def submit(self, contact):
+        """Buffer a contact; return False when this worker's buffer is full"""
+        self.ensure_started()
+        with self._lock:
+            if self.unflushed >= CONTACT_BUFFER_LIMIT:
+                return False
+            self._spool.write(json.dumps(contact) + '\n')
+            self._spool.flush()
+            # A descriptor of its own still reaches the data after a flush renames and closes the spool
+            spool_fd = os.dup(self._spool.fileno())
+            self.pending.append(contact)
+            self.unflushed += 1
+            if len(self.pending) >= CONTACT_BATCH_SIZE:
+                self._wakeup.set()
+        # 202 promises the contact survives a crash of the machine, not only of the worker. The sync
+        # runs outside the lock and off the gevent hub, so concurrent submissions share the disk wait
+        try:
+            run_blocking(os.fsync, spool_fd)
+        finally:
+            os.close(spool_fd)
+        return True
+
+    def _run(self):
+        self._claim_orphans()
+        while True:
+            self._wakeup.wait(CONTACT_FLUSH_INTERVAL)
+            self._wakeup.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                logger.error(f"Contact flush error: {e}")
+
+    def flush(self):
+        """Cut the current spool file into a batch and insert every batch this worker owns"""
+        with self._lock:
+            if self.pending:
+                self._spool.close()
+                os.rename(self._spool_path(), os.path.join(
+                    self.spool_dir, f'contacts-{self._owner}-{next(self._sequence)}.batch'))
+                self._spool = open(self._spool_path(), 'a')
+                fsync_dir(self.spool_dir)
+                self.pending = []
+
+        with self._insert_lock:
+            for batch_path in sorted(glob.glob(os.path.join(self.spool_dir, f'contacts-{self._owner}-*.batch'))):
+                if not self._insert_batch(batch_path):
+                    break  # database unavailable - keep the files and retry on the next tick
+
+    def _insert_batch(self, batch_path):
+        contacts = read_spool_file(batch_path)
+        if contacts:
+            try:
+                db = get_db_connection()
+                cursor = db.cursor()
+                try:
+                    insert_contacts(cursor, contacts)
+                    db.commit()
+                except (psycopg2.DataError, psycopg2.IntegrityError) as e:
+                    # One bad row must not block the batch forever - insert row by row and drop it
+                    logger.error(f"Contact batch rejected, retrying row by row: {e}")
+                    db.rollback()
+                    for contact in contacts:
+                        try:
+                            insert_contacts(cursor, [contact])
+                            db.commit()
+                        except (psycopg2.DataError, psycopg2.IntegrityError) as row_error:
+                            logger.error(f"Dropping invalid contact {contact!r}: {row_error}")
+                            db.rollback()
+                db.close()
+            except psycopg2.Error as e:
+                logger.error(f"Contact batch insert failed, will retry: {e}")
+                if 'db' in locals() and not db.closed:
+                    db.close()
+                return False
+
+        os.remove(batch_path)
+        # A removal lost in a crash would insert the batch a second time
+        fsync_dir(self.spool_dir)
+        with self._lock:
+            self.unflushed = max(self.unflushed - len(contacts), 0)
+        return True
+
+    def _claim_orphans(self):
+        """Take over spool and batch files left by workers that are no longer running"""
+        owners = {os.path.basename(path).split('-')[1].split('.')[0]
+                  for path in glob.glob(os.path.join(self.spool_dir, 'contacts-*'))}
+        owners.discard(self._owner)
+        for owner in sorted(owners):
+            lock_path = os.path.join(self.spool_dir, f'contacts-{owner}.lock')
+            try:
+                lock_fd = os.open(lock_path, os.O_RDWR)
+            except FileNotFoundError:
+                lock_fd = None
+            try:
+                if lock_fd is not None:
+                    try:
+                        fcntl.flock(lock_fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                    except BlockingIOError:
+                        continue  # its worker is still running
+                elif owner.isdigit() and process_alive(int(owner)):
+                    continue  # named by pid, by a worker started before owner ids
+                self._claim_owner(owner)
+                if lock_fd is not None:
+                    try:
+                        os.remove(lock_path)
+                    except FileNotFoundError:
+                        pass
+            finally:
+                if lock_fd is not None:
+                    os.close(lock_fd)
+        fsync_dir(self.spool_dir)
+
+    def _claim_owner(self, owner):
+        for path in glob.glob(os.path.join(self.spool_dir, f'contacts-{owner}.jsonl')) + \
+                glob.glob(os.path.join(self.spool_dir, f'contacts-{owner}-*.batch')):
+            claimed_path = os.path.join(self.spool_dir, f'contacts-{self._owner}-{next(self._sequence)}.batch')
+            try:
+                os.rename(path, claimed_path)
+            except FileNotFoundError:
+                continue  # another worker claimed it first
+            recovered = len(read_spool_file(claimed_path))
+            with self._lock:
+                self.unflushed += recovered
+            logger.info(f"Recovered {recovered} buffered contacts from {os.path.basename(path)}")
+
+def read_spool_file(path):
+    contacts = []
+    with open(path) as f:
+        for line in f:
+            try:
+                contacts.append(json.loads(line))
+            except ValueError:
+                # The last line may be cut short if the worker died mid-write
+                logger.warning(f"Skipping unreadable line in {path}")
+    return contacts
+
+def fsync_dir(path):
+    """Make the creations, renames and removals of files in a directory durable"""
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+def process_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+contact_buffer = ContactBuffer(CONTACT_SPOOL_DIR)
+contact_sync_slots = threading.BoundedSemaphore(CONTACT_SYNC_FALLBACK_LIMIT)
+
+@app.before_request
+def start_contact_buffer():
+    # Also recovers contacts spooled by a worker that died, without waiting for a new submission
+    contact_buffer.ensure_started()
+
 @app.route('/api/contact', methods=['POST'])
 def create_contact():
     try:
-        data = request.get_json()
+        data = request.get_json(silent=True)
         
         # Validate input
-        if not all(key in data for key in ['name', 'email', 'message']):
+        if not data or not all(isinstance(data.get(key), str) and data[key].strip() for key in ['name', 'email', 'message']):
             return jsonify({
                 'status': 'error', 
                 'message': 'Name, email and message are required'
             }), 400
         
-        db = get_db_connection()
-        cursor = db.cursor()
+        # Rows that would fail the INSERT must not reach a batch
+        if len(data['name']) > 255 or len(data['email']) > 255 or '@' not in data['email'] or len(data['message']) > 10000:
+            return jsonify({
+                'status': 'error', 
+                'message': 'Invalid name, email or message'
+            }), 400
         
-        # Insert new contact message
-        cursor.execute('''
-            INSERT INTO contacts (name, email, message, status) 
-            VALUES (%s, %s, %s, %s)
-        ''', (
-            data['name'], 
-            data['email'], 
-            data['message'],
-            'new'  # Default status for new messages
-        ))
+        contact = {'name': data['name'], 'email': data['email'], 'message': data['message']}
         
-        db.commit()
+        if contact_buffer.submit(contact):
+            return jsonify({
+                'status': 'success', 
+                'message': 'Contact message received'
+            }), 202
+        
+        # Buffer full - fall back to a direct insert, but only a few at a time
+        if not contact_sync_slots.acquire(blocking=False):
+            response = jsonify({
+                'status': 'error', 
+                'message': 'We are receiving a lot of messages, please try again shortly'
+            })
+            response.headers['Retry-After'] = '5'
+            return response, 503
+        
+        try:
+            db = get_db_connection()
+            cursor = db.cursor()
+            insert_contacts(cursor, [contact])
+            db.commit()
+        finally:
+            contact_sync_slots.release()
         
         return jsonify({
             'status': 'success', 
@@ -714,6 +2940,121 @@ def update_profile():
         if 'db' in locals():
             db.close()
 
+# Account deletion - a request only marks the account, which blocks it on every node at once.
+# The account_deletions job then deletes its reviews and demo sessions and detaches its
+# purchases ACCOUNT_DELETION_BATCH_SIZE rows at a time, each batch in its own short transaction,
+# so a large account never holds locks for long or writes a burst of WAL. Purchases are kept
+# for the books, without their user. The user row goes last, with its progress marked complete
+ACCOUNT_DELETION_BATCH_SIZE = int(os.getenv('ACCOUNT_DELETION_BATCH_SIZE', '1000'))  # rows per transaction
+ACCOUNT_DELETION_PAUSE = float(os.getenv('ACCOUNT_DELETION_PAUSE', '0.05'))  # seconds between batches
+ACCOUNT_DELETION_MAX_IDS = 10000  # accounts per admin request
+# (progress column, statement removing one batch of the account's rows), in the order they run
+ACCOUNT_DELETION_STEPS = [
+    ('reviews_deleted', '''
+        DELETE FROM reviews WHERE id IN (
+            SELECT id FROM reviews WHERE user_id = %(user_id)s LIMIT %(limit)s
+        )
+    '''),
+    ('demo_sessions_deleted', '''
+        DELETE FROM demo_sessions WHERE id IN (
+            SELECT id FROM demo_sessions WHERE email = %(email)s LIMIT %(limit)s
+        )
+    '''),
+    # Fulfillment needs the user, so a pending purchase would otherwise stay pending forever
+    ('purchases_anonymized', '''
+        UPDATE purchases SET user_id = NULL, status = CASE WHEN status = 'pending' THEN 'failed' ELSE status END
+        WHERE (id, purchase_date) IN (
+            SELECT id, purchase_date FROM purchases WHERE user_id = %(user_id)s LIMIT %(limit)s
+        )
+    '''),
+]
+
+def request_account_deletions(cursor, user_ids, requested_by):
+    """Mark accounts for deletion and queue them for the account_deletions job; returns the ids
+    of the accounts found. A failed deletion is queued again"""
+    cursor.execute('''
+        UPDATE users SET deletion_requested_at = COALESCE(deletion_requested_at, NOW())
+        WHERE id = ANY(%s)
+        RETURNING id
+    ''', (user_ids,))
+    found = sorted(row[0] for row in cursor.fetchall())
+    cursor.execute('''
+        INSERT INTO account_deletions (user_id, requested_by)
+        SELECT user_id, %s FROM unnest(%s::int[]) AS user_id
+        ON CONFLICT (user_id) DO UPDATE SET
+            status = 'pending', requested_by = EXCLUDED.requested_by, requested_at = NOW(), error = NULL
+        WHERE account_deletions.status = 'failed'
+    ''', (requested_by, found))
+    return found
+
+def delete_account_data(db, cursor, user_id, email):
+    """Remove one account in batches; returns its progress row"""
+    cursor.execute('''
+        UPDATE account_deletions SET status = 'running', started_at = COALESCE(started_at, NOW())
+        WHERE user_id = %s
+    ''', (user_id,))
+    db.commit()
+
+    for column, statement in ACCOUNT_DELETION_STEPS:
+        while True:
+            cursor.execute(statement, {'user_id': user_id, 'email': email, 'limit': ACCOUNT_DELETION_BATCH_SIZE})
+            removed = cursor.rowcount
+            # Progress commits with the batch it counts, so an interrupted run resumes exactly
+            cursor.execute(f'UPDATE account_deletions SET {column} = {column} + %s WHERE user_id = %s',
+                           (removed, user_id))
+            db.commit()
+            if removed < ACCOUNT_DELETION_BATCH_SIZE:
+                break
+            time.sleep(ACCOUNT_DELETION_PAUSE)
+
+    # Subscriptions and reset tokens go with the user through ON DELETE CASCADE - a row or two
+    cursor.execute('DELETE FROM users WHERE id = %s', (user_id,))
+    cursor.execute(f'''
+        UPDATE account_deletions SET status = 'completed', finished_at = NOW()
+        WHERE user_id = %s
+        RETURNING {', '.join(column for column, _ in ACCOUNT_DELETION_STEPS)}
+    ''', (user_id,))
+    progress = cursor.fetchone()
+    db.commit()
+    return progress
+
+def process_account_deletions():
+    """Work through the queued account deletions; returns the accounts and rows removed"""
+    totals = {'accounts': 0, 'failed': 0, **{column: 0 for column, _ in ACCOUNT_DELETION_STEPS}}
+    db = get_db_connection()
+    try:
+        cursor = db.cursor()
+        # 'running' ones were interrupted and resume where their progress left off
+        cursor.execute('''
+            SELECT d.user_id, u.email
+            FROM account_deletions d
+            LEFT JOIN users u ON u.id = d.user_id
+            WHERE d.status IN ('pending', 'running')
+            ORDER BY d.requested_at
+        ''')
+        queued = cursor.fetchall()
+        db.commit()
+
+        for user_id, email in queued:
+            try:
+                progress = delete_account_data(db, cursor, user_id, email)
+            except psycopg2.Error as e:
+                db.rollback()
+                logger.error(f"Account deletion of user {user_id} failed: {e}")
+                cursor.execute('''
+                    UPDATE account_deletions SET status = 'failed', finished_at = NOW(), error = %s
+                    WHERE user_id = %s
+                ''', (str(e), user_id))
+                db.commit()
+                totals['failed'] += 1
+                continue
+            totals['accounts'] += 1
+            for (column, _), removed in zip(ACCOUNT_DELETION_STEPS, progress or ()):
+                totals[column] += removed
+        return totals
+    finally:
+        db.close()
+
 @app.route('/api/profile', methods=['DELETE'])
 @login_required
 def delete_account():
@@ -721,14 +3062,15 @@ def delete_account():
         db = get_db_connection()
         cursor = db.cursor()
         
-        # Delete user account
-        cursor.execute('DELETE FROM users WHERE id = %s', (session['user_id'],))
+        # The account is blocked now; the account_deletions job removes it and its data
+        request_account_deletions(cursor, [session['user_id']], session['user_id'])
         db.commit()
+        user_state.set(session['user_id'], deleted=True)
         
         # Clear session
         session.clear()
         
-        return jsonify({'status': 'success', 'message': 'Account deleted successfully'}), 200
+        return jsonify({'status': 'success', 'message': 'Account scheduled for deletion'}), 202
     
     except Exception as e:
         logger.error(f"Delete account error: {e}")
@@ -738,6 +3080,451 @@ def delete_account():
         if 'db' in locals():
             db.close()
 
+@app.route('/api/users/deletions', methods=['POST'])
+@admin_required
+def bulk_delete_users():
+    """Queue accounts for deletion, as DELETE /api/profile does for one's own: {"ids": [1, 2, ...]}"""
+    try:
+        data = request.get_json(silent=True) or {}
+        user_ids = data.get('ids')
+        if not isinstance(user_ids, list) or not user_ids or not all(isinstance(user_id, int) for user_id in user_ids):
+            return jsonify({'status': 'error', 'message': 'ids must be a list of integer user ids'}), 400
+        if len(user_ids) > ACCOUNT_DELETION_MAX_IDS:
+            return jsonify({'status': 'error', 'message': f'At most {ACCOUNT_DELETION_MAX_IDS} accounts per request'}), 413
+        if session['user_id'] in user_ids:
+            return jsonify({'status': 'error', 'message': 'Delete your own account from your profile'}), 400
+        
+        db = get_db_connection()
+        cursor = db.cursor()
+        scheduled = request_account_deletions(cursor, user_ids, session['user_id'])
+        db.commit()
+        for user_id in scheduled:
+            user_state.set(user_id, deleted=True)
+        
+        return jsonify({
+            'status': 'success',
+            'scheduled': scheduled,
+            'not_found': sorted(set(user_ids) - set(scheduled))
+        }), 202
+    
+    except Exception as e:
+        logger.error(f"Bulk delete users error: {e}")
+        return jsonify({'status': 'error', 'message': 'An unexpected error occurred'}), 500
+    
+    finally:
+        if 'db' in locals():
+            db.close()
+
+@app.route('/api/users/deletions', methods=['GET'])
+@admin_required
+@read_only
+def get_account_deletions():
+    """Account deletions by status, and the latest ?limit= of them (?status= to filter)"""
+    try:
+        limit = int(request.args.get('limit', 100))
+        if limit < 1:
+            raise ValueError('limit must be positive')
+        db = get_db_connection()
+        cursor = db.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
+        
+        cursor.execute('SELECT status, COUNT(*) AS count FROM account_deletions GROUP BY status')
+        counts = {row['status']: row['count'] for row in cursor.fetchall()}
+        cursor.execute('''
+            SELECT * FROM account_deletions
+            WHERE %(status)s::text IS NULL OR status = %(status)s
+            ORDER BY requested_at DESC
+            LIMIT %(limit)s
+        ''', {'status': request.args.get('status'), 'limit': limit})
+        
+        return jsonify({'counts': counts, 'deletions': cursor.fetchall()}), 200
+    
+    except ValueError as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 400
+    
+    except Exception as e:
+        logger.error(f"Account deletions error: {e}")
+        return jsonify({'status': 'error', 'message': 'An unexpected error occurred'}), 500
+    
+    finally:
+        if 'db' in locals():
+            db.close()
+
+# Bulk user import
+# POST /api/users/import takes a CSV file with a header row, or NDJSON, with one user per row.
+# Rows are validated as the upload streams in and staged in user_import_rows, and the request
+# answers 202 with the import's id. The user_imports job then works through the staged rows a
+# chunk at a time: it hashes the supplied passwords in a pool of processes, merges the chunk into
+# users, queues its welcome emails for the welcome_emails job and commits, so an interrupted import
+# resumes where it stopped. Rows without a password get a link to set one in their welcome email
+USER_IMPORT_COLUMNS = ('email', 'first_name', 'last_name', 'role', 'password')
+USER_IMPORT_ROLES = ('company_admin', 'guest')
+USER_IMPORT_FORMATS = {'text/csv': 'csv', 'application/x-ndjson': 'ndjson', 'application/jsonl': 'ndjson'}
+USER_IMPORT_MAX_ROWS = int(os.getenv('USER_IMPORT_MAX_ROWS', '100000'))
+# Hashing runs in the job's own process, at the scheduler's lower CPU priority, so it takes every core
+USER_IMPORT_HASH_PROCESSES = int(os.getenv('USER_IMPORT_HASH_PROCESSES', '0')) or os.cpu_count()
+USER_IMPORT_BATCH_SIZE = 1000  # rows per COPY or INSERT when staging and merging
+USER_IMPORT_CHUNK_SIZE = int(os.getenv('USER_IMPORT_CHUNK_SIZE', '1000'))  # rows hashed and merged per commit
+USER_IMPORT_HASH_CHUNK = 16  # passwords per pool task
+USER_IMPORT_REPORT_LIMIT = 100  # rejected rows listed in the report
+USER_IMPORT_LOCK_KEY = 726008
+USER_IMPORT_STAGED_COLUMNS = 'import_id, line, email, first_name, last_name, name, role, password'
+USER_IMPORT_MERGE_COLUMNS = 'line, email, password_hash, first_name, last_name, name, role, invite'
+def copy_value(value):
+    """One field in COPY text format"""
+    if value is None:
+        return '\\N'
+    if isinstance(value, bool):
+        return 't' if value else 'f'
+    return str(value).replace('\\', '\\\\').replace('\t', '\\t').replace('\n', '\\n').replace('\r', '\\r')
+
+def read_user_import(stream, fmt):
+    """Yield (line, row) pairs from a CSV or NDJSON byte stream without reading it all first"""
+    # Line by line: gunicorn's request body is not an io stream TextIOWrapper could wrap
+    text = codecs.iterdecode(iter(stream.readline, b''), 'utf-8-sig')
+    if fmt == 'csv':
+        reader = csv.DictReader(text)
+        columns = reader.fieldnames or []
+        if 'email' not in columns:
+            raise ValueError('The CSV header must include an email column')
+        unknown = sorted(set(columns) - set(USER_IMPORT_COLUMNS))
+        if unknown:
+            raise ValueError(f"Unknown columns: {', '.join(unknown)}")
+        try:
+            for row in reader:
+                yield reader.line_num, row
+        except csv.Error as e:
+            raise ValueError(f'Line {reader.line_num}: {e}')
+        return
+
+    for line, raw in enumerate(text, 1):
+        if not raw.strip():
+            continue
+        try:
+            yield line, json.loads(raw)
+        except ValueError:
+            yield line, None
+
+def validate_import_row(row):
+    """(email, first_name, last_name, name, role, password) for a valid row; raises ValueError"""
+    if not isinstance(row, dict):
+        raise ValueError('Not a JSON object')
+    if None in row:
+        raise ValueError('More fields than the header has columns')
+    unknown = sorted(set(row) - set(USER_IMPORT_COLUMNS))
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+    if not all(value is None or isinstance(value, str) for value in row.values()):
+        raise ValueError('Fields must be strings')
+
+    # Stored in lower case, as registration does
+    email = (row.get('email') or '').strip().lower()
+    if '@' not in email or len(email) > 255:
+        raise ValueError('Invalid email')
+    first_name = (row.get('first_name') or '').strip()
+    last_name = (row.get('last_name') or '').strip()
+    if len(first_name) > 100 or len(last_name) > 100:
+        raise ValueError('Names must be at most 100 characters')
+    role = row.get('role') or 'guest'
+    if role not in USER_IMPORT_ROLES:
+        raise ValueError(f"Role must be one of {', '.join(USER_IMPORT_ROLES)}")
+    password = row.get('password') or None
+    if password is not None and len(password) < 8:
+        raise ValueError('Password must be at least 8 characters')
+    name = f"{first_name} {last_name}".strip() or email.split('@')[0]
+    return email, first_name, last_name, name, role, password
+
+def hash_passwords(passwords):
+    """Hash one chunk of imported passwords; runs in the hashing pool"""
+    return [generate_password_hash(password) for password in passwords]
+
+_user_import_hash_pool = None
+_user_import_hash_pool_lock = threading.Lock()
+
+def user_import_hash_pool():
+    """The process's password hashing pool, started on first use and kept for later chunks.
+
+    The pool's processes come from a forkserver rather than a fork of this process and its open
+    connections, and import the app with INIT_DB=0, as job processes do.
+    """
+    global _user_import_hash_pool
+    with _user_import_hash_pool_lock:
+        if _user_import_hash_pool is None:
+            init_db_setting = os.environ.get('INIT_DB')
+            os.environ['INIT_DB'] = '0'
+            try:
+                # The forkserver inherits the environment it starts with, and so do the processes it forks
+                multiprocessing.forkserver.ensure_running()
+            finally:
+                if init_db_setting is None:
+                    del os.environ['INIT_DB']
+                else:
+                    os.environ['INIT_DB'] = init_db_setting
+            _user_import_hash_pool = ProcessPoolExecutor(
+                USER_IMPORT_HASH_PROCESSES, mp_context=multiprocessing.get_context('forkserver'))
+        return _user_import_hash_pool
+
+def hash_import_passwords(passwords):
+    """Hash passwords across the pool, USER_IMPORT_HASH_CHUNK per task; returns them in order"""
+    if not passwords:
+        return []
+    pool = user_import_hash_pool()
+    futures = [pool.submit(hash_passwords, passwords[start:start + USER_IMPORT_HASH_CHUNK])
+               for start in range(0, len(passwords), USER_IMPORT_HASH_CHUNK)]
+    try:
+        return [password_hash for future in futures for password_hash in future.result()]
+    finally:
+        # A failed chunk leaves the pool free for the next one
+        for future in futures:
+            future.cancel()
+
+def copy_import_rows(cursor, table, columns, rows):
+    """Load rows into an import table with COPY, or a multi-row INSERT under gevent"""
+    if ASYNC_WORKER:
+        # psycopg2 cannot COPY while psycogreen's wait callback is installed
+        psycopg2.extras.execute_values(cursor, f'INSERT INTO {table} ({columns}) VALUES %s',
+                                       rows, page_size=len(rows))
+        return
+    buffer = io.StringIO()
+    for row in rows:
+        buffer.write('\t'.join(copy_value(value) for value in row))
+        buffer.write('\n')
+    buffer.seek(0)
+    cursor.copy_expert(f'COPY {table} ({columns}) FROM STDIN', buffer)
+
+def stage_user_import(db, rows, site_url, requested_by, max_rows=USER_IMPORT_MAX_ROWS):
+    """Validate (line, row) pairs and stage the valid ones for the user_imports job; returns the import.
+
+    Runs in the caller's transaction, so the import is queued when that commits. Raises ValueError
+    past max_rows.
+    """
+    cursor = db.cursor()
+    cursor.execute('INSERT INTO user_imports (requested_by, site_url) VALUES (%s, %s) RETURNING id',
+                   (requested_by, site_url))
+    import_id = cursor.fetchone()[0]
+
+    report = {'rows': 0, 'invalid': 0, 'staged': 0}
+    rejected = []
+    seen = {}
+    batch = []
+    for line, row in rows:
+        report['rows'] += 1
+        if report['rows'] > max_rows:
+            raise ValueError(f'At most {max_rows} rows per import')
+        try:
+            user = validate_import_row(row)
+            if user[0].lower() in seen:
+                raise ValueError(f'Duplicate of line {seen[user[0].lower()]}')
+        except ValueError as e:
+            report['invalid'] += 1
+            if len(rejected) < USER_IMPORT_REPORT_LIMIT:
+                rejected.append({'line': line, 'message': str(e)})
+            continue
+        seen[user[0].lower()] = line
+        batch.append((import_id, line, *user))
+        if len(batch) == USER_IMPORT_BATCH_SIZE:
+            copy_import_rows(cursor, 'user_import_rows', USER_IMPORT_STAGED_COLUMNS, batch)
+            batch = []
+    if batch:
+        copy_import_rows(cursor, 'user_import_rows', USER_IMPORT_STAGED_COLUMNS, batch)
+    report['staged'] = len(seen)
+
+    cursor.execute('''
+        UPDATE user_imports SET rows = %s, invalid = %s, staged = %s, rejected = %s
+        WHERE id = %s
+    ''', (report['rows'], report['invalid'], report['staged'], json.dumps(rejected), import_id))
+    return {'id': import_id, **report, 'rejected': rejected}
+
+def merge_import_chunk(cursor, chunk, site_url):
+    """Create the users of one chunk of staged rows and queue their welcome emails; returns
+    the number created and invited, and the rows that were already registered"""
+    hashes = iter(hash_import_passwords([password for *_, password in chunk if password]))
+    # An empty hash never matches, so invited users sign in once they set a password
+    rows = [
+        (line, email, next(hashes) if password else '', first_name, last_name, name, role, not password)
+        for line, email, first_name, last_name, name, role, password in chunk
+    ]
+    cursor.execute('''
+        CREATE TEMP TABLE IF NOT EXISTS user_import_merge (
+            line INT, email TEXT, password_hash TEXT, first_name TEXT, last_name TEXT,
+            name TEXT, role TEXT, invite BOOLEAN
+        ) ON COMMIT DELETE ROWS
+    ''')
+    copy_import_rows(cursor, 'user_import_merge', USER_IMPORT_MERGE_COLUMNS, rows)
+
+    # Sign-in matches emails case-insensitively, so an existing user is a conflict in any case
+    cursor.execute('''
+        DELETE FROM user_import_merge s USING users u
+        WHERE lower(u.email) = lower(s.email)
+        RETURNING s.line, s.email
+    ''')
+    conflicts = cursor.fetchall()
+    cursor.execute('''
+        WITH created AS (
+            INSERT INTO users (email, password_hash, first_name, last_name, name, role)
+            SELECT email, password_hash, first_name, last_name, name, role
+            FROM user_import_merge
+            ORDER BY line
+            ON CONFLICT DO NOTHING
+            RETURNING id, email
+        )
+        INSERT INTO welcome_emails (user_id, invite, site_url)
+        SELECT c.id, s.invite, %s FROM created c JOIN user_import_merge s ON s.email = c.email
+        RETURNING invite
+    ''', (site_url,))
+    queued = [invite for invite, in cursor.fetchall()]
+    return len(queued), sum(queued), conflicts
+
+def run_user_import(db, import_id):
+    """Hash and merge one import's staged rows a chunk at a time; returns the import's report,
+    or None if another process is running it"""
+    cursor = db.cursor()
+    # Held across the chunks' commits, so the job and backend.import_users never share an import
+    cursor.execute('SELECT pg_try_advisory_lock(%s, %s)', (USER_IMPORT_LOCK_KEY, import_id))
+    if not cursor.fetchone()[0]:
+        db.rollback()
+        return None
+    try:
+        cursor.execute('''
+            UPDATE user_imports SET status = 'running', started_at = COALESCE(started_at, NOW())
+            WHERE id = %s AND status IN ('pending', 'running')
+            RETURNING site_url, jsonb_array_length(rejected)
+        ''', (import_id,))
+        row = cursor.fetchone()
+        db.commit()
+        if row is not None:
+            site_url, reported = row
+            while True:
+                # Merged rows are deleted with the commit that merges them, so the rest is what remains
+                cursor.execute('''
+                    SELECT line, email, first_name, last_name, name, role, password
+                    FROM user_import_rows WHERE import_id = %s
+                    ORDER BY line
+                    LIMIT %s
+                ''', (import_id, USER_IMPORT_CHUNK_SIZE))
+                chunk = cursor.fetchall()
+                if not chunk:
+                    break
+                created, invited, conflicts = merge_import_chunk(cursor, chunk, site_url)
+                rejected = [{'line': line, 'message': f'{email} is already registered'}
+                            for line, email in sorted(conflicts)][:max(USER_IMPORT_REPORT_LIMIT - reported, 0)]
+                reported += len(rejected)
+                cursor.execute('DELETE FROM user_import_rows WHERE import_id = %s AND line = ANY(%s)',
+                               (import_id, [line for line, *_ in chunk]))
+                # Rows registered by someone else since the conflict check are skipped too
+                cursor.execute('''
+                    UPDATE user_imports SET
+                        processed = processed + %s, created = created + %s, invited = invited + %s,
+                        conflicts = conflicts + %s, rejected = rejected || %s::jsonb
+                    WHERE id = %s
+                ''', (len(chunk), created, invited, len(chunk) - created, json.dumps(rejected), import_id))
+                db.commit()
+            cursor.execute('''
+                UPDATE user_imports SET status = 'completed', finished_at = NOW()
+                WHERE id = %s AND status = 'running'
+            ''', (import_id,))
+            db.commit()
+        return get_user_import(db.cursor(cursor_factory=psycopg2.extras.RealDictCursor), import_id)
+    finally:
+        db.rollback()
+        cursor.execute('SELECT pg_advisory_unlock(%s, %s)', (USER_IMPORT_LOCK_KEY, import_id))
+        db.commit()
+
+def get_user_import(cursor, import_id):
+    """An import's progress and report, with its rejected rows in line order; None if there is none"""
+    cursor.execute('''
+        SELECT id, status, rows, invalid, staged, processed, created, invited, conflicts, rejected,
+               requested_by, requested_at, started_at, finished_at, error
+        FROM user_imports WHERE id = %s
+    ''', (import_id,))
+    report = cursor.fetchone()
+    if report is not None:
+        report['rejected'] = sorted(report['rejected'], key=lambda reject: reject['line'])
+    return report
+
+def process_user_imports():
+    """Work through the staged user imports; returns the imports finished and users created"""
+    totals = {'imports': 0, 'failed': 0, 'created': 0}
+    db = get_db_connection()
+    try:
+        cursor = db.cursor()
+        # 'running' ones were interrupted and resume with the rows still staged
+        cursor.execute("SELECT id FROM user_imports WHERE status IN ('pending', 'running') ORDER BY id")
+        queued = [import_id for import_id, in cursor.fetchall()]
+        db.commit()
+
+        for import_id in queued:
+            try:
+                report = run_user_import(db, import_id)
+            except psycopg2.Error as e:
+                db.rollback()
+                logger.error(f"User import {import_id} failed: {e}")
+                # The staged passwords are not kept for an import that will not run again
+                cursor.execute('DELETE FROM user_import_rows WHERE import_id = %s', (import_id,))
+                cursor.execute('''
+                    UPDATE user_imports SET status = 'failed', finished_at = NOW(), error = %s
+                    WHERE id = %s
+                ''', (str(e), import_id))
+                db.commit()
+                totals['failed'] += 1
+                continue
+            if report is not None:
+                totals['imports'] += 1
+                totals['created'] += report['created']
+        return totals
+    finally:
+        db.close()
+
+@app.route('/api/users/import', methods=['POST'])
+@admin_required
+def import_users_upload():
+    """Queue users from an uploaded text/csv or application/x-ndjson body for the user_imports job"""
+    try:
+        fmt = USER_IMPORT_FORMATS.get(request.mimetype)
+        if fmt is None:
+            return jsonify({'status': 'error', 'message': 'Upload text/csv or application/x-ndjson'}), 415
+        
+        db = get_db_connection()
+        staged = stage_user_import(db, read_user_import(request.stream, fmt), request.host_url, session['user_id'])
+        db.commit()
+        logger.info(f"User {session['user_id']} queued user import {staged['id']}: {staged['staged']} of {staged['rows']} rows")
+        
+        response = jsonify({'status': 'success', 'status_url': f"/api/users/imports/{staged['id']}", **staged})
+        response.headers['Location'] = f"/api/users/imports/{staged['id']}"
+        return response, 202
+    
+    except ValueError as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 400
+    
+    except Exception as e:
+        logger.error(f"User import error: {e}")
+        return jsonify({'status': 'error', 'message': 'An unexpected error occurred'}), 500
+    
+    finally:
+        if 'db' in locals():
+            db.close()
+
+@app.route('/api/users/imports/<int:import_id>', methods=['GET'])
+@admin_required
+@read_only
+def get_user_import_progress(import_id):
+    """An import's status, rows processed so far and report"""
+    try:
+        db = get_db_connection()
+        report = get_user_import(db.cursor(cursor_factory=psycopg2.extras.RealDictCursor), import_id)
+        
+        if report is None:
+            return jsonify({'status': 'error', 'message': 'Import not found'}), 404
+        
+        return jsonify(report), 200
+    
+    except Exception as e:
+        logger.error(f"User import progress error: {e}")
+        return jsonify({'status': 'error', 'message': 'An unexpected error occurred'}), 500
+    
+    finally:
+        if 'db' in locals():
+            db.close()
+
 # Company Admin Reviews Route
 @app.route('/api/reviews', methods=['POST'])
 @login_required
@@ -762,8 +3549,17 @@ def create_review_by_user():
         cursor.execute('''
             INSERT INTO reviews (user_id, name, rating, comment) 
             VALUES (%s, %s, %s, %s)
+            RETURNING id, created_at
         ''', (session['user_id'], user['name'], data['rating'], data['comment']))
-        
+        review = cursor.fetchone()
+        
+        notify_admins(cursor, 'review_created', {
+            'id': review['id'],
+            'name': user['name'],
+            'rating': data['rating'],
+            'comment': (data['comment'] or '')[:500],
+            'created_at': review['created_at']
+        })
         db.commit()
         
         return jsonify({'status': 'success', 'message': 'Review submitted successfully'}), 201
@@ -776,6 +3572,184 @@ def create_review_by_user():
         if 'db' in locals():
             db.close()
 
+# Subscriptions and entitlements - one row per user in subscriptions, derived from their purchases
+# on every status change, and cached per worker as user -> plan -> features
+SUBSCRIPTION_STATUS_SQL = "CASE status WHEN 'completed' THEN 'active' WHEN 'pending' THEN 'pending' ELSE 'inactive' END"
+# The newest completed purchase wins, then the newest pending one, then the newest of the rest
+SUBSCRIPTION_PRIORITY_SQL = "status = 'completed' DESC, status = 'pending' DESC, purchase_date DESC"
+ENTITLEMENTS_CHANNEL = 'entitlements'
+
+def sync_subscriptions(cursor, user_ids):
+    """Recompute users' subscriptions from their purchases; call in the transaction that changed them"""
+    # Purchases of deleted accounts have no user to recompute
+    user_ids = sorted({user_id for user_id in user_ids if user_id is not None})
+    # Transitions for one user take turns, so each recompute sees the previous one's purchase.
+    # A lock per slot rather than per user keeps a 25000-user batch inside the shared lock table,
+    # and slots are taken in order so two batches sharing users cannot deadlock
+    slots = sorted({user_id % SUBSCRIPTION_LOCK_SLOTS for user_id in user_ids})
+    cursor.execute('SELECT pg_advisory_xact_lock(%s, slot) FROM unnest(%s::int[]) AS slot',
+                   (SUBSCRIPTION_LOCK_KEY, slots))
+    # One probe of idx_purchases_subscription per user, however many purchases they have
+    cursor.execute(f'''
+        INSERT INTO subscriptions (user_id, plan_id, purchase_id, status, started_at, updated_at)
+        SELECT u.user_id, p.plan_id, p.id, p.subscription_status, p.purchase_date, NOW()
+        FROM unnest(%s::int[]) AS u (user_id)
+        CROSS JOIN LATERAL (
+            SELECT plan_id, id, {SUBSCRIPTION_STATUS_SQL} AS subscription_status, purchase_date
+            FROM purchases
+            WHERE purchases.user_id = u.user_id
+            ORDER BY {SUBSCRIPTION_PRIORITY_SQL}
+            LIMIT 1
+        ) p
+        ON CONFLICT (user_id) DO UPDATE SET
+            plan_id = EXCLUDED.plan_id,
+            purchase_id = EXCLUDED.purchase_id,
+            status = EXCLUDED.status,
+            started_at = EXCLUDED.started_at,
+            updated_at = EXCLUDED.updated_at
+        WHERE (subscriptions.plan_id, subscriptions.purchase_id, subscriptions.status)
+              IS DISTINCT FROM (EXCLUDED.plan_id, EXCLUDED.purchase_id, EXCLUDED.status)
+    ''', (user_ids,))
+
+def parse_plan_features(features):
+    """plans.features as a list, whether it was stored as JSON text or a list"""
+    if isinstance(features, str):
+        try:
+            features = json.loads(features)
+        except ValueError:
+            return []
+    return features if isinstance(features, list) else []
+
+class EntitlementIndex:
+    """Per-worker copy of every subscription and plan feature set, so checks need no query"""
+
+    def __init__(self):
+        self.subscriptions = {}  # user_id -> (plan_id, status)
+        self.plans = {}          # plan_id -> (name, features, feature set)
+        self.loaded = False
+
+    def ensure_started(self):
+        notifications.listen(ENTITLEMENTS_CHANNEL, self._apply_notifications,
+                             on_listen=self._load, on_disconnect=self._unload)
+
+    def _load_plans(self, cursor):
+        cursor.execute('SELECT id, name, features FROM plans')
+        plans = {}
+        for plan_id, name, features in cursor.fetchall():
+            features = parse_plan_features(features)
+            plans[plan_id] = (name, features, frozenset(features))
+        self.plans = plans
+
+    def _load(self, cursor):
+        self._load_plans(cursor)
+        cursor.execute('SELECT user_id, plan_id, status FROM subscriptions')
+        self.subscriptions = {user_id: (plan_id, status) for user_id, plan_id, status in cursor}
+        self.loaded = True
+        logger.info(f"Entitlement index loaded ({len(self.subscriptions)} subscriptions, {len(self.plans)} plans)")
+
+    def _apply(self, change, cursor):
+        if change.get('plans'):
+            self._load_plans(cursor)
+        elif change.get('status') is None:
+            self.subscriptions.pop(change['user_id'], None)
+        else:
+            self.subscriptions[change['user_id']] = (change['plan_id'], change['status'])
+
+    def _unload(self):
+        # Changes may be missed while disconnected - fall back to the database until reloaded
+        self.loaded = False
+
+    def _apply_notifications(self, payloads, cursor):
+        for payload in payloads:
+            try:
+                self._apply(json.loads(payload), cursor)
+            except (ValueError, KeyError):
+                logger.warning(f"Ignoring malformed entitlement change: {payload}")
+
+    def get(self, user_id):
+        """Return the user's entitlements, or None until the index has loaded"""
+        if not self.loaded:
+            return None
+        subscription = self.subscriptions.get(user_id)
+        if subscription is None:
+            return {'plan_id': None, 'plan_name': None, 'status': None, 'features': []}
+        plan_id, status = subscription
+        name, features, _ = self.plans.get(plan_id, (None, [], frozenset()))
+        return {
+            'plan_id': plan_id,
+            'plan_name': name,
+            'status': status,
+            'features': features if status == 'active' else []
+        }
+
+    def has_feature(self, user_id, feature):
+        """True if the user's active plan includes the feature, None until the index has loaded"""
+        if not self.loaded:
+            return None
+        subscription = self.subscriptions.get(user_id)
+        if subscription is None or subscription[1] != 'active':
+            return False
+        return feature in self.plans.get(subscription[0], (None, [], frozenset()))[2]
+
+entitlements = EntitlementIndex()
+
+@app.before_request
+def start_entitlements_listener():
+    entitlements.ensure_started()
+
+def get_entitlements(user_id, cursor=None):
+    """A user's plan, subscription status and features - from the index, or the database while it loads"""
+    entitlement = entitlements.get(user_id)
+    if entitlement is not None:
+        return entitlement
+
+    cursor.execute('''
+        SELECT s.plan_id, p.name, s.status, p.features
+        FROM subscriptions s
+        JOIN plans p ON p.id = s.plan_id
+        WHERE s.user_id = %s
+    ''', (user_id,))
+    row = cursor.fetchone()
+    if row is None:
+        return {'plan_id': None, 'plan_name': None, 'status': None, 'features': []}
+    row = list(row.values()) if isinstance(row, dict) else row
+    return {
+        'plan_id': row[0],
+        'plan_name': row[1],
+        'status': row[2],
+        'features': parse_plan_features(row[3]) if row[2] == 'active' else []
+    }
+
+@app.route('/api/entitlements', methods=['GET'])
+@login_required
+@read_only
+def get_my_entitlements():
+    """The current user's plan and features; ?feature= also answers whether one is included"""
+    try:
+        feature = request.args.get('feature')
+        user_id = session['user_id']
+
+        entitlement = entitlements.get(user_id)
+        if entitlement is None:
+            db = get_db_connection()
+            entitlement = get_entitlements(user_id, db.cursor())
+
+        if feature is not None:
+            entitlement['feature'] = feature
+            # A set lookup in the index; the feature list only while the index loads
+            allowed = entitlements.has_feature(user_id, feature)
+            entitlement['allowed'] = feature in entitlement['features'] if allowed is None else allowed
+
+        return jsonify(entitlement), 200
+
+    except Exception as e:
+        logger.error(f"Entitlements error: {e}")
+        return jsonify({'status': 'error', 'message': 'An unexpected error occurred'}), 500
+
+    finally:
+        if 'db' in locals():
+            db.close()
+
 # Purchase Management Routes
 @app.route('/api/purchase', methods=['POST'])
 @login_required
@@ -790,7 +3764,7 @@ def create_purchase():
         cursor.execute("""
            INSERT INTO purchases (user_id, plan_id, amount, status, purchase_date) 
            VALUES (%s, %s, %s, %s, %s)
-           RETURNING id
+           RETURNING id, purchase_date, (SELECT name FROM plans WHERE id = plan_id)
         """, (
             session['user_id'], 
             data['plan_id'], 
@@ -798,7 +3772,18 @@ def create_purchase():
              'pending', 
             datetime.now()
         ))
-        purchase_id = cursor.fetchone()[0]
+        purchase_id, purchase_date, plan_name = cursor.fetchone()
+        sync_subscriptions(cursor, [session['user_id']])
+        
+        notify_admins(cursor, 'purchase_created', {
+            'id': purchase_id,
+            'user_name': session.get('user_name', ''),
+            'email': session.get('user_email', ''),
+            'plan_name': plan_name,
+            'amount': data['amount'],
+            'status': 'pending',
+            'purchase_date': purchase_date
+        })
         db.commit()
         
         # Send email notification but don't let failures affect the response
@@ -818,6 +3803,11 @@ def create_purchase():
         }), 201
     
     except Exception as e:
+        # There is no DEFAULT partition: a purchase dated past the months maintenance created is refused
+        if isinstance(e, psycopg2.errors.CheckViolation) and e.diag.message_primary.startswith('no partition'):
+            logger.error(f"Create purchase error: no purchases partition for the purchase date, "
+                         f"check the purchase_partitions job: {e}")
+            return jsonify({'status': 'error', 'message': 'Purchases cannot be recorded right now'}), 503
         logger.error(f"Create purchase error: {e}")
         return jsonify({'status': 'error', 'message': 'An unexpected error occurred'}), 500
     
@@ -826,22 +3816,54 @@ def create_purchase():
             db.close()
 
 @app.route('/api/purchases', methods=['GET'])
+@admission_class('export', paged_by=('limit', 'since'))
 @admin_required
+@read_only
 def get_purchases():
     try:
         db = get_db_connection()
         cursor = db.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
         
-        cursor.execute('''
-            SELECT p.*, u.name as user_name, u.email, pl.name as plan_name 
-            FROM purchases p
-            JOIN users u ON p.user_id = u.id
-            JOIN plans pl ON p.plan_id = pl.id
-            ORDER BY p.purchase_date DESC
-        ''')
+        # Optional paging - LIMIT NULL returns every row, so the default is unchanged
+        limit = request.args.get('limit', type=int)
+        offset = request.args.get('offset', 0, type=int)
+        # Optional ?from=&to= dates - only the partitions for those months are scanned
+        date_from = datetime.fromisoformat(request.args['from']) if request.args.get('from') else None
+        date_to = datetime.fromisoformat(request.args['to']) if request.args.get('to') else None
+        since = parse_change_token()
+        names, columns = requested_fields('purchases')
+        # A LEFT JOIN (purchases of deleted accounts have no user) and a foreign key, so leaving
+        # out a join never changes which purchases are listed
+        joins = ''.join(join for alias, join in [
+            ('u.', 'LEFT JOIN users u ON p.user_id = u.id '), ('pl.', 'JOIN plans pl ON p.plan_id = pl.id ')
+        ] if any(API_FIELDS['purchases'][name].startswith(alias) for name in names))
+        token = get_change_token(cursor)
+        
+        if since is not None:
+            cursor.execute(f'''
+                SELECT {columns} 
+                FROM purchases p
+                {joins}
+                WHERE p.change_xid >= %s::xid8
+                ORDER BY p.purchase_date DESC
+            ''', (since,))
+        else:
+            # Walks idx_purchases_purchase_date and the covering users index
+            cursor.execute(f'''
+                SELECT {columns} 
+                FROM purchases p
+                {joins}
+                WHERE (%s::timestamp IS NULL OR p.purchase_date >= %s)
+                  AND (%s::timestamp IS NULL OR p.purchase_date < %s)
+                ORDER BY p.purchase_date DESC
+                LIMIT %s OFFSET %s
+            ''', (date_from, date_from, date_to, date_to, limit, offset))
         
         purchases = cursor.fetchall()
-        return jsonify(purchases), 200
+        return change_set_response(purchases, token, since, cursor, 'purchases')
+    
+    except ValueError as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 400
     
     except Exception as e:
         logger.error(f"Get purchases error: {e}")
@@ -886,6 +3908,7 @@ def start_demo():
             db.close()
 
 @app.route('/api/demo/access/<token>', methods=['GET'])
+@read_only
 def access_demo(token):
     try:
         db = get_db_connection()
@@ -917,14 +3940,71 @@ def access_demo(token):
         if 'db' in locals():
             db.close()
 
+# SMTP settings - one row (id 1) in email_config, cached in every worker as an immutable
+# SmtpConfig. Saving bumps the row's version and notifies EMAIL_CONFIG_CHANNEL, and each
+# worker's listener reloads it. An email reads one snapshot, never a mix of two versions
+EMAIL_CONFIG_CHANNEL = 'email_config'
+SmtpConfig = namedtuple('SmtpConfig', 'server port username password')
+
+def smtp_config_from_env():
+    """The settings used until an admin saves some"""
+    return SmtpConfig(
+        server=os.getenv('SMTP_SERVER', 'smtp.gmail.com'),
+        port=int(os.getenv('SMTP_PORT', '587')),
+        username=os.getenv('SMTP_USERNAME', ''),
+        password=os.getenv('SMTP_PASSWORD', '')
+    )
+
+class SmtpSettings:
+    """Per-worker copy of the saved SMTP settings, kept current by the worker's listener"""
+
+    def __init__(self):
+        self._current = None  # (version, SmtpConfig), replaced as a whole
+        self._lock = threading.Lock()
+
+    def ensure_started(self):
+        # Loading on listen also picks up anything saved while disconnected
+        notifications.listen(EMAIL_CONFIG_CHANNEL, lambda payloads, cursor: self._load(cursor), on_listen=self._load)
+
+    def get(self):
+        self.ensure_started()
+        current = self._current
+        if current is None:
+            # An email sent before the listener's first load
+            db = get_db_connection()
+            try:
+                self._load(db.cursor())
+            finally:
+                db.close()
+            current = self._current
+        return current[1]
+
+    def version(self):
+        current = self._current
+        return current[0] if current else None
+
+    def set(self, version, config):
+        """Swap in a config unless this worker already has that version or a newer one"""
+        with self._lock:
+            if self._current is None or version > self._current[0]:
+                self._current = (version, config)
+
+    def _load(self, cursor):
+        cursor.execute('SELECT version, smtp_server, smtp_port, smtp_username, smtp_password FROM email_config WHERE id = 1')
+        row = cursor.fetchone()
+        if row is None:
+            self.set(0, smtp_config_from_env())
+        else:
+            version, server, port, username, password = row
+            self.set(version, SmtpConfig(server or 'smtp.gmail.com', port or 587, username or '', password or ''))
+
+smtp_settings = SmtpSettings()
+
 # Email Notification Functions
 def send_purchase_notification(email, purchase_id):
     try:
         # This is a basic implementation - you'd need to configure SMTP settings
-        smtp_server = os.getenv('SMTP_SERVER', 'smtp.gmail.com')
-        smtp_port = int(os.getenv('SMTP_PORT', '587'))
-        smtp_username = os.getenv('SMTP_USERNAME', '')
-        smtp_password = os.getenv('SMTP_PASSWORD', '')
+        smtp_server, smtp_port, smtp_username, smtp_password = smtp_settings.get()
         
         if not all([smtp_username, smtp_password]):
             logger.warning("SMTP not configured - email not sent")
@@ -972,45 +4052,235 @@ def send_purchase_notification(email, purchase_id):
         logger.error(f"Email preparation error: {e}")
         return False
 
-def send_welcome_email(email, name):
-    try:
-        smtp_server = os.getenv('SMTP_SERVER', 'smtp.gmail.com')
-        smtp_port = int(os.getenv('SMTP_PORT', '587'))
-        smtp_username = os.getenv('SMTP_USERNAME', '')
-        smtp_password = os.getenv('SMTP_PASSWORD', '')
-        
-        if not all([smtp_username, smtp_password]):
-            logger.warning("SMTP not configured - email not sent")
-            return False
-        
-        msg = MIMEMultipart()
-        msg['From'] = smtp_username
-        msg['To'] = email
-        msg['Subject'] = "Welcome to NetDash!"
-        
-        body = f"""
+# Welcome emails for imported users are sent by the welcome_emails job, WELCOME_EMAIL_BATCH_SIZE
+# per SMTP session. An invited user's link is a password reset token, issued as its email goes out
+WELCOME_EMAIL_BATCH_SIZE = int(os.getenv('WELCOME_EMAIL_BATCH_SIZE', '100'))
+WELCOME_EMAIL_MAX_ATTEMPTS = 5
+INVITE_TOKEN_TTL = timedelta(days=7)
+
+def welcome_message(sender, email, name, invite_url=None):
+    msg = MIMEMultipart()
+    msg['From'] = sender
+    msg['To'] = email
+    msg['Subject'] = "Welcome to NetDash!"
+    
+    invite = f"""
+            <p>Your account is ready. Set your password to sign in:</p>
+            <p><a href="{invite_url}">{invite_url}</a></p>
+            <p>This link will expire in {INVITE_TOKEN_TTL.days} days.</p>""" if invite_url else ''
+    body = f"""
         <html>
         <body>
-            <h2>Welcome to NetDash, {name}!</h2>
+            <h2>Welcome to NetDash, {html.escape(name)}!</h2>
             <p>Thank you for joining our cybersecurity platform.</p>
-            <p>You can now access all features available in your plan.</p>
+            <p>You can now access all features available in your plan.</p>{invite}
             <p>Best regards,<br>The NetDash Team</p>
         </body>
         </html>
         """
+    
+    msg.attach(MIMEText(body, 'html'))
+    return msg
+
+def send_welcome_email(email, name):
+    try:
+        smtp_server, smtp_port, smtp_username, smtp_password = smtp_settings.get()
         
-        msg.attach(MIMEText(body, 'html'))
+        if not all([smtp_username, smtp_password]):
+            logger.warning("SMTP not configured - email not sent")
+            return False
         
         server = smtplib.SMTP(smtp_server, smtp_port)
         server.starttls()
         server.login(smtp_username, smtp_password)
-        server.send_message(msg)
+        server.send_message(welcome_message(smtp_username, email, name))
         server.quit()
         
         return True
     except Exception as e:
-        logger.error(f"Email sending error: {e}")
-        return False
+        logger.error(f"Email sending error: {e}")
+        return False
+
+def send_welcome_emails():
+    """Send the queued welcome emails in batches; returns the counts sent and failed"""
+    totals = {'sent': 0, 'failed': 0}
+    smtp_server, smtp_port, smtp_username, smtp_password = smtp_settings.get()
+    if not all([smtp_username, smtp_password]):
+        logger.warning("SMTP not configured - welcome emails stay queued")
+        return {**totals, 'smtp_configured': False}
+
+    db = get_db_connection()
+    try:
+        cursor = db.cursor()
+        while True:
+            cursor.execute('''
+                SELECT w.user_id, w.invite, w.site_url, u.email, u.name
+                FROM welcome_emails w
+                JOIN users u ON u.id = w.user_id
+                WHERE w.attempts < %s
+                ORDER BY w.user_id  -- signup order, read off the primary key instead of sorting the queue
+                LIMIT %s
+                FOR UPDATE OF w SKIP LOCKED
+            ''', (WELCOME_EMAIL_MAX_ATTEMPTS, WELCOME_EMAIL_BATCH_SIZE))
+            batch = cursor.fetchall()
+            if not batch:
+                db.rollback()
+                return totals
+
+            sent, tokens, failed = [], [], []
+            try:
+                server = smtplib.SMTP(smtp_server, smtp_port)
+                server.starttls()
+                server.login(smtp_username, smtp_password)
+            except (smtplib.SMTPException, OSError) as e:
+                # The whole batch is tried again on the next run
+                logger.error(f"Welcome email SMTP error: {e}")
+                failed = [(user_id, str(e)) for user_id, *_ in batch]
+            else:
+                try:
+                    for user_id, invite, site_url, email, name in batch:
+                        token = secrets.token_urlsafe(32) if invite else None
+                        invite_url = f"{site_url}reset-password.html?token={token}" if token else None
+                        try:
+                            server.send_message(welcome_message(smtp_username, email, name, invite_url))
+                        except smtplib.SMTPException as e:
+                            failed.append((user_id, str(e)))
+                            continue
+                        sent.append(user_id)
+                        if token:
+                            tokens.append((hash_reset_token(token), user_id, INVITE_TOKEN_TTL))
+                finally:
+                    try:
+                        server.quit()
+                    except smtplib.SMTPException:
+                        pass
+
+            psycopg2.extras.execute_values(cursor, '''
+                INSERT INTO password_reset_tokens (token_hash, user_id, expires_at) VALUES %s
+            ''', tokens, template='(%s, %s, NOW() + %s)')
+            cursor.execute('DELETE FROM welcome_emails WHERE user_id = ANY(%s)', (sent,))
+            psycopg2.extras.execute_values(cursor, '''
+                UPDATE welcome_emails SET attempts = attempts + 1, last_error = f.error
+                FROM (VALUES %s) AS f (user_id, error)
+                WHERE welcome_emails.user_id = f.user_id
+            ''', failed)
+            db.commit()
+            totals['sent'] += len(sent)
+            totals['failed'] += len(failed)
+            if failed and not sent:
+                # The server is refusing everything; the next run tries again
+                return totals
+    finally:
+        db.close()
+
+# Purchase fulfillment - the status changes an admin or the fulfillment worker may make
+PURCHASE_TRANSITIONS = {
+    'pending': ('completed', 'failed'),
+    'failed': ('pending', 'completed'),
+    'completed': ('refunded',),
+    'refunded': (),
+}
+FULFILLMENT_BATCH_SIZE = int(os.getenv('FULFILLMENT_BATCH_SIZE', '100'))
+BULK_STATUS_BATCH_SIZE = 1000  # rows per UPDATE ... FROM (VALUES ...) statement
+BULK_STATUS_MAX_CHANGES = 50000  # purchases per request, listed or matched by a filter
+BULK_STATUS_EVENT_LIMIT = 100  # above this the dashboard gets one resync instead of an event per purchase
+
+# (from, to) pairs as SQL, for checking transitions inside bulk UPDATEs
+PURCHASE_TRANSITIONS_SQL = ', '.join(
+    f"('{previous}', '{status}')" for previous, targets in PURCHASE_TRANSITIONS.items() for status in targets
+)
+
+def allowed_previous_statuses(new_status):
+    return [status for status, targets in PURCHASE_TRANSITIONS.items() if new_status in targets]
+
+def validate_purchase(purchase):
+    """Status a claimed pending purchase settles to: completed if it pays an active plan's price"""
+    if not purchase['plan_active'] or purchase['amount'] != purchase['price']:
+        return 'failed'
+    return 'completed'
+
+def fulfill_pending_purchases(batch_size=FULFILLMENT_BATCH_SIZE):
+    """Claim and settle one batch of pending purchases; return how many were processed"""
+    db = get_db_connection()
+    try:
+        cursor = db.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
+
+        # SKIP LOCKED lets several workers claim disjoint batches without waiting on each other
+        cursor.execute('''
+            SELECT p.id, p.user_id, p.amount, pl.price, pl.is_active AS plan_active,
+                   pl.name AS plan_name, u.email, u.name AS user_name
+            FROM purchases p
+            JOIN plans pl ON pl.id = p.plan_id
+            JOIN users u ON u.id = p.user_id
+            WHERE p.status = 'pending'
+            ORDER BY p.purchase_date
+            LIMIT %s
+            FOR UPDATE OF p SKIP LOCKED
+        ''', (batch_size,))
+        purchases = cursor.fetchall()
+        if not purchases:
+            db.rollback()
+            return 0
+
+        outcomes = [(purchase['id'], validate_purchase(purchase)) for purchase in purchases]
+        psycopg2.extras.execute_values(cursor, '''
+            UPDATE purchases SET status = v.status
+            FROM (VALUES %s) AS v (id, status)
+            WHERE purchases.id = v.id
+        ''', outcomes)
+        sync_subscriptions(cursor, [purchase['user_id'] for purchase in purchases])
+        notify_admins_many(cursor, 'purchase_status', [
+            {'id': purchase_id, 'status': status, 'previous_status': 'pending'}
+            for purchase_id, status in outcomes
+        ])
+        db.commit()
+    finally:
+        db.close()
+
+    send_purchase_confirmations([
+        (purchase['id'], purchase['email'], purchase['user_name'], purchase['plan_name'])
+        for purchase, (_, status) in zip(purchases, outcomes) if status == 'completed'
+    ])
+    return len(purchases)
+
+def send_purchase_confirmations(purchases):
+    """Send confirmations for (purchase_id, email, name, plan_name) tuples of completed purchases"""
+    for purchase_id, email, name, plan_name in purchases:
+        if email is None:
+            continue  # the account was deleted
+        if not send_purchase_confirmation(email, name, plan_name):
+            logger.warning(f"Purchase {purchase_id} completed but its confirmation email was not sent")
+
+def get_fulfillment_queue(cursor):
+    """Queue depth and the age in seconds of the oldest pending purchase"""
+    cursor.execute('''
+        SELECT COUNT(*) AS pending,
+               EXTRACT(EPOCH FROM NOW() - MIN(purchase_date)) AS oldest_pending_seconds
+        FROM purchases
+        WHERE status = 'pending'
+    ''')
+    queue_state = cursor.fetchone()
+    return {
+        'pending': queue_state['pending'],
+        'oldest_pending_seconds': float(queue_state['oldest_pending_seconds'] or 0)
+    }
+
+@app.route('/api/purchases/fulfillment', methods=['GET'])
+@admin_required
+@read_only
+def get_fulfillment_status():
+    try:
+        db = get_db_connection()
+        cursor = db.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
+        return jsonify(get_fulfillment_queue(cursor)), 200
+
+    except Exception as e:
+        logger.error(f"Fulfillment status error: {e}")
+        return jsonify({'status': 'error', 'message': 'An unexpected error occurred'}), 500
+
+    finally:
+        if 'db' in locals():
+            db.close()
 
 # Purchase status update route
 @app.route('/api/purchases/<int:purchase_id>/status', methods=['PUT'])
@@ -1020,21 +4290,54 @@ def update_purchase_status(purchase_id):
         data = request.get_json()
         new_status = data.get('status')
         
-        if new_status not in ['pending', 'completed', 'failed', 'refunded']:
+        if new_status not in PURCHASE_TRANSITIONS:
             return jsonify({'status': 'error', 'message': 'Invalid status'}), 400
         
         db = get_db_connection()
         cursor = db.cursor()
         
-        # Check if purchase exists
-        cursor.execute('SELECT * FROM purchases WHERE id = %s', (purchase_id,))
-        if cursor.fetchone() is None:
-            return jsonify({'status': 'error', 'message': 'Purchase not found'}), 404
-        
-        # Update purchase status
-        cursor.execute('UPDATE purchases SET status = %s WHERE id = %s', (new_status, purchase_id))
+        # Lock, check the transition and update in one statement so concurrent changes cannot interleave.
+        # Purchases of deleted accounts have no user, hence the LEFT JOIN
+        cursor.execute('''
+            WITH current AS (
+                SELECT p.id, p.status, u.email, u.name
+                FROM purchases p
+                LEFT JOIN users u ON u.id = p.user_id
+                WHERE p.id = %s
+                FOR UPDATE OF p
+            )
+            UPDATE purchases p SET status = %s
+            FROM current, plans pl
+            WHERE p.id = current.id
+              AND current.status = ANY(%s)
+              AND pl.id = p.plan_id
+            RETURNING current.status, p.user_id, current.email, current.name, pl.name
+        ''', (purchase_id, new_status, allowed_previous_statuses(new_status)))
+        purchase = cursor.fetchone()
+        
+        if purchase is None:
+            db.rollback()
+            cursor.execute('SELECT status FROM purchases WHERE id = %s', (purchase_id,))
+            current = cursor.fetchone()
+            if current is None:
+                return jsonify({'status': 'error', 'message': 'Purchase not found'}), 404
+            return jsonify({
+                'status': 'error',
+                'message': f'Cannot change a {current[0]} purchase to {new_status}'
+            }), 409
+        
+        previous_status, user_id, email, name, plan_name = purchase
+        sync_subscriptions(cursor, [user_id])
+        notify_admins(cursor, 'purchase_status', {
+            'id': purchase_id,
+            'status': new_status,
+            'previous_status': previous_status
+        })
         db.commit()
         
+        if new_status == 'completed':
+            send_purchase_confirmations([(purchase_id, email, name, plan_name)])
+        
         return jsonify({'status': 'success', 'message': 'Purchase status updated successfully'}), 200
     
     except Exception as e:
@@ -1045,25 +4348,198 @@ def update_purchase_status(purchase_id):
         if 'db' in locals():
             db.close()
 
+@app.route('/api/purchases/status', methods=['POST'])
+@admin_required
+def bulk_update_purchase_status():
+    """Apply many status changes in one transaction and report the outcome for every purchase
+
+    Takes either {"changes": [{"id": 1, "status": "completed"}, ...]} or a filter such as
+    {"filter": {"status": "pending", "older_than_days": 7}, "status": "failed"}.
+    """
+    try:
+        data = request.get_json() or {}
+        results = {}
+        
+        if 'filter' in data:
+            criteria = data['filter'] or {}
+            previous_status = criteria.get('status')
+            new_status = data.get('status')
+            if new_status not in PURCHASE_TRANSITIONS or previous_status not in PURCHASE_TRANSITIONS:
+                return jsonify({'status': 'error', 'message': 'filter.status and status must be valid statuses'}), 400
+            if new_status not in PURCHASE_TRANSITIONS[previous_status]:
+                return jsonify({'status': 'error', 'message': f'Cannot change a {previous_status} purchase to {new_status}'}), 409
+            older_than_days = int(criteria.get('older_than_days', 0))
+            plan_id = criteria.get('plan_id')
+            changes = None
+        else:
+            changes = []
+            for change in data.get('changes') or []:
+                purchase_id, status = change.get('id'), change.get('status')
+                if not isinstance(purchase_id, int):
+                    return jsonify({'status': 'error', 'message': 'Each change needs an integer id'}), 400
+                if purchase_id in results:
+                    continue
+                if status not in PURCHASE_TRANSITIONS:
+                    results[purchase_id] = {'id': purchase_id, 'outcome': 'invalid_status'}
+                    continue
+                results[purchase_id] = None
+                changes.append((purchase_id, status))
+            if not results:
+                return jsonify({'status': 'error', 'message': 'No changes given'}), 400
+            if len(results) > BULK_STATUS_MAX_CHANGES:
+                return jsonify({'status': 'error', 'message': f'At most {BULK_STATUS_MAX_CHANGES} changes per request'}), 413
+        
+        db = get_db_connection()
+        cursor = db.cursor()
+        
+        # Purchases of deleted accounts have no user, hence the LEFT JOINs
+        if changes is None:
+            cursor.execute('''
+                WITH current AS (
+                    SELECT p.id, u.email, u.name
+                    FROM purchases p
+                    LEFT JOIN users u ON u.id = p.user_id
+                    WHERE p.status = %s
+                      AND p.purchase_date < NOW() - %s * INTERVAL '1 day'
+                      AND (%s::int IS NULL OR p.plan_id = %s::int)
+                    ORDER BY p.id
+                    LIMIT %s
+                    FOR UPDATE OF p
+                )
+                UPDATE purchases p SET status = %s
+                FROM current, plans pl
+                WHERE p.id = current.id
+                  AND pl.id = p.plan_id
+                RETURNING p.id, p.user_id, p.status, current.email, current.name, pl.name
+            ''', (previous_status, older_than_days, plan_id, plan_id, BULK_STATUS_MAX_CHANGES, new_status))
+            updated = [(row[0], row[1], previous_status, row[2], row[3], row[4], row[5]) for row in cursor.fetchall()]
+        elif changes:
+            # Rows are locked in id order so concurrent bulk updates cannot deadlock, and each
+            # change only applies when it is an allowed transition from the locked status. Sorted
+            # first, as ORDER BY only orders the locks within each page of VALUES
+            changes.sort()
+            updated = psycopg2.extras.execute_values(cursor, f'''
+                WITH changes (id, status) AS (VALUES %s),
+                current AS (
+                    SELECT p.id, p.status, u.email, u.name
+                    FROM purchases p
+                    LEFT JOIN users u ON u.id = p.user_id
+                    WHERE p.id IN (SELECT id FROM changes)
+                    ORDER BY p.id
+                    FOR UPDATE OF p
+                )
+                UPDATE purchases p SET status = changes.status
+                FROM changes, current, plans pl
+                WHERE p.id = changes.id
+                  AND current.id = changes.id
+                  AND (current.status, changes.status) IN ({PURCHASE_TRANSITIONS_SQL})
+                  AND pl.id = p.plan_id
+                RETURNING p.id, p.user_id, current.status, p.status, current.email, current.name, pl.name
+            ''', changes, template='(%s::int, %s::text)', page_size=BULK_STATUS_BATCH_SIZE, fetch=True)
+        else:
+            updated = []
+        
+        for purchase_id, _, previous, status, _, _, _ in updated:
+            results[purchase_id] = {'id': purchase_id, 'outcome': 'updated', 'previous_status': previous, 'status': status}
+        
+        # Everything requested but not updated is either missing or not an allowed transition
+        unchanged = [purchase_id for purchase_id, result in results.items() if result is None]
+        if unchanged:
+            cursor.execute('SELECT id, status FROM purchases WHERE id = ANY(%s)', (unchanged,))
+            current_statuses = dict(cursor.fetchall())
+            requested = dict(changes)
+            for purchase_id in unchanged:
+                if purchase_id not in current_statuses:
+                    results[purchase_id] = {'id': purchase_id, 'outcome': 'not_found'}
+                else:
+                    results[purchase_id] = {
+                        'id': purchase_id,
+                        'outcome': 'invalid_transition',
+                        'status': current_statuses[purchase_id],
+                        'requested_status': requested[purchase_id]
+                    }
+        
+        if updated:
+            sync_subscriptions(cursor, [row[1] for row in updated])
+            if len(updated) > BULK_STATUS_EVENT_LIMIT:
+                notify_admins(cursor, 'resync', {})
+            else:
+                notify_admins_many(cursor, 'purchase_status', [
+                    {'id': row[0], 'status': row[3], 'previous_status': row[2]} for row in updated
+                ])
+        db.commit()
+        
+        confirmations = [(row[0], row[4], row[5], row[6]) for row in updated if row[3] == 'completed']
+        if confirmations:
+            threading.Thread(target=send_purchase_confirmations, args=(confirmations,),
+                             name='purchase-confirmations', daemon=True).start()
+        
+        return jsonify({
+            'status': 'success',
+            'updated': len(updated),
+            # A filter stops at BULK_STATUS_MAX_CHANGES purchases; send it again for the rest
+            'more': changes is None and len(updated) == BULK_STATUS_MAX_CHANGES,
+            'results': list(results.values())
+        }), 200
+    
+    except (TypeError, ValueError) as e:
+        return jsonify({'status': 'error', 'message': f'Invalid request: {e}'}), 400
+    
+    except Exception as e:
+        logger.error(f"Bulk purchase status error: {e}")
+        return jsonify({'status': 'error', 'message': 'An unexpected error occurred'}), 500
+    
+    finally:
+        if 'db' in locals():
+            db.close()
+
 # Email configuration route
 @app.route('/api/email-config', methods=['POST'])
 @admin_required
 def update_email_config():
     try:
-        data = request.get_json()
+        data = request.get_json() or {}
+        
+        try:
+            config = SmtpConfig(
+                server=data.get('smtp_server', 'smtp.gmail.com'),
+                port=int(data.get('smtp_port', 587)),
+                username=data.get('smtp_username', ''),
+                password=data.get('smtp_password', '')
+            )
+        except (TypeError, ValueError):
+            return jsonify({'status': 'error', 'message': 'smtp_port must be a number'}), 400
         
-        # In a real application, you would save these to a configuration table
-        # For now, we'll update environment variables (not persistent)
-        os.environ['SMTP_SERVER'] = data.get('smtp_server', 'smtp.gmail.com')
-        os.environ['SMTP_PORT'] = str(data.get('smtp_port', 587))
-        os.environ['SMTP_USERNAME'] = data.get('smtp_username', '')
-        os.environ['SMTP_PASSWORD'] = data.get('smtp_password', '')
+        db = get_db_connection()
+        cursor = db.cursor()
+        cursor.execute('''
+            INSERT INTO email_config (id, smtp_server, smtp_port, smtp_username, smtp_password, version, updated_at)
+            VALUES (1, %s, %s, %s, %s, 1, NOW())
+            ON CONFLICT (id) DO UPDATE SET
+                smtp_server = EXCLUDED.smtp_server,
+                smtp_port = EXCLUDED.smtp_port,
+                smtp_username = EXCLUDED.smtp_username,
+                smtp_password = EXCLUDED.smtp_password,
+                version = email_config.version + 1,
+                updated_at = NOW()
+            RETURNING version
+        ''', tuple(config))
+        version = cursor.fetchone()[0]
+        cursor.execute('SELECT pg_notify(%s, %s)', (EMAIL_CONFIG_CHANNEL, str(version)))
+        db.commit()
+        
+        # This worker switches now; the others reload when the notification arrives
+        smtp_settings.set(version, config)
         
         return jsonify({'status': 'success', 'message': 'Email configuration updated successfully'}), 200
     
     except Exception as e:
         logger.error(f"Email config error: {e}")
         return jsonify({'status': 'error', 'message': 'An unexpected error occurred'}), 500
+    
+    finally:
+        if 'db' in locals():
+            db.close()
 
 # Company admin route to serve the company dashboard
 @app.route('/company_dashboard.html')
@@ -1072,7 +4548,7 @@ def company_dashboard():
     # Check if user is company_admin
     if session.get('user_role') != 'company_admin':
         return jsonify({'status': 'error', 'message': 'Access denied'}), 403
-    return send_from_directory('frontend', 'company_dashboard.html')
+    return send_page('company_dashboard.html')
 
 # Route for company admins to access after login
 @app.route('/api/redirect-after-login', methods=['GET'])
@@ -1092,10 +4568,7 @@ def redirect_after_login():
 # Enhanced purchase confirmation email
 def send_purchase_confirmation(email, name, plan_name):
     try:
-        smtp_server = os.getenv('SMTP_SERVER', 'smtp.gmail.com')
-        smtp_port = int(os.getenv('SMTP_PORT', '587'))
-        smtp_username = os.getenv('SMTP_USERNAME', '')
-        smtp_password = os.getenv('SMTP_PASSWORD', '')
+        smtp_server, smtp_port, smtp_username, smtp_password = smtp_settings.get()
         
         if not all([smtp_username, smtp_password]):
             logger.warning("SMTP not configured - email not sent")
@@ -1242,7 +4715,246 @@ def test_insert_approved_reviews():
 # Modify your get_public_reviews function to also include debug info in development
 # Add or update this endpoint in your Flask app.py file
 
+# Landing page bundle - everything the public landing page shows, in one request. Each worker
+# keeps every section serialized, and reloads a section when the landing channel names its table
+LANDING_CHANNEL = 'landing'
+LANDING_QUERIES = {
+    'plans': 'SELECT id, name, price, features FROM plans WHERE is_active = TRUE ORDER BY price, id',
+    # Same reviews as /api/reviews/public
+    'reviews': 'SELECT id, name, rating, comment, created_at FROM reviews ORDER BY created_at DESC LIMIT 10',
+    'features': 'SELECT id, title, description FROM features ORDER BY id',
+    'guides': 'SELECT id, type, title, link FROM guides ORDER BY id',
+    'downloads': 'SELECT id, plan_id, os_name, download_link FROM downloads ORDER BY plan_id, id',
+}
+
+class LandingSnapshot:
+    """Per-worker cache of the landing sections as JSON text, invalidated per section"""
+
+    def __init__(self):
+        self._sections = {}                                    # section -> JSON text
+        self._versions = dict.fromkeys(LANDING_SECTIONS, 0)  # bumped on every invalidation
+        self._body = None                                      # every section joined, once all are current
+        self.generation = 0                                    # bumped on any invalidation
+        self.on_change = []                                    # called after notifications are applied
+        self.listening = False
+        self._lock = threading.Lock()
+
+    def ensure_started(self):
+        notifications.listen(LANDING_CHANNEL, self._apply_notifications,
+                             on_listen=self._start_listening, on_disconnect=self._stop_listening)
+
+    def invalidate(self, section=None):
+        with self._lock:
+            for name in [section] if section else LANDING_SECTIONS:
+                self._versions[name] += 1
+                self._sections.pop(name, None)
+            self._body = None
+            self.generation += 1
+
+    def _start_listening(self, cursor):
+        # Anything cached before LISTEN may have missed a change
+        self.invalidate()
+        self.listening = True
+
+    def _stop_listening(self):
+        # Changes may be missed while disconnected - serve from the database until relistening
+        self.listening = False
+        self.invalidate()
+
+    def _apply_notifications(self, payloads, cursor):
+        for section in payloads:
+            if section in self._versions:
+                self.invalidate(section)
+        for callback in self.on_change:
+            callback()
+
+    def _load(self, sections):
+        db = get_db_connection()
+        try:
+            cursor = db.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
+            loaded = {}
+            for section in sections:
+                cursor.execute(LANDING_QUERIES[section])
+                rows = cursor.fetchall()
+                if section == 'plans':
+                    for plan in rows:
+                        plan['features'] = parse_plan_features(plan['features'])
+                loaded[section] = json.dumps(rows, default=json_default)
+            return loaded
+        finally:
+            db.close()
+
+    def get(self):
+        """Return the bundle as JSON text, loading the sections that changed since it was built"""
+        self.ensure_started()
+        with self._lock:
+            if self._body is not None:
+                return self._body
+            listening = self.listening
+            sections = dict(self._sections) if listening else {}
+            versions = dict(self._versions)
+
+        sections.update(self._load([name for name in LANDING_SECTIONS if name not in sections]))
+        body = '{' + ','.join(f'"{name}":{sections[name]}' for name in LANDING_SECTIONS) + '}'
+
+        with self._lock:
+            # Keep only sections no notification invalidated while they loaded
+            if listening and self.listening:
+                for name, version in versions.items():
+                    if self._versions[name] == version:
+                        self._sections.setdefault(name, sections[name])
+                if self._versions == versions:
+                    self._body = body
+        return body
+
+landing_snapshot = LandingSnapshot()
+
+def auth_status():
+    """The session's login state, as /api/check-auth reports it"""
+    if 'user_id' not in session:
+        return {'authenticated': False}
+    return {
+        'authenticated': True,
+        'user': {
+            'id': session.get('user_id'),
+            'email': session.get('user_email'),
+            'name': session.get('user_name'),
+            'role': session.get('user_role')
+        }
+    }
+
+# Not @read_only: a section reloads as soon as its notification arrives, and a lagging replica
+# would leave the old rows cached until the next change
+@app.route('/api/landing', methods=['GET'])
+def get_landing():
+    """Plans, reviews, features, guides, downloads and the visitor's login state in one response"""
+    try:
+        snapshot = landing_snapshot.get()
+        # The snapshot is shared; only the login state is per visitor
+        body = '{"auth":' + json.dumps(auth_status()) + ',' + snapshot[1:]
+        response = Response(body, mimetype='application/json')
+        response.set_etag(hashlib.sha256(body.encode('utf-8')).hexdigest()[:32])
+        response.headers['Cache-Control'] = 'no-cache'
+        response.vary.add('Cookie')
+        return response.make_conditional(request)
+
+    except Exception as e:
+        logger.error(f"Landing error: {e}")
+        return jsonify({'status': 'error', 'message': 'An unexpected error occurred'}), 500
+
+# Server-rendered landing page - the index page with the landing bundle embedded, so it paints
+# without waiting for /api/landing. Reviews are rendered into the markup and every section is
+# embedded as JSON for the page's scripts. Each worker keeps the page compressed in every
+# encoding, in two variants: signed-out visitors get their login state embedded, signed-in ones
+# fetch it from /api/check-auth. Landing notifications re-render the page in the background
+LANDING_PAGE = os.getenv('LANDING_PAGE', '1') != '0'
+# Compressed once per change rather than per request, so the slowest levels pay off
+LANDING_PAGE_LEVELS = {'zstd': 19, 'br': 11, 'gzip': 9}
+# Without the listener changes go unnoticed, so the page is re-rendered this often instead
+LANDING_PAGE_FALLBACK_TTL = 5  # seconds
+LANDING_PAGE_HEAD = re.compile(r'<head[^>]*>')
+LANDING_PAGE_REVIEWS = re.compile(r'(<div id="reviewsContainer")>.*?(</div>)', re.DOTALL)
+
+def render_landing_reviews(reviews):
+    """The markup the page's displayReviews() builds, with the text escaped"""
+    items = []
+    for review in reviews:
+        rating = review['rating'] or 5
+        # toLocaleDateString() in the page's en-US form
+        created = datetime.fromisoformat(review['created_at']) if review['created_at'] else None
+        date = f'{created.month}/{created.day}/{created.year}' if created else ''
+        items.append(
+            '<div class="review-item"><div class="review-header">'
+            f'<span class="reviewer-name">{html.escape(review["name"] or "Anonymous")}</span>'
+            f'<span class="review-date">{date}</span>'
+            f'</div><div class="review-rating">{"★" * rating}{"☆" * (5 - rating)}</div>'
+            f'<div class="review-comment">{html.escape(review["comment"] or "")}</div></div>'
+        )
+    return ''.join(items)
+
+class LandingPage:
+    """Per-worker cache of the rendered landing page, compressed in every encoding"""
+
+    def __init__(self):
+        self._page = None  # {'generation', 'rendered_at', 'variants': {variant: (digest, {encoding: body})}}
+        self._refreshing = False
+        self._lock = threading.Lock()
+        landing_snapshot.on_change.append(self.refresh_soon)
+
+    def template(self):
+        path = (os.path.join(ASSET_DIST_DIR, 'pages', 'index.html') if 'index.html' in asset_manifest['pages']
+                else os.path.join(app.root_path, 'frontend', 'index.html'))
+        with open(path, encoding='utf-8') as f:
+            return f.read()
+
+    def render(self):
+        generation = landing_snapshot.generation
+        landing = landing_snapshot.get()
+        reviews = render_landing_reviews(json.loads(landing)['reviews'])
+        markup = LANDING_PAGE_REVIEWS.sub(
+            lambda match: f'{match.group(1)} data-rendered="server">{reviews}{match.group(2)}', self.template(), count=1)
+
+        variants = {}
+        for variant, auth in [('signed_out', '{"auth":' + json.dumps({'authenticated': False}) + ','),
+                              ('signed_in', '{')]:
+            # \u003c keeps review text from closing the script element
+            data = (auth + landing[1:]).replace('<', '\\u003c')
+            page = LANDING_PAGE_HEAD.sub(
+                lambda match: f'{match.group(0)}<script type="application/json" id="landing-data">{data}</script>',
+                markup, count=1).encode('utf-8')
+            encoded = {None: page}
+            for encoding in COMPRESSION_ENCODINGS:
+                encoded[encoding] = run_blocking(compress_body, encoding, LANDING_PAGE_LEVELS[encoding], page)
+            variants[variant] = (hashlib.sha256(page).hexdigest()[:32], encoded)
+        self._page = {'generation': generation, 'rendered_at': time.monotonic(), 'variants': variants}
+        return self._page
+
+    def stale(self):
+        page = self._page
+        if page is None or page['generation'] != landing_snapshot.generation:
+            return True
+        return not landing_snapshot.listening and time.monotonic() - page['rendered_at'] > LANDING_PAGE_FALLBACK_TTL
+
+    def refresh_soon(self):
+        """Re-render in the background, while requests keep getting the previous page"""
+        with self._lock:
+            if self._refreshing or self._page is None:
+                return
+            self._refreshing = True
+        threading.Thread(target=self._refresh, name='landing-page', daemon=True).start()
+
+    def _refresh(self):
+        try:
+            # A change that arrives during a render gets one more
+            while self.stale():
+                self.render()
+        except Exception as e:
+            logger.error(f"Landing page render error: {e}")
+        finally:
+            with self._lock:
+                self._refreshing = False
+
+    def response(self):
+        landing_snapshot.ensure_started()
+        page = self._page
+        if page is None:
+            page = self.render()
+        elif self.stale():
+            self.refresh_soon()
+        digest, encoded = page['variants']['signed_in' if 'user_id' in session else 'signed_out']
+        encoding = request.accept_encodings.best_match(COMPRESSION_ENCODINGS)
+        response = Response(encoded[encoding], mimetype='text/html')
+        if encoding:
+            response.headers['Content-Encoding'] = encoding
+        response.set_etag(f'{digest}-{encoding}' if encoding else digest)
+        response.headers['Cache-Control'] = 'no-cache'
+        response.vary.update(['Accept-Encoding', 'Cookie'])
+        return response.make_conditional(request)
+
+landing_page = LandingPage()
+
 @app.route('/api/reviews/public', methods=['GET'])
+@read_only
 def get_public_reviews():
     """Get all reviews for public display"""
     try:
@@ -1271,7 +4983,7 @@ def get_public_reviews():
         return jsonify([]), 200
     
     finally:
-        if 'db' in locals() and hasattr(db, 'is_connected') and db.is_connected():
+        if 'db' in locals():
             db.close()
 
 
@@ -1284,6 +4996,8 @@ def test_database_connection():
         "database_connection": False,
         "reviews_table_exists": False,
         "can_query_reviews": False,
+        "replicas": replica_router.status(),
+        "db_pool": db_pool.status(),
         "errors": []
     }
     
@@ -1328,22 +5042,13 @@ def test_database_connection():
     finally:
         if cursor:
             cursor.close()
-        if db and hasattr(db, 'is_connected') and db.is_connected():
+        if db:
             db.close()
     
     return jsonify(results), 200
 
 
     
-# REMOVED OLD MYSQL FUNCTION
-def get_db_connection():
-    return psycopg2.connect(
-        host=os.getenv('DB_HOST', 'localhost'),
-        user=os.getenv('DB_USER', 'root'),
-        password=os.getenv('DB_PASSWORD', 'P@ssW0rd'),
-        database=os.getenv('DB_NAME', 'product_website')
-    )
-
 def fix_reviews_table_manually():
     """Manually fix the reviews table by adding the is_approved column"""
     db = None
@@ -1405,8 +5110,22 @@ if __name__ == "__main__":
     fix_reviews_table_manually()
 
 
-  # Password reset token store (in production, use a database table)
-reset_tokens = {}
+# Password reset tokens are kept in the database, so a link issued by one worker works on
+# any other. Only a hash of each token is stored
+PASSWORD_RESET_TOKEN_TTL = timedelta(hours=1)
+
+def hash_reset_token(token):
+    return hashlib.sha256(token.encode()).hexdigest()
+
+def issue_reset_token(cursor, user_id):
+    """Store a new reset token for the user, clearing out expired ones; returns the token"""
+    token = secrets.token_urlsafe(32)
+    cursor.execute('DELETE FROM password_reset_tokens WHERE expires_at < NOW()')
+    cursor.execute('''
+        INSERT INTO password_reset_tokens (token_hash, user_id, expires_at)
+        VALUES (%s, %s, NOW() + %s)
+    ''', (hash_reset_token(token), user_id, PASSWORD_RESET_TOKEN_TTL))
+    return token
 
 @app.route('/api/reset-password', methods=['POST'])
 def request_password_reset():
@@ -1422,7 +5141,7 @@ def request_password_reset():
         cursor = db.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
         
         # Check if user exists
-        cursor.execute('SELECT id, first_name, last_name, name FROM users WHERE email = %s', (email,))
+        cursor.execute('SELECT id, first_name, last_name, name FROM users WHERE lower(email) = lower(%s)', (email,))
         user = cursor.fetchone()
         
         if not user:
@@ -1430,15 +5149,8 @@ def request_password_reset():
             return jsonify({'status': 'success', 'message': 'If your email is registered, you will receive reset instructions'}), 200
         
         # Generate reset token
-        token = secrets.token_urlsafe(32)
-        expiry = datetime.now() + timedelta(hours=1)  # Token valid for 1 hour
-        
-        # Store token (in production, store in database)
-        reset_tokens[token] = {
-            'user_id': user['id'],
-            'email': email,
-            'expiry': expiry
-        }
+        token = issue_reset_token(cursor, user['id'])
+        db.commit()
         
         # Send reset email
         send_password_reset_email(email, token, user.get('name') or f"{user.get('first_name', '')} {user.get('last_name', '')}")
@@ -1450,40 +5162,53 @@ def request_password_reset():
         return jsonify({'status': 'error', 'message': 'An unexpected error occurred'}), 500
     
     finally:
-        if 'db' in locals() and hasattr(db, 'is_connected') and db.is_connected():
+        if 'db' in locals():
             db.close()
 
 @app.route('/api/reset-password/<token>', methods=['POST'])
 def reset_password(token):
     """Reset password using token"""
     try:
-        if token not in reset_tokens:
+        data = request.get_json() or {}
+        new_password = data.get('password')
+        token_hash = hash_reset_token(token)
+        
+        db = get_db_connection()
+        cursor = db.cursor()
+        cursor.execute('SELECT expires_at < NOW() FROM password_reset_tokens WHERE token_hash = %s', (token_hash,))
+        token_state = cursor.fetchone()
+        if not token_state:
             return jsonify({'status': 'error', 'message': 'Invalid or expired token'}), 400
         
-        token_data = reset_tokens[token]
-        if datetime.now() > token_data['expiry']:
+        if token_state[0]:
             # Remove expired token
-            del reset_tokens[token]
+            cursor.execute('DELETE FROM password_reset_tokens WHERE token_hash = %s', (token_hash,))
+            db.commit()
             return jsonify({'status': 'error', 'message': 'Token has expired'}), 400
         
-        data = request.get_json()
-        new_password = data.get('password')
-        
         if not new_password or len(new_password) < 8:
             return jsonify({'status': 'error', 'message': 'Password must be at least 8 characters'}), 400
         
-        # Update password in database
+        # Hash without holding a pool connection
+        db.close()
+        hashed_password = run_blocking(generate_password_hash, new_password)
+        
+        # Deleting the row claims the token, so of two requests racing with the same link
+        # only one gets it back
         db = get_db_connection()
         cursor = db.cursor()
+        cursor.execute('''
+            DELETE FROM password_reset_tokens WHERE token_hash = %s AND expires_at >= NOW()
+            RETURNING user_id
+        ''', (token_hash,))
+        claimed = cursor.fetchone()
+        if not claimed:
+            return jsonify({'status': 'error', 'message': 'Invalid or expired token'}), 400
         
-        hashed_password = generate_password_hash(new_password)
-        cursor.execute('UPDATE users SET password_hash = %s WHERE id = %s', 
-                      (hashed_password, token_data['user_id']))
+        # Update password in database
+        cursor.execute('UPDATE users SET password_hash = %s WHERE id = %s', (hashed_password, claimed[0]))
         db.commit()
         
-        # Remove used token
-        del reset_tokens[token]
-        
         return jsonify({'status': 'success', 'message': 'Password has been reset successfully'}), 200
     
     except Exception as e:
@@ -1491,32 +5216,18 @@ def reset_password(token):
         return jsonify({'status': 'error', 'message': 'An unexpected error occurred'}), 500
     
     finally:
-        if 'db' in locals() and hasattr(db, 'is_connected') and db.is_connected():
+        if 'db' in locals():
             db.close()
 
 @app.route('/api/check-auth', methods=['GET'])
 def check_auth():
     """Check if user is authenticated"""
-    if 'user_id' in session:
-        return jsonify({
-            'authenticated': True,
-            'user': {
-                'id': session.get('user_id'),
-                'email': session.get('user_email'),
-                'name': session.get('user_name'),
-                'role': session.get('user_role')
-            }
-        }), 200
-    else:
-        return jsonify({'authenticated': False}), 200
+    return jsonify(auth_status()), 200
 
 def send_password_reset_email(email, token, name):
     """Send password reset email"""
     try:
-        smtp_server = os.getenv('SMTP_SERVER', 'smtp.gmail.com')
-        smtp_port = int(os.getenv('SMTP_PORT', '587'))
-        smtp_username = os.getenv('SMTP_USERNAME', '')
-        smtp_password = os.getenv('SMTP_PASSWORD', '')
+        smtp_server, smtp_port, smtp_username, smtp_password = smtp_settings.get()
         
         if not all([smtp_username, smtp_password]):
             logger.warning("SMTP not configured - password reset email not sent")
@@ -1576,10 +5287,20 @@ def login():
         cursor = db.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
         
         # Find user by email
-        cursor.execute('SELECT * FROM users WHERE email = %s', (data['email'],))
+        cursor.execute('SELECT * FROM users WHERE lower(email) = lower(%s)', (data['email'],))
         user = cursor.fetchone()
         
-        if not user or not check_password_hash(user['password_hash'], data['password']):
+        # Hash without holding a pool connection
+        db.close()
+        
+        if not user or not run_blocking(check_password_hash, user['password_hash'], data['password']):
+            return jsonify({
+                'status': 'error', 
+                'message': 'Invalid credentials'
+            }), 401
+        
+        # An account waiting for deletion is already gone as far as its owner is concerned
+        if user.get('deletion_requested_at'):
             return jsonify({
                 'status': 'error', 
                 'message': 'Invalid credentials'
@@ -1608,10 +5329,8 @@ def login():
         session['user_email'] = user['email']
         session['user_name'] = user.get('name', '')
         
-        # Set session to expire in 30 days if remember_me is True
-        if remember_me:
-            session.permanent = True
-            app.permanent_session_lifetime = timedelta(days=30)
+        # Remember me keeps the session for PERMANENT_SESSION_LIFETIME, per session cookie
+        session.permanent = bool(remember_me)
         
         return jsonify({
             'status': 'success',
@@ -1628,6 +5347,362 @@ def login():
         if 'db' in locals():
             db.close()  
 
+# Background jobs - maintenance tasks run on a schedule by one process across every worker and
+# node: whichever currently holds the scheduler advisory lock. The leader starts each due job as
+# `python -m backend.jobs run <job>`, a separate lower-priority process, so jobs never take CPU
+# or pool connections from a serving worker, and a job past its timeout can be killed outright.
+# Every run is recorded in job_runs
+SCHEDULER = os.getenv('SCHEDULER', '1') != '0'
+SCHEDULER_LOCK_KEY = 726007
+SCHEDULER_TICK = 5                 # seconds between due checks on the leader
+SCHEDULER_ELECTION_INTERVAL = 15   # seconds between lock attempts; how soon a leader is replaced
+SCHEDULER_NICENESS = int(os.getenv('SCHEDULER_NICENESS', '10'))
+SCHEDULER_HISTORY_DAYS = int(os.getenv('SCHEDULER_HISTORY_DAYS', '30'))
+SCHEDULER_ERROR_CHARS = 4000       # tail of a failed job's stderr kept in job_runs
+JOB_BATCH_SIZE = 5000              # rows a purge deletes per transaction, so it never holds long locks
+
+# interval in seconds or a five-field cron expression in UTC; timeout and jitter in seconds
+ScheduledJob = namedtuple('ScheduledJob', 'name func interval cron timeout jitter')
+
+CRON_FIELDS = [(0, 59), (0, 23), (1, 31), (1, 12), (0, 7)]  # minute hour day month weekday (0 or 7 = Sunday)
+
+def parse_cron(expression):
+    """The allowed values of each field of a cron expression (*, lists, ranges and /steps).
+    Raises ValueError"""
+    fields = expression.split()
+    if len(fields) != 5:
+        raise ValueError(f"Cron expression needs five fields: {expression!r}")
+    allowed = []
+    for field, (low, high) in zip(fields, CRON_FIELDS):
+        values = set()
+        for part in field.split(','):
+            spec, _, step = part.partition('/')
+            if spec == '*':
+                start, end = low, high
+            elif '-' in spec:
+                start, end = map(int, spec.split('-', 1))
+            else:
+                # "5/15" counts from 5 to the end of the range
+                start = int(spec)
+                end = high if step else start
+            if not low <= start <= end <= high or (step and int(step) < 1):
+                raise ValueError(f"Invalid cron field {field!r} in {expression!r}")
+            values.update(range(start, end + 1, int(step) if step else 1))
+        allowed.append(values)
+    allowed[4] = {weekday % 7 for weekday in allowed[4]}
+    return allowed
+
+def next_cron_time(expression, after):
+    """The first whole minute after `after` that the cron expression matches"""
+    minutes, hours, days, months, weekdays = parse_cron(expression)
+    fields = expression.split()
+    # As in cron, a restricted day and weekday match either one
+    either_day = fields[2] != '*' and fields[4] != '*'
+    moment = after.replace(second=0, microsecond=0) + timedelta(minutes=1)
+    limit = moment + timedelta(days=4 * 366)
+    while moment < limit:
+        if moment.month not in months:
+            moment = (moment.replace(day=1, hour=0, minute=0) + timedelta(days=32)).replace(day=1)
+            continue
+        day_match, weekday_match = moment.day in days, moment.isoweekday() % 7 in weekdays
+        if not (day_match or weekday_match if either_day else day_match and weekday_match):
+            moment = moment.replace(hour=0, minute=0) + timedelta(days=1)
+            continue
+        if moment.hour not in hours:
+            moment = moment.replace(minute=0) + timedelta(hours=1)
+            continue
+        if moment.minute not in minutes:
+            moment += timedelta(minutes=1)
+            continue
+        return moment
+    raise ValueError(f"Cron expression never matches: {expression!r}")
+
+def next_job_run(job, last_started, now):
+    """When a job is next due after starting at `last_started` (None if it never ran), plus up to
+    its jitter so nodes restarted together do not all hit the database at once. A run missed
+    while there was no leader is due now"""
+    if job.cron:
+        due = next_cron_time(job.cron, last_started or now)
+    else:
+        due = last_started + timedelta(seconds=job.interval) if last_started else now
+    return max(due, now) + timedelta(seconds=random.uniform(0, job.jitter))
+
+def purge_expired_tokens():
+    """Delete expired demo sessions and password reset tokens; returns the rows deleted per table"""
+    db = get_db_connection()
+    try:
+        cursor = db.cursor()
+        deleted = {}
+        for table_name, key, column in [('demo_sessions', 'id', 'expiry_time'),
+                                        ('password_reset_tokens', 'token_hash', 'expires_at')]:
+            deleted[table_name] = 0
+            while True:
+                # Probes the primary key per batch; an IN (...) join hashes it against the whole table
+                cursor.execute(f'''
+                    DELETE FROM {table_name} WHERE {key} = ANY(ARRAY(
+                        SELECT {key} FROM {table_name} WHERE {column} < NOW() LIMIT %s
+                    ))
+                ''', (JOB_BATCH_SIZE,))
+                db.commit()
+                deleted[table_name] += cursor.rowcount
+                if cursor.rowcount < JOB_BATCH_SIZE:
+                    break
+        return deleted
+    finally:
+        db.close()
+
+def purge_job_runs():
+    """Delete job history older than SCHEDULER_HISTORY_DAYS"""
+    db = get_db_connection()
+    try:
+        cursor = db.cursor()
+        cursor.execute("DELETE FROM job_runs WHERE started_at < NOW() - %s * INTERVAL '1 day'",
+                       (SCHEDULER_HISTORY_DAYS,))
+        db.commit()
+        return {'job_runs': cursor.rowcount}
+    finally:
+        db.close()
+
+def purge_deleted_rows():
+    """Delete tombstones older than DELETED_ROWS_RETENTION_DAYS, moving the ?since= horizon past them"""
+    db = get_db_connection()
+    try:
+        cursor = db.cursor()
+        deleted = 0
+        while True:
+            # The horizon moves in the same transaction as the batch it covers
+            cursor.execute('''
+                WITH purged AS (
+                    DELETE FROM deleted_rows WHERE id IN (
+                        SELECT id FROM deleted_rows WHERE deleted_at < NOW() - %s * INTERVAL '1 day'
+                        ORDER BY id  -- oldest first, off the primary key
+                        LIMIT %s
+                    )
+                    RETURNING change_xid
+                ), horizon AS (
+                    INSERT INTO deleted_rows_horizon (id, change_xid)
+                    SELECT 1, MAX(change_xid) FROM purged HAVING COUNT(*) > 0
+                    ON CONFLICT (id) DO UPDATE
+                        SET change_xid = GREATEST(deleted_rows_horizon.change_xid, EXCLUDED.change_xid)
+                )
+                SELECT COUNT(*) FROM purged
+            ''', (DELETED_ROWS_RETENTION_DAYS, JOB_BATCH_SIZE))
+            purged = cursor.fetchone()[0]
+            db.commit()
+            deleted += purged
+            if purged < JOB_BATCH_SIZE:
+                return {'deleted_rows': deleted}
+    finally:
+        db.close()
+
+SCHEDULED_JOBS = [
+    ScheduledJob('purge_expired_tokens', purge_expired_tokens, interval=900, cron=None, timeout=300, jitter=60),
+    ScheduledJob('account_deletions', process_account_deletions, interval=60, cron=None, timeout=3600, jitter=5),
+    ScheduledJob('welcome_emails', send_welcome_emails, interval=30, cron=None, timeout=3600, jitter=5),
+    ScheduledJob('user_imports', process_user_imports, interval=30, cron=None, timeout=3600, jitter=5),
+    ScheduledJob('purchase_partitions', maintain_purchase_partitions, interval=None, cron='17 3 * * *',
+                 timeout=1800, jitter=300),
+    ScheduledJob('purge_deleted_rows', purge_deleted_rows, interval=None, cron='27 4 * * *', timeout=1800, jitter=300),
+    ScheduledJob('purge_job_runs', purge_job_runs, interval=None, cron='42 4 * * *', timeout=300, jitter=300),
+]
+
+class JobScheduler:
+    """Runs the scheduled jobs from whichever process holds the scheduler lock
+
+    Every web worker on every node tries for the lock on a connection of its own, so exactly
+    one leads while that connection lives. A leader that dies or loses its connection frees
+    the lock, and another worker takes over within SCHEDULER_ELECTION_INTERVAL, resuming the
+    schedule from job_runs.
+    """
+
+    def __init__(self, jobs):
+        for job in jobs:
+            if job.cron:
+                parse_cron(job.cron)  # a typo fails at startup, not at the first run
+        self.jobs = {job.name: job for job in jobs}
+        self.leader = False
+        self._due = {}        # job name -> next run (UTC)
+        self._processes = {}  # job name -> its process, None while it starts
+        self._thread = None
+        self._lock = threading.Lock()
+        atexit.register(self.stop_jobs)
+
+    def ensure_started(self):
+        if self._thread is None or not self._thread.is_alive():
+            with self._lock:
+                if self._thread is None or not self._thread.is_alive():
+                    self._thread = threading.Thread(target=self._run, name='job-scheduler', daemon=True)
+                    self._thread.start()
+
+    def _run(self):
+        while True:
+            try:
+                # Held for as long as this process leads; the lock goes with the connection
+                db = connect_primary()
+                db.autocommit = True
+                cursor = db.cursor()
+                while True:
+                    if self.leader:
+                        cursor.execute('SELECT 1')
+                    else:
+                        cursor.execute('SELECT pg_try_advisory_lock(%s)', (SCHEDULER_LOCK_KEY,))
+                        if cursor.fetchone()[0]:
+                            self._lead(cursor)
+                    if self.leader:
+                        self._start_due_jobs()
+                    time.sleep(SCHEDULER_TICK if self.leader else SCHEDULER_ELECTION_INTERVAL)
+            except Exception as e:
+                logger.error(f"Job scheduler error: {e}")
+                # The lock went with the connection; another worker may already lead
+                if self.leader:
+                    self.leader = False
+                    self.stop_jobs()
+                if 'db' in locals() and not db.closed:
+                    db.close()
+                time.sleep(5)
+
+    def _lead(self, cursor):
+        """Take over: close out runs a previous leader left open and resume from the history"""
+        cursor.execute("UPDATE job_runs SET status = 'abandoned', finished_at = NOW() WHERE status = 'running'")
+        cursor.execute('SELECT job, MAX(started_at) FROM job_runs GROUP BY job')
+        last_started = dict(cursor.fetchall())
+        now = datetime.now(timezone.utc)
+        self._due = {name: next_job_run(job, last_started.get(name), now) for name, job in self.jobs.items()}
+        self.leader = True
+        logger.info(f"Job scheduler leader: {socket.gethostname()}:{os.getpid()}")
+
+    def _start_due_jobs(self):
+        now = datetime.now(timezone.utc)
+        for name, job in self.jobs.items():
+            # A job still running from its last start is not started again
+            if name in self._processes or self._due[name] > now:
+                continue
+            self._due[name] = next_job_run(job, now, now)
+            self._processes[name] = None
+            threading.Thread(target=self._execute, args=(job,), name=f'job-{name}', daemon=True).start()
+
+    def _record(self, query, params):
+        db = get_db_connection()
+        try:
+            cursor = db.cursor()
+            cursor.execute(query, params)
+            db.commit()
+            return cursor.fetchone()[0] if cursor.description else None
+        finally:
+            db.close()
+
+    def _execute(self, job):
+        """Run one job in its own process, kill it past its timeout and record the outcome"""
+        run_id = None
+        status, result, error = 'failed', None, None
+        try:
+            run_id = self._record('INSERT INTO job_runs (job, node) VALUES (%s, %s) RETURNING id',
+                                  (job.name, f"{socket.gethostname()}:{os.getpid()}"))
+            # backend.jobs skips init_db and lowers its priority before importing the app
+            process = subprocess.Popen([sys.executable, '-m', 'backend.jobs', 'run', job.name], cwd=app.root_path,
+                                       env={**os.environ, 'INIT_DB': '0', 'SCHEDULER_NICENESS': str(SCHEDULER_NICENESS)},
+                                       stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+            self._processes[job.name] = process
+            try:
+                stdout, stderr = process.communicate(timeout=job.timeout)
+            except subprocess.TimeoutExpired:
+                process.kill()
+                process.communicate()
+                status, error = 'timed_out', f"Killed after {job.timeout}s"
+            else:
+                if process.returncode == 0:
+                    status = 'succeeded'
+                    # The job's result is the last line it prints, as JSON
+                    lines = stdout.decode('utf-8', 'replace').strip().splitlines()
+                    result = lines[-1] if lines else None
+                else:
+                    error = stderr.decode('utf-8', 'replace')[-SCHEDULER_ERROR_CHARS:]
+        except Exception as e:
+            error = str(e)
+        finally:
+            self._processes.pop(job.name, None)
+
+        if status != 'succeeded':
+            logger.error(f"Job {job.name} {status}: {error}")
+        if run_id is not None:
+            try:
+                self._record('''
+                    UPDATE job_runs SET status = %s, finished_at = NOW(), result = %s::jsonb, error = %s
+                    WHERE id = %s
+                ''', (status, result, error, run_id))
+            except Exception as e:
+                logger.error(f"Job {job.name} history error: {e}")
+
+    def stop_jobs(self):
+        for process in list(self._processes.values()):
+            if process is not None and process.poll() is None:
+                process.kill()
+
+    def status(self):
+        return {
+            'leader': self.leader,
+            'running': sorted(self._processes),
+            'next_runs': {name: due.isoformat() for name, due in self._due.items()} if self.leader else {}
+        }
+
+job_scheduler = JobScheduler(SCHEDULED_JOBS)
+
+@app.before_request
+def start_job_scheduler():
+    if SCHEDULER:
+        job_scheduler.ensure_started()
+
+def get_job_history(cursor, limit):
+    """Each job's schedule and its latest `limit` runs"""
+    cursor.execute('''
+        SELECT r.* FROM unnest(%s::text[]) AS j(job)
+        CROSS JOIN LATERAL (
+            SELECT id, job, node, status, started_at, finished_at, result, error
+            FROM job_runs WHERE job_runs.job = j.job
+            ORDER BY started_at DESC LIMIT %s
+        ) r
+    ''', (list(job_scheduler.jobs), limit))
+    runs = {}
+    for run in cursor.fetchall():
+        runs.setdefault(run['job'], []).append(run)
+    return [{
+        'name': job.name,
+        'interval': job.interval,
+        'cron': job.cron,
+        'timeout': job.timeout,
+        'jitter': job.jitter,
+        'runs': runs.get(job.name, [])
+    } for job in job_scheduler.jobs.values()]
+
+@app.route('/api/jobs', methods=['GET'])
+@admin_required
+@read_only
+def get_jobs():
+    """Scheduled jobs with their recent runs; `scheduler` is this worker's view"""
+    try:
+        limit = int(request.args.get('limit', 10))
+        if limit < 1:
+            raise ValueError('limit must be positive')
+        db = get_db_connection()
+        cursor = db.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
+        return jsonify({
+            'enabled': SCHEDULER,
+            'scheduler': job_scheduler.status(),
+            'jobs': get_job_history(cursor, limit)
+        }), 200
+
+    except ValueError as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 400
+
+    except Exception as e:
+        logger.error(f"Jobs status error: {e}")
+        return jsonify({'status': 'error', 'message': 'An unexpected error occurred'}), 500
+
+    finally:
+        if 'db' in locals():
+            db.close()
+
+
 # Update the init_db function to create new tables
 def init_db():
     try:
@@ -1720,15 +5795,16 @@ def init_db():
         new_tables = {
             'purchases': '''
                 CREATE TABLE IF NOT EXISTS purchases (
-                    id SERIAL PRIMARY KEY,
+                    id SERIAL,
                     user_id INT NOT NULL,
                     plan_id INT NOT NULL,
                     amount DECIMAL(10,2) NOT NULL,
                     status TEXT CHECK (status IN ('pending', 'completed', 'failed', 'refunded')) DEFAULT 'pending',
-                    purchase_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    purchase_date TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+                    PRIMARY KEY (id, purchase_date),
                     FOREIGN KEY (user_id) REFERENCES users(id),
                     FOREIGN KEY (plan_id) REFERENCES plans(id)
-                )
+                ) PARTITION BY RANGE (purchase_date)
             ''',
             'demo_sessions': '''
                 CREATE TABLE IF NOT EXISTS demo_sessions (
@@ -1747,8 +5823,124 @@ def init_db():
                     smtp_port INT DEFAULT 587,
                     smtp_username VARCHAR(255),
                     smtp_password VARCHAR(255),
+                    version INT NOT NULL DEFAULT 1,
                     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP 
                 )
+            ''',
+            'password_reset_tokens': '''
+                CREATE TABLE IF NOT EXISTS password_reset_tokens (
+                    token_hash TEXT PRIMARY KEY,
+                    user_id INT NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+                    expires_at TIMESTAMP NOT NULL,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            ''',
+            'features': '''
+                CREATE TABLE IF NOT EXISTS features (
+                    id SERIAL PRIMARY KEY,
+                    title VARCHAR(150) NOT NULL,
+                    description TEXT NOT NULL
+                )
+            ''',
+            'downloads': '''
+                CREATE TABLE IF NOT EXISTS downloads (
+                    id SERIAL PRIMARY KEY,
+                    plan_id INT REFERENCES plans(id) ON DELETE CASCADE,
+                    os_name VARCHAR(50),
+                    download_link VARCHAR(255)
+                )
+            ''',
+            'guides': '''
+                CREATE TABLE IF NOT EXISTS guides (
+                    id SERIAL PRIMARY KEY,
+                    type VARCHAR(50),
+                    title VARCHAR(150) NOT NULL,
+                    link VARCHAR(255) NOT NULL
+                )
+            ''',
+            'subscriptions': '''
+                CREATE TABLE IF NOT EXISTS subscriptions (
+                    user_id INT PRIMARY KEY REFERENCES users(id) ON DELETE CASCADE,
+                    plan_id INT NOT NULL REFERENCES plans(id),
+                    purchase_id INT,
+                    status TEXT NOT NULL CHECK (status IN ('pending', 'active', 'inactive')),
+                    started_at TIMESTAMP,
+                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            ''',
+            'account_deletions': '''
+                CREATE TABLE IF NOT EXISTS account_deletions (
+                    user_id INT PRIMARY KEY,
+                    requested_by INT,
+                    status TEXT NOT NULL DEFAULT 'pending'
+                        CHECK (status IN ('pending', 'running', 'completed', 'failed')),
+                    reviews_deleted INT NOT NULL DEFAULT 0,
+                    demo_sessions_deleted INT NOT NULL DEFAULT 0,
+                    purchases_anonymized INT NOT NULL DEFAULT 0,
+                    requested_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    started_at TIMESTAMP,
+                    finished_at TIMESTAMP,
+                    error TEXT
+                )
+            ''',
+            'welcome_emails': '''
+                CREATE TABLE IF NOT EXISTS welcome_emails (
+                    user_id INT PRIMARY KEY REFERENCES users(id) ON DELETE CASCADE,
+                    invite BOOLEAN NOT NULL DEFAULT FALSE,
+                    site_url TEXT NOT NULL,
+                    queued_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+                    attempts INT NOT NULL DEFAULT 0,
+                    last_error TEXT
+                )
+            ''',
+            'user_imports': '''
+                CREATE TABLE IF NOT EXISTS user_imports (
+                    id SERIAL PRIMARY KEY,
+                    requested_by INT,
+                    site_url TEXT NOT NULL,
+                    status TEXT NOT NULL DEFAULT 'pending'
+                        CHECK (status IN ('pending', 'running', 'completed', 'failed')),
+                    rows INT NOT NULL DEFAULT 0,
+                    invalid INT NOT NULL DEFAULT 0,
+                    staged INT NOT NULL DEFAULT 0,
+                    processed INT NOT NULL DEFAULT 0,
+                    created INT NOT NULL DEFAULT 0,
+                    invited INT NOT NULL DEFAULT 0,
+                    conflicts INT NOT NULL DEFAULT 0,
+                    rejected JSONB NOT NULL DEFAULT '[]',
+                    requested_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+                    started_at TIMESTAMPTZ,
+                    finished_at TIMESTAMPTZ,
+                    error TEXT
+                )
+            ''',
+            # Supplied passwords wait here in plain text only until their chunk is hashed; a failed
+            # import's rows are deleted with it
+            'user_import_rows': '''
+                CREATE TABLE IF NOT EXISTS user_import_rows (
+                    import_id INT NOT NULL REFERENCES user_imports(id) ON DELETE CASCADE,
+                    line INT NOT NULL,
+                    email TEXT NOT NULL,
+                    first_name TEXT,
+                    last_name TEXT,
+                    name TEXT,
+                    role TEXT NOT NULL,
+                    password TEXT,
+                    PRIMARY KEY (import_id, line)
+                )
+            ''',
+            'job_runs': '''
+                CREATE TABLE IF NOT EXISTS job_runs (
+                    id BIGSERIAL PRIMARY KEY,
+                    job TEXT NOT NULL,
+                    node TEXT NOT NULL,
+                    status TEXT NOT NULL DEFAULT 'running'
+                        CHECK (status IN ('running', 'succeeded', 'failed', 'timed_out', 'abandoned')),
+                    started_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+                    finished_at TIMESTAMPTZ,
+                    result JSONB,
+                    error TEXT
+                )
             '''
         }
         
@@ -1760,12 +5952,50 @@ def init_db():
             except Exception as e:
                 logger.error(f"Error creating {table_name} table: {e}")
         
+        # email_config tables created before settings were versioned. Checked first, as the ALTER
+        # takes an exclusive lock on email_config even when the column is already there
+        if not column_exists(cursor, 'email_config', 'version'):
+            cursor.execute('ALTER TABLE email_config ADD COLUMN version INT NOT NULL DEFAULT 1')
+            db.commit()
+        
+        # Set when an account asks to be deleted, until the account_deletions job removes it
+        if not column_exists(cursor, 'users', 'deletion_requested_at'):
+            cursor.execute('ALTER TABLE users ADD COLUMN deletion_requested_at TIMESTAMP')
+        # Purchases outlive deleted accounts without their user. Checked first, as the ALTER
+        # would lock every purchases partition even when there is nothing to change
+        cursor.execute('''
+            SELECT is_nullable FROM information_schema.columns
+            WHERE table_schema = 'public' AND table_name = 'purchases' AND column_name = 'user_id'
+        ''')
+        if cursor.fetchone() == ('NO',):
+            cursor.execute('ALTER TABLE purchases ALTER COLUMN user_id DROP NOT NULL')
+        db.commit()
+        
         cursor.close()
         db.close()
         
         # Update schema if needed - call this AFTER closing the first connection
         update_database_schema()
-        
+
+        # Monthly purchases partitions must exist before the first purchase or index
+        create_purchase_partitioning()
+        maintain_purchase_partitions()
+
+        # Change tracking columns must exist before their indexes are built
+        create_change_tracking()
+
+        # Keeps every node's shared user state index current
+        create_user_state_triggers()
+
+        # Backfill subscriptions and publish entitlement changes to the workers
+        create_subscription_tracking()
+
+        # Invalidates the workers' landing page snapshots section by section
+        create_landing_tracking()
+
+        # Build secondary indexes once the tables and columns are in place
+        create_indexes()
+
         logger.info("Database initialization completed successfully")
         
     except Exception as e:
@@ -1774,8 +6004,10 @@ def init_db():
             db.close()
 
 
-# Initialize DB on startup (for Render/Gunicorn too)
-init_db()
+# Initialize DB on startup (for Render/Gunicorn too). Job processes import the app
+# with INIT_DB=0: the schema is set up by the web workers, and its ALTERs lock hot tables
+if os.getenv('INIT_DB', '1') != '0':
+    init_db()
 
 
 if __name__ == '__main__':
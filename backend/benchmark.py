@@ -0,0 +1,263 @@
+"""HTTP load generator for the landing page and login paths
+
+Runs --concurrency simulated visitors for --duration seconds against a running server
+and prints throughput and latency percentiles as JSON. Each visitor keeps one
+keep-alive connection, like a browser.
+
+Scenarios:
+    landing   page views of the landing page: GET /, then /api/landing unless the page came
+              with its data embedded; each result is one view, until the page has its data
+    login     POST /api/login as users loaded by backend.generate_data
+    mixed     landing visitors, plus --login-share of them logging in at the same time;
+              the logins are reported separately
+    export    landing visitors, plus --export-share of them signed in as an admin and
+              fetching --export-path over and over; the exports are reported separately
+    dashboard admins loading the admin dashboard over and over; each result is one load,
+              until every panel has its data. --dashboard-mode bootstrap makes the one
+              /api/admin/bootstrap request, panels the old page's /api/profile followed by
+              its five panel requests over six connections, as a browser does
+
+Usage:
+    python -m backend.benchmark --url http://127.0.0.1:10000 --scenario landing --concurrency 100
+    python -m backend.benchmark --scenario login --login-seed 42 --login-users 1000
+    python -m backend.benchmark --scenario export --admin-password ... --export-path /api/users
+    python -m backend.benchmark --scenario dashboard --dashboard-mode panels --concurrency 5
+"""
+from gevent import monkey
+monkey.patch_all()
+
+import argparse
+import http.client
+import itertools
+import json
+import random
+import statistics
+import sys
+import time
+from urllib.parse import urlsplit
+
+import gevent
+from dotenv import load_dotenv
+
+from backend.explain_check import get_connection
+
+
+GENERATED_PASSWORD = 'password123'  # backend.generate_data's password for every user it loads
+
+LANDING_PAGE = '/'
+LANDING_DATA = '/api/landing'
+LANDING_EMBEDDED = b'id="landing-data"'  # the server-rendered page carries the landing bundle
+# What the admin dashboard requested on load before /api/admin/bootstrap, after /api/profile
+DASHBOARD_PANELS = ['/api/analytics', '/api/users', '/api/plans', '/api/reviews', '/api/contacts']
+BROWSER_CONNECTIONS = 6
+
+
+class Visitor:
+    """One client with its own keep-alive connection and cookie"""
+
+    def __init__(self, url, timeout):
+        parts = urlsplit(url)
+        self.host, self.port = parts.hostname, parts.port or 80
+        self.timeout = timeout
+        self.connection = None
+        self.cookie = None
+        self.retry_after = 0
+        self.body = b''
+
+    def request(self, method, path, body=None):
+        """Send one request; return its status, or None when the connection failed"""
+        headers = {'Content-Type': 'application/json'} if body is not None else {}
+        if self.cookie:
+            headers['Cookie'] = self.cookie
+        for attempt in range(2):
+            if self.connection is None:
+                self.connection = http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+            try:
+                self.connection.request(method, path, body=json.dumps(body) if body is not None else None,
+                                        headers=headers)
+                response = self.connection.getresponse()
+                self.body = response.read()
+                cookie = response.getheader('Set-Cookie')
+                if cookie:
+                    self.cookie = cookie.split(';', 1)[0]
+                self.retry_after = int(response.getheader('Retry-After', '0') or 0)
+                if response.getheader('Connection', '').lower() == 'close':
+                    self.close()
+                return response.status
+            except (OSError, http.client.HTTPException):
+                # A keep-alive connection the server already closed - retry once on a new one
+                self.close()
+        return None
+
+    def close(self):
+        if self.connection is not None:
+            self.connection.close()
+            self.connection = None
+
+
+def login_emails(dsn, seed, users):
+    """Emails of users loaded by backend.generate_data with this seed"""
+    db = get_connection(dsn)
+    try:
+        cursor = db.cursor()
+        cursor.execute('SELECT email FROM users WHERE email LIKE %s AND NOT is_suspended ORDER BY id LIMIT %s',
+                       (f'%@seed{seed}.example.com', users))
+        return [row[0] for row in cursor.fetchall()]
+    finally:
+        db.close()
+
+
+def run_landing(visitor, stop_at, results, view_requests):
+    while time.monotonic() < stop_at:
+        started = time.monotonic()
+        status = visitor.request('GET', LANDING_PAGE)
+        requests = 1
+        if status == 200 and LANDING_EMBEDDED not in visitor.body:
+            status = visitor.request('GET', LANDING_DATA)
+            requests += 1
+        results.append((time.monotonic() - started, status))
+        view_requests.append(requests)
+
+
+def run_login(visitor, stop_at, results, emails):
+    while time.monotonic() < stop_at:
+        started = time.monotonic()
+        status = visitor.request('POST', '/api/login', {'email': next(emails), 'password': GENERATED_PASSWORD})
+        results.append((time.monotonic() - started, status))
+        visitor.cookie = None
+
+
+def run_export(visitor, stop_at, results, path, admin_email, admin_password):
+    if visitor.request('POST', '/api/login', {'email': admin_email, 'password': admin_password}) != 200:
+        return
+    while time.monotonic() < stop_at:
+        started = time.monotonic()
+        status = visitor.request('GET', path)
+        results.append((time.monotonic() - started, status))
+        if status == 503:
+            gevent.sleep(visitor.retry_after)
+
+
+def run_dashboard(visitor, stop_at, results, mode, admin_email, admin_password):
+    if visitor.request('POST', '/api/login', {'email': admin_email, 'password': admin_password}) != 200:
+        return
+    connections = [Visitor(f'http://{visitor.host}:{visitor.port}', visitor.timeout)
+                   for _ in range(BROWSER_CONNECTIONS - 1)]
+    for connection in connections:
+        connection.cookie = visitor.cookie
+    try:
+        while time.monotonic() < stop_at:
+            started = time.monotonic()
+            if mode == 'bootstrap':
+                status = visitor.request('GET', '/api/admin/bootstrap')
+            else:
+                status = visitor.request('GET', '/api/profile')
+                if status == 200:
+                    panels = [gevent.spawn(connection.request, 'GET', path)
+                              for connection, path in zip(connections, DASHBOARD_PANELS)]
+                    gevent.joinall(panels)
+                    statuses = [panel.value for panel in panels]
+                    # The load failed if any panel did
+                    status = None if None in statuses else max(statuses)
+            results.append((time.monotonic() - started, status))
+            if status == 503:
+                gevent.sleep(visitor.retry_after)
+    finally:
+        for connection in connections:
+            connection.close()
+
+
+def summarize(results, elapsed):
+    latencies = sorted(latency for latency, status in results)
+    ok = sum(1 for latency, status in results if status is not None and status < 400)
+    rejected = sum(1 for latency, status in results if status == 503)
+
+    def percentile(p):
+        return round(latencies[min(int(len(latencies) * p), len(latencies) - 1)] * 1000, 1) if latencies else None
+
+    return {
+        'requests': len(results),
+        'ok': ok,
+        'errors': len(results) - ok,
+        'rejected': rejected,
+        'requests_per_second': round(len(results) / elapsed, 1),
+        'p50_ms': percentile(0.5),
+        'p95_ms': percentile(0.95),
+        'p99_ms': percentile(0.99),
+        'mean_ms': round(statistics.mean(latencies) * 1000, 1) if latencies else None,
+    }
+
+
+def main(argv=None):
+    load_dotenv()
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--url', default='http://127.0.0.1:10000', help='server to load')
+    parser.add_argument('--scenario', choices=['landing', 'login', 'mixed', 'export', 'dashboard'], default='landing')
+    parser.add_argument('--concurrency', type=int, default=50, help='simultaneous visitors')
+    parser.add_argument('--duration', type=float, default=20, help='seconds to run')
+    parser.add_argument('--timeout', type=float, default=30, help='seconds before a request counts as failed')
+    parser.add_argument('--dsn', help='database to read login emails from (defaults to the DB_* environment variables)')
+    parser.add_argument('--login-seed', type=int, default=1, help='--seed the users were generated with')
+    parser.add_argument('--login-users', type=int, default=1000, help='generated users to log in as')
+    parser.add_argument('--login-share', type=float, default=0.1, help='share of mixed visitors logging in')
+    parser.add_argument('--export-share', type=float, default=0.2, help='share of export visitors fetching exports')
+    parser.add_argument('--export-path', default='/api/users', help='export route to fetch')
+    parser.add_argument('--dashboard-mode', choices=['bootstrap', 'panels'], default='bootstrap',
+                        help='how the dashboard scenario loads the admin dashboard')
+    parser.add_argument('--admin-email', default='admin@netdash.com', help='admin the export and dashboard visitors sign in as')
+    parser.add_argument('--admin-password', default='admin123')
+    args = parser.parse_args(argv)
+
+    emails = []
+    if args.scenario in ('login', 'mixed'):
+        emails = login_emails(args.dsn, args.login_seed, args.login_users)
+        if not emails:
+            parser.error(f'no users from backend.generate_data --seed {args.login_seed} in the database')
+        random.Random(args.login_seed).shuffle(emails)
+    emails = itertools.cycle(emails)
+
+    results, login_results, export_results, view_requests = [], [], [], []
+    stop_at = time.monotonic() + args.duration
+    visitors = [Visitor(args.url, args.timeout) for _ in range(args.concurrency)]
+    logins = exports = 0
+    if args.scenario == 'login':
+        logins = args.concurrency
+    elif args.scenario == 'mixed':
+        logins = max(1, round(args.concurrency * args.login_share))
+    elif args.scenario == 'export':
+        exports = max(1, round(args.concurrency * args.export_share))
+
+    started = time.monotonic()
+    greenlets = [gevent.spawn(run_login, visitor, stop_at, login_results if args.scenario == 'mixed' else results, emails)
+                 for visitor in visitors[:logins]]
+    greenlets += [gevent.spawn(run_export, visitor, stop_at, export_results, args.export_path,
+                               args.admin_email, args.admin_password)
+                  for visitor in visitors[logins:logins + exports]]
+    if args.scenario == 'dashboard':
+        greenlets += [gevent.spawn(run_dashboard, visitor, stop_at, results, args.dashboard_mode,
+                                   args.admin_email, args.admin_password)
+                      for visitor in visitors]
+    else:
+        greenlets += [gevent.spawn(run_landing, visitor, stop_at, results, view_requests)
+                      for visitor in visitors[logins + exports:]]
+    gevent.joinall(greenlets)
+    elapsed = time.monotonic() - started
+    for visitor in visitors:
+        visitor.close()
+
+    report = {'scenario': args.scenario, 'concurrency': args.concurrency, **summarize(results, elapsed)}
+    if args.scenario == 'dashboard':
+        report['dashboard_mode'] = args.dashboard_mode
+    if view_requests:
+        report['requests_per_view'] = round(statistics.mean(view_requests), 2)
+    if args.scenario == 'mixed':
+        report['logins'] = summarize(login_results, elapsed)
+    elif args.scenario == 'export':
+        report['exports'] = summarize(export_results, elapsed)
+    print(json.dumps(report), flush=True)
+    return 1 if report['ok'] == 0 else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,193 @@
+"""Build the frontend into minified, fingerprinted and precompressed files
+
+Moves the larger inline <style> and <script> blocks of each page into their own files,
+minifies everything, names each asset after a hash of its content and writes gzip and
+brotli variants next to it. Pages refer to the fingerprinted names, so the app can let
+browsers cache assets for a year and only revalidate the pages themselves.
+
+    frontend/dist/<name>.<hash>.<ext>   assets, served at /dist/ with Cache-Control: immutable
+    frontend/dist/pages/<page>.html     rewritten pages, served in place of frontend/<page>.html
+    frontend/dist/manifest.json         source -> built name, read by app.py at startup
+
+Brotli variants need the brotli package; without it only gzip variants are written.
+
+Usage:
+    python -m backend.build_assets
+    python -m backend.build_assets --report      # also print transfer sizes as JSON
+"""
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import re
+import shutil
+import sys
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+FRONTEND_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'frontend')
+DIST_DIR = os.path.join(FRONTEND_DIR, 'dist')
+ASSET_DIRS = ['css', 'js', 'assets']
+INLINE_LIMIT = 1024  # bytes; smaller inline blocks stay inline, a request would cost more
+COMPRESSIBLE = ('.html', '.css', '.js', '.json', '.svg', '.txt')
+
+INLINE_BLOCK = re.compile(r'<(style|script)>(.*?)</\1>', re.DOTALL)
+
+
+def minify_css(css):
+    css = re.sub(r'/\*.*?\*/', '', css, flags=re.DOTALL)
+    css = re.sub(r'\s+', ' ', css)
+    css = re.sub(r'\s*([{};,])\s*', r'\1', css)
+    return css.replace(';}', '}').strip()
+
+
+def minify_lines(text, drop_line_comments=False):
+    """Strip indentation and blank lines; inside JS template literals only the indentation"""
+    lines = []
+    in_template = False
+    for line in text.splitlines():
+        stripped = line.strip()
+        if not stripped:
+            continue
+        if drop_line_comments and not in_template and stripped.startswith('//'):
+            continue
+        lines.append(stripped)
+        if drop_line_comments and len(re.findall(r'(?<!\\)`', stripped)) % 2:
+            in_template = not in_template
+    return '\n'.join(lines)
+
+
+def minify(name, content):
+    if name.endswith('.css'):
+        return minify_css(content)
+    if name.endswith('.js'):
+        return minify_lines(content, drop_line_comments=True)
+    if name.endswith('.html'):
+        return minify_lines(re.sub(r'<!--(?!\[).*?-->', '', content, flags=re.DOTALL))
+    return content
+
+
+def fingerprint(name, data):
+    stem, ext = os.path.splitext(name)
+    return f"{stem}.{hashlib.sha256(data).hexdigest()[:12]}{ext}"
+
+
+def write_variants(path, data):
+    """Write the file and, for text, its gzip and brotli variants; return their sizes"""
+    with open(path, 'wb') as f:
+        f.write(data)
+    sizes = {'identity': len(data)}
+    if path.endswith(COMPRESSIBLE):
+        compressed = gzip.compress(data, compresslevel=9, mtime=0)
+        with open(path + '.gz', 'wb') as f:
+            f.write(compressed)
+        sizes['gzip'] = len(compressed)
+        if brotli is not None:
+            compressed = brotli.compress(data, quality=11)
+            with open(path + '.br', 'wb') as f:
+                f.write(compressed)
+            sizes['br'] = len(compressed)
+    return sizes
+
+
+def build():
+    shutil.rmtree(DIST_DIR, ignore_errors=True)
+    os.makedirs(os.path.join(DIST_DIR, 'pages'))
+    assets = {}  # source -> built name
+    sizes = {}   # built name -> sizes per encoding
+
+    def add_asset(source, name, data):
+        built = fingerprint(name, data)
+        sizes[built] = write_variants(os.path.join(DIST_DIR, built), data)
+        assets[source] = built
+        return built
+
+    for directory in ASSET_DIRS:
+        path = os.path.join(FRONTEND_DIR, directory)
+        if not os.path.isdir(path):
+            continue
+        for name in sorted(os.listdir(path)):
+            if not os.path.isfile(os.path.join(path, name)):
+                continue
+            with open(os.path.join(path, name), 'rb') as f:
+                data = f.read()
+            if name.endswith(('.css', '.js')):
+                data = minify(name, data.decode('utf-8')).encode('utf-8')
+            add_asset(f'{directory}/{name}', name, data)
+
+    pages = {}
+    for page in sorted(os.listdir(FRONTEND_DIR)):
+        if not page.endswith('.html'):
+            continue
+        with open(os.path.join(FRONTEND_DIR, page), encoding='utf-8') as f:
+            html = f.read()
+        stem = page[:-len('.html')]
+        counter = {'style': 0, 'script': 0}
+
+        def extract(match):
+            tag, body = match.group(1), match.group(2)
+            ext = 'css' if tag == 'style' else 'js'
+            body = minify(f'x.{ext}', body)
+            if len(body.encode('utf-8')) < INLINE_LIMIT:
+                return f'<{tag}>{body}</{tag}>'
+            counter[tag] += 1
+            built = add_asset(f'{page}#{tag}-{counter[tag]}', f'{stem}-{tag}-{counter[tag]}.{ext}', body.encode('utf-8'))
+            if tag == 'style':
+                return f'<link rel="stylesheet" href="/dist/{built}">'
+            return f'<script src="/dist/{built}"></script>'
+
+        html = INLINE_BLOCK.sub(extract, html)
+        for source, built in assets.items():
+            if '#' not in source:
+                html = html.replace(f'"/{source}"', f'"/dist/{built}"')
+        html = minify(page, html)
+        pages[page] = write_variants(os.path.join(DIST_DIR, 'pages', page), html.encode('utf-8'))
+
+    with open(os.path.join(DIST_DIR, 'manifest.json'), 'w') as f:
+        json.dump({'assets': assets, 'pages': sorted(pages)}, f, indent=2, sort_keys=True)
+    return assets, sizes, pages
+
+
+def report(assets, sizes, pages):
+    """Bytes a browser downloads for each page: before the build, and with the build on a first
+    and a repeat visit. Repeat visits revalidate the page and reuse every cached asset"""
+    best = 'br' if brotli is not None else 'gzip'
+    result = {}
+    for page, page_sizes in pages.items():
+        with open(os.path.join(FRONTEND_DIR, page), 'rb') as f:
+            original = len(f.read())
+        page_assets = [built for source, built in assets.items() if source.startswith(f'{page}#')]
+        with open(os.path.join(DIST_DIR, 'pages', page), encoding='utf-8') as f:
+            html = f.read()
+        page_assets += [built for source, built in assets.items() if '#' not in source and f'/dist/{built}' in html]
+        first = page_sizes[best] + sum(sizes[built].get(best, sizes[built]['identity']) for built in page_assets)
+        result[page] = {
+            'original_bytes': original,
+            'first_load_bytes': first,
+            'repeat_load_bytes': page_sizes[best],
+            'assets': len(page_assets),
+            'encoding': best,
+        }
+    return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--report', action='store_true', help='print transfer sizes per page as JSON')
+    args = parser.parse_args(argv)
+
+    assets, sizes, pages = build()
+    print(f"Built {len(pages)} pages and {len(assets)} assets into {DIST_DIR}"
+          + ('' if brotli is not None else ' (brotli not installed, gzip only)'))
+    if args.report:
+        print(json.dumps(report(assets, sizes, pages), indent=2))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
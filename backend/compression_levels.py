@@ -0,0 +1,107 @@
+"""Measure the CPU cost and ratio of each response compression level
+
+Fetches real responses from the app in-process (the landing page, the admin dashboard and
+the admin lists, signed in as the first platform admin), then compresses each body at every
+level of each available encoding and prints the time per MB of input and the ratio. Pick the
+defaults for COMPRESSION_<ENCODING>_LEVEL from the knee of the curve.
+
+Usage:
+    python -m backend.compression_levels
+    python -m backend.compression_levels --path /api/users --path /api/purchases?limit=5000 --json
+"""
+import argparse
+import json
+import sys
+import time
+
+import app
+
+
+DEFAULT_PATHS = ['/', '/admin_dashboard.html', '/api/users', '/api/reviews', '/api/contacts',
+                 '/api/purchases?limit=5000']
+LEVELS = {
+    'gzip': [1, 3, 5, 6, 9],
+    'br': [0, 1, 3, 4, 5, 6, 9, 11],
+    'zstd': [1, 3, 6, 9, 12, 19],
+}
+
+
+def fetch_bodies(paths):
+    db = app.get_db_connection()
+    try:
+        cursor = db.cursor()
+        cursor.execute("SELECT id FROM users WHERE role = 'platform_admin' AND NOT is_suspended ORDER BY id LIMIT 1")
+        admin = cursor.fetchone()
+    finally:
+        db.close()
+
+    client = app.app.test_client()
+    if admin is not None:
+        with client.session_transaction() as session:
+            session['user_id'] = admin[0]
+            session['user_role'] = 'platform_admin'
+    bodies = {}
+    for path in paths:
+        # No Accept-Encoding, so the body comes back uncompressed
+        response = client.get(path)
+        if response.status_code == 200:
+            bodies[path] = response.get_data()
+        else:
+            print(f"Skipping {path}: HTTP {response.status_code}", file=sys.stderr)
+    return bodies
+
+
+def measure(encoding, level, body, min_seconds):
+    """Compress `body` repeatedly for at least `min_seconds`; return (ms per MB, compressed size)"""
+    rounds = 0
+    started = time.perf_counter()
+    while True:
+        compressed = app.compress_body(encoding, level, body)
+        rounds += 1
+        elapsed = time.perf_counter() - started
+        if elapsed >= min_seconds:
+            break
+    return elapsed / rounds * 1000 / (len(body) / 1e6), len(compressed)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--path', action='append', help='response to sample (repeatable)')
+    parser.add_argument('--min-seconds', type=float, default=0.2, help='time to spend per body and level')
+    parser.add_argument('--json', action='store_true', help='print the results as JSON')
+    args = parser.parse_args(argv)
+
+    bodies = fetch_bodies(args.path or DEFAULT_PATHS)
+    if not bodies:
+        print("No responses to sample", file=sys.stderr)
+        return 1
+    total = sum(len(body) for body in bodies.values())
+    results = []
+    for encoding in app.COMPRESSION_ENCODINGS:
+        for level in LEVELS[encoding]:
+            spent = compressed = 0
+            for body in bodies.values():
+                ms_per_mb, size = measure(encoding, level, body, args.min_seconds)
+                spent += ms_per_mb * len(body) / 1e6
+                compressed += size
+            results.append({
+                'encoding': encoding, 'level': level,
+                'ms_per_mb': round(spent / (total / 1e6), 2),
+                'ratio': round(total / compressed, 2),
+                'default': app.COMPRESSION_LEVELS[encoding] == level,
+            })
+
+    if args.json:
+        print(json.dumps({'bodies': {path: len(body) for path, body in bodies.items()}, 'results': results}))
+        return 0
+    for path, body in bodies.items():
+        print(f"{path}: {len(body)} bytes")
+    print(f"{'encoding':<8} {'level':>5} {'ms/MB':>9} {'ratio':>6}")
+    for result in results:
+        print(f"{result['encoding']:<8} {result['level']:>5} {result['ms_per_mb']:>9.2f} {result['ratio']:>6.2f}"
+              + ('  (default)' if result['default'] else ''))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
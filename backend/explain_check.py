@@ -0,0 +1,434 @@
+"""EXPLAIN-based plan regression check for the SQL in app.py
+
+Collects every SQL statement passed to cursor.execute() in app.py, plans it
+with EXPLAIN (GENERIC_PLAN) against a database that has been initialized by the
+app, and fails if a hot path falls back to a sequential scan on one of the large
+tables. Statements built at runtime are rebuilt from the app's own constants:
+f-strings with ?fields= columns get every field, loops are planned once per item,
+and a statement whose SQL cannot be worked out fails the check.
+
+Usage:
+    python -m backend.explain_check --seed 200000
+"""
+import argparse
+import ast
+import json
+import os
+import re
+import sys
+
+import psycopg2
+from dotenv import load_dotenv
+
+
+APP_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'app.py')
+
+# Tables that grow with traffic - a Seq Scan on one of these is a regression
+LARGE_TABLES = {'users', 'purchases', 'reviews', 'contacts', 'demo_sessions'}
+
+# Monthly partitions (purchases_2024_01) are reported under their parent table
+PARTITION_NAME = re.compile(r'^(\w+)_\d{4}_\d{2}$')
+
+# Statements that read a whole table by design: (function, statement) -> reason. The statement
+# is the SQL as written in app.py, whitespace collapsed and f-string fields kept as {name}; one
+# ending in ... matches every statement starting with the rest
+ALLOWED_SEQ_SCANS = {
+    ('get_analytics', 'SELECT COUNT(*) as count FROM reviews'): 'dashboard totals count every row',
+    ('get_analytics', 'SELECT COALESCE(SUM(amount), 0) AS revenue FROM purchases WHERE status = ...'):
+        "reads this month's partition only",
+    ('get_admin_bootstrap', '{ADMIN_BOOTSTRAP_SQL}'): 'its analytics totals count every row; the lists are LIMITed',
+    ('get_users', 'SELECT {columns} FROM users'): 'unfiltered admin list',
+    ('get_users', 'SELECT {columns} FROM users WHERE email LIKE %s OR first_name LIKE %s OR last_name LIKE %s'):
+        'substring search',
+    ('get_contacts', 'SELECT {columns} FROM contacts ORDER BY created_at DESC'): 'unfiltered admin list',
+    ('bulk_update_purchase_status', 'WITH current AS ( SELECT p.id, u.email, u.name FROM purchases p '
+                                    'LEFT JOIN users u ON u.id = p.user_id WHERE p.status = %s ...'):
+        'the filter form matches every purchase in a status and age range',
+    ('purge_expired_tokens', 'DELETE FROM {table_name} WHERE {key} = ANY(ARRAY( ...'):
+        'the batch stops at its LIMIT, and a scan is cheapest when most sessions have expired',
+    ('test_database_connection', 'SELECT COUNT(*) as count FROM reviews'): 'debug endpoint',
+    ('fix_reviews_table_manually', 'UPDATE reviews SET is_approved = TRUE'): 'one-off maintenance script',
+    ('fix_reviews_table_manually', 'SELECT COUNT(*) FROM reviews'): 'one-off maintenance script',
+}
+
+# Statements that cannot be planned with EXPLAIN
+SKIPPED_PREFIXES = ('CREATE', 'ALTER', 'DROP', 'LISTEN', 'SET ', 'SELECT PG_', 'SELECT TO_REGCLASS')
+
+# Run rather than planned, so the statements that use the table can be planned after them
+SESSION_PREFIXES = ('CREATE TEMP TABLE',)
+
+# Calls that are safe to evaluate while rebuilding a statement; anything else (a query, the
+# request) leaves the statement unresolved
+PURE_CALLS = {'requested_fields', 'join', 'startswith', 'endswith', 'items', 'keys', 'values',
+              'any', 'all', 'len', 'list', 'sorted', 'str', 'upper', 'lower', 'strip'}
+
+# Values for locals that app.py builds from the request: function -> {name: expression}
+SAMPLE_LOCALS = {
+    'update_profile': {'update_fields': "['first_name = %s', 'last_name = %s', 'name = %s']"},
+    'LandingSnapshot._load': {'sections': 'LANDING_SECTIONS'},
+}
+
+# Functions that run SQL their callers pass in - planned where they are called: function -> parameter
+SQL_PASSTHROUGH = {'JobScheduler._record': 'query'}
+
+# Methods whose first argument is a statement, besides execute()
+SQL_METHODS = {'execute', '_record'}
+
+# Server-side seed data, scaled by --seed (rows in purchases)
+SEED_STATEMENTS = [
+    '''
+    DO $$
+    BEGIN
+        IF to_regproc('create_purchase_partitions') IS NOT NULL THEN
+            PERFORM create_purchase_partitions((CURRENT_DATE - 1500)::date, CURRENT_DATE + 1);
+        END IF;
+    END
+    $$
+    ''',
+    '''
+    INSERT INTO users (email, password_hash, first_name, last_name, name, role, created_at)
+    SELECT 'user' || g || '@example.com', 'x', 'First' || g, 'Last' || g, 'User ' || g,
+           (ARRAY['company_admin', 'guest'])[1 + g %% 2],
+           NOW() - (g %% 1000) * INTERVAL '1 day'
+    FROM generate_series(1, %(users)s) g
+    ON CONFLICT (email) DO NOTHING
+    ''',
+    '''
+    INSERT INTO plans (name, price, features)
+    SELECT 'Plan ' || g, g * 1000, '[]'::json
+    FROM generate_series(1, 3) g
+    WHERE NOT EXISTS (SELECT 1 FROM plans)
+    ''',
+    '''
+    INSERT INTO purchases (user_id, plan_id, amount, status, purchase_date)
+    SELECT u.id, (SELECT MIN(id) FROM plans) + g %% 3, 2500,
+           (ARRAY['completed', 'completed', 'completed', 'failed', 'refunded', 'pending'])[1 + g %% 6],
+           NOW() - (g %% 1500) * INTERVAL '1 day'
+    FROM generate_series(1, %(purchases)s) g
+    JOIN users u ON u.email = 'user' || (1 + g %% %(users)s) || '@example.com'
+    ''',
+    '''
+    INSERT INTO reviews (user_id, name, rating, comment, is_approved, created_at)
+    SELECT NULL, 'Reviewer ' || g, 1 + g %% 5, 'Seed review', g %% 10 = 0,
+           NOW() - (g %% 1000) * INTERVAL '1 day'
+    FROM generate_series(1, %(reviews)s) g
+    ''',
+    '''
+    INSERT INTO contacts (name, email, message, status, created_at)
+    SELECT 'Contact ' || g, 'contact' || g || '@example.com', 'Seed message',
+           (ARRAY['new', 'responded', 'closed', 'closed'])[1 + g %% 4],
+           NOW() - (g %% 1000) * INTERVAL '1 day'
+    FROM generate_series(1, %(contacts)s) g
+    ''',
+    '''
+    INSERT INTO demo_sessions (token, email, expiry_time, features_accessed)
+    SELECT md5(random()::text || g), 'demo' || g || '@example.com',
+           NOW() + (g %% 48 - 47) * INTERVAL '1 hour', '{}'
+    FROM generate_series(1, %(demo_sessions)s) g
+    ''',
+]
+
+
+def get_connection(dsn=None):
+    if dsn:
+        return psycopg2.connect(dsn)
+    return psycopg2.connect(
+        host=os.getenv('DB_HOST', 'localhost'),
+        port=os.getenv('DB_PORT', '5432'),
+        user=os.getenv('DB_USER'),
+        password=os.getenv('DB_PASSWORD'),
+        dbname=os.getenv('DB_NAME')
+    )
+
+
+def load_app_namespace():
+    """Module-level names of app.py, imported without setting up the schema"""
+    os.environ['INIT_DB'] = '0'
+    import app
+
+    def requested_fields(resource):
+        # No ?fields= - every field of the resource
+        with app.app.test_request_context():
+            return app.requested_fields(resource)
+
+    return {**vars(app), 'requested_fields': requested_fields}
+
+
+def sql_template(node):
+    """The statement as written: literal text, with f-string fields as {name}"""
+    if isinstance(node, ast.Constant) and isinstance(node.value, str):
+        return node.value
+    if isinstance(node, ast.JoinedStr):
+        return ''.join(part.value if isinstance(part, ast.Constant) else '{' + ast.unparse(part.value) + '}'
+                       for part in node.values)
+    return '{' + ast.unparse(node) + '}'
+
+
+class StatementCollector:
+    """Walks one function in source order, keeping every way its locals can be bound"""
+
+    def __init__(self, namespace, function):
+        self.namespace = namespace
+        self.function = function
+        self.samples = {name: eval(expression, namespace)
+                        for name, expression in SAMPLE_LOCALS.get(function, {}).items()}
+        self.statements = []
+
+    def evaluate(self, node, env):
+        """The node's value in env, or raise ValueError if it needs more than PURE_CALLS"""
+        for call in ast.walk(node):
+            if isinstance(call, ast.Call):
+                name = call.func.attr if isinstance(call.func, ast.Attribute) else getattr(call.func, 'id', None)
+                if name not in PURE_CALLS:
+                    raise ValueError(f'calls {name}()')
+        try:
+            return eval(compile(ast.Expression(node), '<sql>', 'eval'), {**self.namespace, **env})
+        except Exception as e:
+            raise ValueError(str(e)) from e
+
+    def bind(self, target, value, env):
+        if isinstance(target, ast.Name):
+            if target.id not in self.samples:
+                env[target.id] = value
+        elif isinstance(target, (ast.Subscript, ast.Attribute)):
+            pass  # an item or attribute of something else, not a local
+        elif isinstance(target, (ast.Tuple, ast.List)):
+            values = list(value)
+            if len(values) != len(target.elts):
+                raise ValueError('cannot unpack')
+            for element, item in zip(target.elts, values):
+                self.bind(element, item, env)
+        else:
+            raise ValueError('not a name')
+
+    def visit(self, body, envs):
+        for statement in body:
+            if isinstance(statement, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+                continue  # collected on its own
+            for field, value in ast.iter_fields(statement):
+                if field not in ('body', 'orelse', 'finalbody', 'handlers'):
+                    for node in value if isinstance(value, list) else [value]:
+                        if isinstance(node, ast.AST):
+                            self.collect_calls(node, envs)
+
+            if isinstance(statement, ast.Assign):
+                for env in envs:
+                    try:
+                        value = self.evaluate(statement.value, env)
+                        for target in statement.targets:
+                            self.bind(target, value, env)
+                    except ValueError:
+                        # The name now holds a value that cannot be worked out
+                        for target in statement.targets:
+                            for name in [target] + list(getattr(target, 'elts', [])):
+                                if isinstance(name, ast.Name) and name.id not in self.samples:
+                                    env.pop(name.id, None)
+            elif isinstance(statement, ast.For):
+                loop_envs = []
+                for env in envs:
+                    try:
+                        for item in self.evaluate(statement.iter, env):
+                            loop_env = dict(env)
+                            self.bind(statement.target, item, loop_env)
+                            loop_envs.append(loop_env)
+                    except (ValueError, TypeError):
+                        loop_envs.append(dict(env))
+                self.visit(statement.body, loop_envs)
+                self.visit(statement.orelse, envs)
+            else:
+                for field in ('body', 'orelse', 'finalbody'):
+                    self.visit(getattr(statement, field, []), envs)
+                for handler in getattr(statement, 'handlers', []):
+                    self.visit(handler.body, envs)
+
+    def collect_calls(self, node, envs):
+        for call in ast.walk(node):
+            if not (isinstance(call, ast.Call) and isinstance(call.func, ast.Attribute)
+                    and call.func.attr in SQL_METHODS and call.args):
+                continue
+            argument = call.args[0]
+            # A cursor class passing itself on to the real execute()
+            if isinstance(argument, ast.Name) and argument.id == 'self':
+                continue
+            if isinstance(argument, ast.Name) and SQL_PASSTHROUGH.get(self.function) == argument.id:
+                continue
+            template = ' '.join(sql_template(argument).split())
+            if template.upper().startswith(SKIPPED_PREFIXES) and not template.upper().startswith(SESSION_PREFIXES):
+                self.statements.append((self.function, call.lineno, template, None, None))
+                continue
+            built = {}
+            for env in envs:
+                try:
+                    sql = self.evaluate(argument, env)
+                    if not isinstance(sql, str):
+                        raise ValueError(f'not a string: {sql!r}')
+                    built.setdefault(sql, None)
+                except ValueError as e:
+                    built.setdefault(None, str(e))
+            for sql, error in built.items():
+                self.statements.append((self.function, call.lineno, template, sql, error))
+
+
+def collect_statements(path=APP_PATH, namespace=None):
+    """Return (function, line, template, sql, error) for every statement passed to execute().
+
+    sql is None where the statement could not be rebuilt (error says why) or needs no plan
+    (error is None too).
+    """
+    with open(path) as f:
+        tree = ast.parse(f.read(), filename=path)
+    if namespace is None:
+        namespace = load_app_namespace()
+
+    statements = []
+
+    def walk(body, prefix):
+        for node in body:
+            if isinstance(node, ast.FunctionDef):
+                collector = StatementCollector(namespace, prefix + node.name)
+                collector.visit(node.body, [dict(collector.samples)])
+                statements.extend(collector.statements)
+                walk(node.body, prefix + node.name + '.')
+            elif isinstance(node, ast.ClassDef):
+                walk(node.body, prefix + node.name + '.')
+            else:
+                for field in ('body', 'orelse', 'finalbody'):
+                    walk(getattr(node, field, []), prefix)
+
+    walk(tree.body, '')
+    return statements
+
+
+def to_generic_sql(sql):
+    """Replace psycopg2 placeholders with $n so EXPLAIN (GENERIC_PLAN) can plan them"""
+    # Change tokens are planned with a current one - the usual "little has changed" delta
+    sql = sql.replace('%s::xid8', 'pg_snapshot_xmin(pg_current_snapshot())')
+    counter = iter(range(1, 1000))
+    named = {}
+
+    def parameter(match):
+        if match.group(0) == '%%':
+            return '%'
+        if match.group(1):
+            # %(name)s is one parameter however often it appears
+            return named.setdefault(match.group(1), f'${next(counter)}')
+        return f'${next(counter)}'
+
+    return re.sub(r'%%|%(?:\((\w+)\))?s', parameter, sql)
+
+
+def allowed_seq_scan(function, template):
+    """The reason a sequential scan is expected for this statement, or None"""
+    for (allowed_function, statement), reason in ALLOWED_SEQ_SCANS.items():
+        if allowed_function != function:
+            continue
+        if template == statement or (statement.endswith('...') and template.startswith(statement[:-3])):
+            return reason
+    return None
+
+
+def find_seq_scans(plan, found=None):
+    if found is None:
+        found = []
+    if plan.get('Node Type') == 'Seq Scan':
+        relation = plan.get('Relation Name') or ''
+        match = PARTITION_NAME.match(relation)
+        # Partitions created ahead of their month are empty and cost nothing to scan
+        empty_partition = match and plan.get('Total Cost') == 0
+        relation = match.group(1) if match else relation
+        if relation in LARGE_TABLES and relation not in found and not empty_partition:
+            found.append(relation)
+    for child in plan.get('Plans', []):
+        find_seq_scans(child, found)
+    return found
+
+
+def seed(db, purchases):
+    sizes = {
+        'users': max(purchases // 4, 1),
+        'purchases': purchases,
+        'reviews': max(purchases // 2, 1),
+        'contacts': max(purchases // 2, 1),
+        'demo_sessions': max(purchases // 4, 1),
+    }
+    cursor = db.cursor()
+    for statement in SEED_STATEMENTS:
+        cursor.execute(statement, sizes)
+    db.commit()
+
+    db.autocommit = True
+    cursor.execute('VACUUM ANALYZE')
+    db.autocommit = False
+    cursor.close()
+    print(f"Seeded {sizes}")
+
+
+def check(db, statements):
+    """EXPLAIN each statement; return the number of hot-path sequential scans"""
+    cursor = db.cursor()
+    failures = 0
+
+    for function, line, template, sql, error in statements:
+        if sql is None:
+            if error is not None:
+                print(f"ERROR  {function}:{line} SQL could not be worked out ({error})  [{template[:80]}]")
+                failures += 1
+            continue
+        normalized = ' '.join(sql.split())
+        if normalized.upper().startswith(SESSION_PREFIXES):
+            cursor.execute(sql)
+            continue
+        if normalized.upper().startswith(SKIPPED_PREFIXES) or 'INFORMATION_SCHEMA' in normalized.upper():
+            continue
+
+        try:
+            cursor.execute(f'EXPLAIN (GENERIC_PLAN, FORMAT JSON) {to_generic_sql(sql)}')
+            plan = cursor.fetchone()[0][0]['Plan']
+        except psycopg2.Error as e:
+            db.rollback()
+            print(f"ERROR  {function}:{line} could not be planned: {e.pgerror or e}")
+            failures += 1
+            continue
+
+        seq_scans = find_seq_scans(plan)
+        if not seq_scans:
+            status = 'OK'
+        elif allowed_seq_scan(function, template):
+            status = 'ALLOW'
+        else:
+            status = 'FAIL'
+            failures += 1
+
+        detail = f" seq scan on {', '.join(seq_scans)}" if seq_scans else ''
+        print(f"{status:<6} {function}:{line}{detail}  [{template[:80]}]")
+
+    cursor.close()
+    return failures
+
+
+def main(argv=None):
+    load_dotenv()
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--dsn', help='libpq connection string (defaults to the DB_* environment variables)')
+    parser.add_argument('--seed', type=int, default=0, metavar='ROWS',
+                        help='insert ROWS synthetic purchases (and proportional users, reviews, contacts) first')
+    parser.add_argument('--app', default=APP_PATH, help='path to app.py')
+    args = parser.parse_args(argv)
+
+    db = get_connection(args.dsn)
+    try:
+        if args.seed:
+            seed(db, args.seed)
+
+        statements = collect_statements(args.app)
+        failures = check(db, statements)
+    finally:
+        db.close()
+
+    print(json.dumps({'statements': len(statements), 'failures': failures}))
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
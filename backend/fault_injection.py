@@ -0,0 +1,214 @@
+"""Fault injection checks for the database timeouts and circuit breaker
+
+Puts a local TCP proxy between the app and Postgres, then degrades it step by step and
+checks that requests fail fast instead of hanging:
+
+    latency     --latency-ms added each way; requests still succeed
+    budget      a query longer than the public statement timeout is cancelled in time,
+                while the same query within the export budget completes
+    drop        the proxy resets every connection and refuses new ones; the breaker opens
+                after DB_BREAKER_FAILURES failures and later requests fail at once
+    blackhole   the proxy accepts connections but never answers; connect_timeout bounds
+                each attempt until the breaker opens
+    recovery    the proxy passes traffic again; after DB_BREAKER_RESET seconds one probe
+                closes the breaker
+
+The proxy can also run on its own in front of a server:
+
+    python -m backend.fault_injection
+    python -m backend.fault_injection --proxy-only --listen 6432 --latency-ms 50
+"""
+import argparse
+import json
+import os
+import socket
+import sys
+import threading
+import time
+
+
+class FaultProxy:
+    """TCP proxy that can add latency, reset connections or swallow new ones"""
+
+    def __init__(self, target_host, target_port, listen_port=0):
+        self.target = (target_host, target_port)
+        self.latency = 0.0   # seconds added to every chunk, each way
+        self.mode = 'pass'   # 'pass', 'drop' or 'blackhole'
+        self._server = socket.create_server(('127.0.0.1', listen_port))
+        self.port = self._server.getsockname()[1]
+        self._sockets = set()
+        self._lock = threading.Lock()
+
+    def start(self):
+        threading.Thread(target=self._accept, name='fault-proxy', daemon=True).start()
+        return self
+
+    def set_mode(self, mode):
+        self.mode = mode
+        if mode == 'drop':
+            with self._lock:
+                sockets, self._sockets = self._sockets, set()
+            for sock in sockets:
+                self._close(sock)
+
+    def _accept(self):
+        while True:
+            client, _ = self._server.accept()
+            if self.mode == 'drop':
+                self._close(client)
+                continue
+            with self._lock:
+                self._sockets.add(client)
+            if self.mode == 'blackhole':
+                continue  # accepted by the kernel, never answered
+            try:
+                upstream = socket.create_connection(self.target)
+            except OSError:
+                self._close(client)
+                continue
+            with self._lock:
+                self._sockets.add(upstream)
+            threading.Thread(target=self._pipe, args=(client, upstream), daemon=True).start()
+            threading.Thread(target=self._pipe, args=(upstream, client), daemon=True).start()
+
+    def _pipe(self, source, destination):
+        try:
+            while True:
+                data = source.recv(65536)
+                if not data:
+                    break
+                if self.latency:
+                    time.sleep(self.latency)
+                destination.sendall(data)
+        except OSError:
+            pass
+        self._close(source)
+        self._close(destination)
+
+    def _close(self, sock):
+        try:
+            sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        sock.close()
+
+
+def timed(func):
+    started = time.monotonic()
+    try:
+        result = func()
+    except Exception as e:
+        result = e
+    return result, round((time.monotonic() - started) * 1000, 1)
+
+
+def run_checks(app, proxy, latency_ms):
+    import psycopg2
+    from flask import g
+
+    client = app.app.test_client()
+    breaker = app.db_breaker
+    checks = {}
+
+    def public_reviews():
+        return client.get('/api/reviews/public').status_code
+
+    def query_as(route_class, seconds):
+        with app.app.test_request_context():
+            g.route_class = route_class
+            db = app.get_db_connection()
+            try:
+                db.cursor().execute('SELECT pg_sleep(%s)', (seconds,))
+                return 'completed'
+            except psycopg2.errors.QueryCanceled:
+                return 'cancelled'
+            finally:
+                db.close()
+
+    def attempts_until_open(limit):
+        """Request until the breaker opens; return each attempt's duration"""
+        durations = []
+        while breaker.state != 'open' and len(durations) < limit:
+            durations.append(timed(public_reviews)[1])
+        return durations
+
+    proxy.latency = latency_ms / 2000
+    status, took = timed(public_reviews)
+    checks['latency'] = {'ok': status == 200 and took >= latency_ms, 'status': status, 'ms': took}
+    proxy.latency = 0
+
+    budget = app.STATEMENT_TIMEOUTS['public'] / 1000
+    public, public_ms = timed(lambda: query_as('public', budget + 1))
+    export, export_ms = timed(lambda: query_as('export', budget + 1))
+    checks['budget'] = {
+        'ok': public == 'cancelled' and public_ms < (budget + 0.5) * 1000 and export == 'completed',
+        'public': public, 'public_ms': public_ms, 'export': export, 'export_ms': export_ms
+    }
+
+    proxy.set_mode('drop')
+    durations = attempts_until_open(50)
+    fast = [timed(public_reviews)[1] for _ in range(20)]
+    checks['drop'] = {
+        'ok': breaker.state == 'open' and max(fast) < 50,
+        'attempts_to_open': len(durations), 'slowest_attempt_ms': max(durations, default=0),
+        'open_max_ms': max(fast)
+    }
+
+    # Start the next fault from a closed breaker and an empty pool
+    proxy.set_mode('pass')
+    breaker.record_success()
+    app.db_pool.clear()
+    proxy.set_mode('blackhole')
+    durations = attempts_until_open(50)
+    fast = [timed(public_reviews)[1] for _ in range(20)]
+    checks['blackhole'] = {
+        'ok': breaker.state == 'open' and max(durations) < (app.DB_CONNECT_TIMEOUT + 1) * 1000 and max(fast) < 50,
+        'attempts_to_open': len(durations), 'slowest_attempt_ms': max(durations, default=0),
+        'open_max_ms': max(fast)
+    }
+
+    proxy.set_mode('pass')
+    time.sleep(breaker.reset_timeout)
+    status, took = timed(public_reviews)
+    state = breaker.state
+    checks['recovery'] = {'ok': status == 200 and state == 'closed', 'state': state, 'probe_ms': took}
+    return checks
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--proxy-only', action='store_true', help='just run the proxy until interrupted')
+    parser.add_argument('--listen', type=int, default=0, help='proxy port (default: any free port)')
+    parser.add_argument('--latency-ms', type=float, default=50, help='round-trip latency to add')
+    parser.add_argument('--mode', choices=['pass', 'drop', 'blackhole'], default='pass', help='with --proxy-only')
+    args = parser.parse_args(argv)
+
+    from dotenv import load_dotenv
+    load_dotenv()
+    proxy = FaultProxy(os.getenv('DB_HOST', 'localhost'), int(os.getenv('DB_PORT', '5432')), args.listen).start()
+
+    if args.proxy_only:
+        proxy.latency = args.latency_ms / 2000
+        proxy.set_mode(args.mode)
+        print(f"Proxying 127.0.0.1:{proxy.port} -> {proxy.target[0]}:{proxy.target[1]}", flush=True)
+        try:
+            threading.Event().wait()
+        except KeyboardInterrupt:
+            return 0
+
+    # The app connects through the proxy, with short timeouts so the run stays quick
+    os.environ['DB_HOST'] = '127.0.0.1'
+    os.environ['DB_PORT'] = str(proxy.port)
+    os.environ.setdefault('DB_CONNECT_TIMEOUT', '2')
+    os.environ.setdefault('DB_BREAKER_FAILURES', '3')
+    os.environ.setdefault('DB_BREAKER_RESET', '2')
+    import app
+
+    checks = run_checks(app, proxy, args.latency_ms)
+    ok = all(check['ok'] for check in checks.values())
+    print(json.dumps({'ok': ok, 'breaker': app.db_breaker.status(), **checks}), flush=True)
+    return 0 if ok else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,101 @@
+"""Purchase fulfillment worker
+
+Claims pending purchases in batches with FOR UPDATE SKIP LOCKED, settles them through
+the purchase state machine in app.py and sends the confirmation emails. Any number of
+processes, on any number of machines, can run at once without settling a purchase twice.
+
+Usage:
+    python -m backend.fulfillment --processes 4
+    python -m backend.fulfillment --drain          # settle the current queue and exit
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import time
+
+import psycopg2.extras
+
+# Set before the app is imported: workers leave the schema setup to the web workers' startup
+os.environ['INIT_DB'] = '0'
+
+import app
+
+
+def work(processed, batch_size, idle_sleep, drain):
+    """Claim batches until the queue is empty (drain) or forever, counting settled purchases"""
+    while True:
+        try:
+            count = app.fulfill_pending_purchases(batch_size)
+        except Exception as e:
+            app.logger.error(f"Fulfillment batch error: {e}")
+            time.sleep(idle_sleep)
+            continue
+
+        if count:
+            with processed.get_lock():
+                processed.value += count
+        elif drain:
+            return
+        else:
+            time.sleep(idle_sleep)
+
+
+def queue_depth():
+    db = app.get_db_connection()
+    try:
+        return app.get_fulfillment_queue(db.cursor(cursor_factory=psycopg2.extras.RealDictCursor))
+    finally:
+        db.close()
+
+
+def report(processed, started, last):
+    """Print throughput since the last report and overall, with the current queue depth"""
+    now = time.monotonic()
+    total = processed.value
+    print(json.dumps({
+        'processed': total,
+        'per_second': round((total - last[1]) / max(now - last[0], 1e-9), 1),
+        'per_second_overall': round(total / max(now - started, 1e-9), 1),
+        **queue_depth()
+    }), flush=True)
+    return now, total
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--processes', type=int, default=1, help='worker processes to run (default 1)')
+    parser.add_argument('--batch-size', type=int, default=app.FULFILLMENT_BATCH_SIZE,
+                        help='purchases claimed per transaction')
+    parser.add_argument('--idle-sleep', type=float, default=1.0, help='seconds to wait when the queue is empty')
+    parser.add_argument('--report-interval', type=float, default=10.0, help='seconds between throughput reports')
+    parser.add_argument('--drain', action='store_true', help='exit once the queue is empty')
+    args = parser.parse_args(argv)
+
+    processed = multiprocessing.Value('q', 0)
+    workers = [
+        multiprocessing.Process(target=work, args=(processed, args.batch_size, args.idle_sleep, args.drain),
+                                name=f'fulfillment-{n}', daemon=True)
+        for n in range(args.processes)
+    ]
+    started = time.monotonic()
+    for worker in workers:
+        worker.start()
+
+    last = (started, 0)
+    try:
+        while any(worker.is_alive() for worker in workers):
+            for worker in workers:
+                worker.join(timeout=args.report_interval / len(workers))
+            if time.monotonic() - last[0] >= args.report_interval:
+                last = report(processed, started, last)
+    except KeyboardInterrupt:
+        pass
+
+    report(processed, started, last)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,396 @@
+"""Synthetic data generator for production-scale local testing
+
+Fills users, purchases, reviews, contacts and demo_sessions with COPY, in fixed-size
+chunks spread over worker processes. Every chunk draws from its own random generator
+seeded from --seed, so the same seed and --until produce the same rows whatever
+--processes is.
+
+Distributions: signups grow over time, a small share of long-standing users make most
+purchases, the cheapest plan sells best, recent purchases are still pending, ratings
+lean positive and recent contacts are still open.
+
+Every generated user can log in with the password in GENERATED_PASSWORD.
+
+Usage:
+    python -m backend.generate_data --users 1000000 --purchases 8000000 --reviews 500000 --processes 4
+    python -m backend.generate_data --users 1000 --purchases 10000 --seed 7
+"""
+import argparse
+import io
+import json
+import multiprocessing
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+from werkzeug.security import generate_password_hash
+
+import app
+
+
+CHUNK_SIZE = 50000  # rows per COPY - fixed, so the output does not depend on --processes
+SUBSCRIPTION_SYNC_SIZE = 1000  # users per sync_subscriptions() call
+GENERATED_PASSWORD = 'password123'
+
+# Used when the plans table is empty - the tiers from product_website_postgres.sql
+DEFAULT_PLANS = [
+    ('Basic Tier', 2500.00, ["Up to 100 devices", "30-Day data retention", "3 admin accounts", "Standard ML models", "Email and chat support"]),
+    ('Professional Tier', 5000.00, ["Up to 500 devices", "90-day data retention", "10 admin accounts", "Advanced ML models", "Priority support"]),
+    ('Enterprise Tier', 9000.00, ["Unlimited devices", "Custom data retention policies", "Unlimited admin accounts", "Custom ML models", "24/7 dedicated support"]),
+]
+
+# Cheapest plan first
+PLAN_WEIGHTS = [60, 30, 10]
+# Purchase i goes to user int(users * random() ** HOT_USER_SKEW) - with 3, the oldest 1%
+# of users make about a fifth of all purchases
+HOT_USER_SKEW = 3
+PENDING_WINDOW = timedelta(days=7)
+RECENT_PURCHASE_STATUSES = (['completed', 'pending', 'failed'], [60, 30, 10])
+PURCHASE_STATUSES = (['completed', 'failed', 'refunded'], [85, 10, 5])
+USER_ROLES = (['company_admin', 'guest'], [70, 30])
+SUSPENDED_SHARE = 0.01
+RATINGS = ([5, 4, 3, 2, 1], [45, 30, 12, 6, 7])
+APPROVED_SHARE = 0.7
+LINKED_REVIEW_SHARE = 0.6
+CONTACT_OPEN_WINDOW = timedelta(days=14)
+RECENT_CONTACT_STATUSES = (['new', 'responded', 'closed'], [60, 30, 10])
+CONTACT_STATUSES = (['new', 'responded', 'closed'], [2, 18, 80])
+DEMO_WINDOW = timedelta(days=30)
+DEMO_FEATURES = ['monitoring', 'threats', 'reports', 'alerts', 'devices']
+
+FIRST_NAMES = [
+    'James', 'Mary', 'John', 'Patricia', 'Robert', 'Jennifer', 'Michael', 'Linda', 'David', 'Elizabeth',
+    'William', 'Barbara', 'Richard', 'Susan', 'Joseph', 'Jessica', 'Thomas', 'Sarah', 'Charles', 'Karen',
+    'Omar', 'Lina', 'Rami', 'Nour', 'Karim', 'Yara', 'Hassan', 'Maya', 'Ali', 'Leila',
+    'Wei', 'Mei', 'Hiroshi', 'Yuki', 'Arjun', 'Priya', 'Mateo', 'Sofia', 'Lukas', 'Emma',
+]
+LAST_NAMES = [
+    'Smith', 'Johnson', 'Williams', 'Brown', 'Jones', 'Garcia', 'Miller', 'Davis', 'Rodriguez', 'Martinez',
+    'Hernandez', 'Lopez', 'Wilson', 'Anderson', 'Thomas', 'Taylor', 'Moore', 'Jackson', 'Martin', 'Lee',
+    'Haddad', 'Khoury', 'Nasser', 'Saleh', 'Mansour', 'Farah', 'Aziz', 'Karam', 'Hamdan', 'Salem',
+    'Wang', 'Chen', 'Tanaka', 'Sato', 'Patel', 'Sharma', 'Rossi', 'Silva', 'Muller', 'Novak',
+]
+REVIEW_COMMENTS = {
+    5: ["Excellent service! Highly recommended.", "The best cybersecurity tool I've used. Worth every penny!",
+        "Caught an intrusion on day one. Setup took minutes."],
+    4: ["Great product, would use again. The dashboard is very intuitive.", "Solid monitoring, reports could be richer.",
+        "Support answered within the hour."],
+    3: ["Does the job, but alerts are noisy.", "Good value for the price, some features missing."],
+    2: ["Too many false positives for our network.", "Onboarding was slower than promised."],
+    1: ["Could not get it working with our firewall.", "Not what we expected."],
+}
+CONTACT_MESSAGES = [
+    "We'd like a demo for our security team.",
+    "What does the Enterprise tier include?",
+    "Can NetDash monitor devices across several offices?",
+    "Please send pricing for 300 devices.",
+    "Do you offer a discount for nonprofits?",
+    "Our trial expired, can it be extended?",
+]
+
+USER_COLUMNS = 'id, email, password_hash, first_name, last_name, name, role, is_suspended, created_at'
+PURCHASE_COLUMNS = 'user_id, plan_id, amount, status, purchase_date'
+REVIEW_COLUMNS = 'user_id, name, rating, comment, is_approved, created_at'
+CONTACT_COLUMNS = 'name, email, message, status, created_at'
+DEMO_SESSION_COLUMNS = 'token, email, expiry_time, features_accessed, created_at'
+
+_db = None
+
+
+def user_name(n):
+    """Deterministic name for the n-th generated user, so other tables can refer to it"""
+    return FIRST_NAMES[n % len(FIRST_NAMES)], LAST_NAMES[(n // len(FIRST_NAMES)) % len(LAST_NAMES)]
+
+
+def user_created_at(n, context):
+    """Signups grow linearly over time, so the n-th of N users joined at sqrt(n/N) of the span"""
+    return context['start'] + (context['now'] - context['start']) * ((n + 0.5) / context['users']) ** 0.5
+
+
+def recent_skew(rng, start, end):
+    """A time between start and end, twice as likely at end as halfway"""
+    return start + (end - start) * rng.random() ** 0.5
+
+
+def generate_users(rng, first, count, context):
+    roles = rng.choices(*USER_ROLES, k=count)
+    for i in range(count):
+        n = first + i
+        first_name, last_name = user_name(n)
+        yield (
+            context['user_base'] + n,
+            f"{first_name}.{last_name}{n}@{context['domain']}".lower(),
+            context['password_hash'],
+            first_name,
+            last_name,
+            f"{first_name} {last_name}",
+            roles[i],
+            rng.random() < SUSPENDED_SHARE,
+            user_created_at(n, context),
+        )
+
+
+def generate_purchases(rng, first, count, context):
+    plans = context['plans']
+    # Plans past the third sell like the most expensive one
+    weights = (PLAN_WEIGHTS + PLAN_WEIGHTS[-1:] * len(plans))[:len(plans)]
+    plan_indexes = rng.choices(range(len(plans)), weights=weights, k=count)
+    pending_after = context['now'] - PENDING_WINDOW
+    for i in range(count):
+        n = int(context['users'] * rng.random() ** HOT_USER_SKEW)
+        plan_id, price = plans[plan_indexes[i]]
+        purchase_date = recent_skew(rng, user_created_at(n, context), context['now'])
+        statuses = RECENT_PURCHASE_STATUSES if purchase_date > pending_after else PURCHASE_STATUSES
+        yield (
+            context['user_base'] + n,
+            plan_id,
+            price,
+            rng.choices(*statuses)[0],
+            purchase_date,
+        )
+
+
+def generate_reviews(rng, first, count, context):
+    ratings = rng.choices(*RATINGS, k=count)
+    for i in range(count):
+        if context['users'] and rng.random() < LINKED_REVIEW_SHARE:
+            n = rng.randrange(context['users'])
+            user_id, name = context['user_base'] + n, ' '.join(user_name(n))
+            start = user_created_at(n, context)
+        else:
+            user_id, name = None, f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+            start = context['start']
+        yield (
+            user_id,
+            name,
+            ratings[i],
+            rng.choice(REVIEW_COMMENTS[ratings[i]]),
+            rng.random() < APPROVED_SHARE,
+            recent_skew(rng, start, context['now']),
+        )
+
+
+def generate_contacts(rng, first, count, context):
+    open_after = context['now'] - CONTACT_OPEN_WINDOW
+    for i in range(count):
+        first_name, last_name = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+        created_at = recent_skew(rng, context['start'], context['now'])
+        statuses = RECENT_CONTACT_STATUSES if created_at > open_after else CONTACT_STATUSES
+        yield (
+            f"{first_name} {last_name}",
+            f"{first_name}.{last_name}{first + i}@contact.{context['domain']}".lower(),
+            rng.choice(CONTACT_MESSAGES),
+            rng.choices(*statuses)[0],
+            created_at,
+        )
+
+
+def generate_demo_sessions(rng, first, count, context):
+    for i in range(count):
+        created_at = recent_skew(rng, context['now'] - DEMO_WINDOW, context['now'])
+        yield (
+            f"{rng.getrandbits(256):064x}",
+            f"demo{first + i}@{context['domain']}",
+            created_at + timedelta(hours=1),
+            json.dumps(rng.sample(DEMO_FEATURES, rng.randrange(len(DEMO_FEATURES) + 1))),
+            created_at,
+        )
+
+
+TABLES = {
+    # table -> (generator, columns)
+    'users': (generate_users, USER_COLUMNS),
+    'purchases': (generate_purchases, PURCHASE_COLUMNS),
+    'reviews': (generate_reviews, REVIEW_COLUMNS),
+    'contacts': (generate_contacts, CONTACT_COLUMNS),
+    'demo_sessions': (generate_demo_sessions, DEMO_SESSION_COLUMNS),
+}
+
+
+def open_connection():
+    global _db
+    _db = app.get_db_connection()
+
+
+def load_chunk(task):
+    """Generate one chunk and COPY it in; returns (table, rows)"""
+    table, chunk, count, context = task
+    if table == 'subscriptions':
+        return sync_chunk(chunk, count, context)
+
+    generator, columns = TABLES[table]
+    rng = random.Random(f"{context['seed']}:{table}:{chunk}")
+    buffer = io.StringIO()
+    for row in generator(rng, chunk * CHUNK_SIZE, count, context):
+        buffer.write('\t'.join(app.copy_value(value) for value in row))
+        buffer.write('\n')
+    buffer.seek(0)
+
+    cursor = _db.cursor()
+    cursor.copy_expert(f'COPY {table} ({columns}) FROM STDIN', buffer)
+    _db.commit()
+    cursor.close()
+    return table, count
+
+
+def sync_chunk(chunk, count, context):
+    """Derive the subscriptions of one chunk of generated users from their purchases"""
+    cursor = _db.cursor()
+    first = context['user_base'] + chunk * CHUNK_SIZE
+    for start in range(first, first + count, SUBSCRIPTION_SYNC_SIZE):
+        app.sync_subscriptions(cursor, list(range(start, min(start + SUBSCRIPTION_SYNC_SIZE, first + count))))
+        _db.commit()
+    cursor.close()
+    return 'subscriptions', count
+
+
+def chunks(table, rows, context):
+    return [
+        (table, chunk, min(CHUNK_SIZE, rows - chunk * CHUNK_SIZE), context)
+        for chunk in range((rows + CHUNK_SIZE - 1) // CHUNK_SIZE)
+    ]
+
+
+def prepare(db, args, now):
+    """Reserve the user ids, make sure plans and partitions exist, and build the shared context"""
+    cursor = db.cursor()
+    domain = f"seed{args.seed}.example.com"
+    cursor.execute('SELECT 1 FROM users WHERE email LIKE %s LIMIT 1', (f'%@{domain}',))
+    if args.users and cursor.fetchone():
+        raise SystemExit(f"Users from seed {args.seed} are already loaded - pick another --seed")
+
+    cursor.execute('SELECT id, price FROM plans WHERE is_active = TRUE ORDER BY price, id')
+    plans = cursor.fetchall()
+    if not plans:
+        for name, price, features in DEFAULT_PLANS:
+            cursor.execute('INSERT INTO plans (name, price, features) VALUES (%s, %s, %s) RETURNING id, price',
+                           (name, price, json.dumps(features)))
+            plans.append(cursor.fetchone())
+
+    start = now - timedelta(days=round(365 * args.years))
+    # A block of ids, so purchases and reviews can name their user without a lookup
+    user_base = 0
+    if args.users:
+        cursor.execute('''
+            SELECT setval(pg_get_serial_sequence('users', 'id'), nextval(pg_get_serial_sequence('users', 'id')) + %s - 1)
+        ''', (args.users,))
+        user_base = cursor.fetchone()[0] - args.users + 1
+    cursor.execute('SELECT create_purchase_partitions(%s::date, %s::date)', (start, now))
+    db.commit()
+    cursor.close()
+
+    return {
+        'seed': args.seed,
+        'now': now,
+        'start': start,
+        'users': args.users,
+        'user_base': user_base,
+        'domain': domain,
+        'plans': [(plan_id, float(price)) for plan_id, price in plans],
+        'password_hash': generate_password_hash(GENERATED_PASSWORD),
+    }
+
+
+def drop_secondary_indexes(tables):
+    """Drop the SCHEMA_INDEXES entries on tables; app.create_indexes() puts them back"""
+    db = app.get_db_connection()
+    try:
+        cursor = db.cursor()
+        for index_name, definition in app.SCHEMA_INDEXES.items():
+            if definition.split(' ', 1)[0] in tables:
+                cursor.execute(f'DROP INDEX IF EXISTS {index_name}')
+        db.commit()
+    finally:
+        db.close()
+
+
+def run(pool, tasks, totals):
+    """Load tasks in parallel, printing progress per table"""
+    started = time.monotonic()
+    done = {}
+    for table, rows in pool.imap_unordered(load_chunk, tasks):
+        done[table] = done.get(table, 0) + rows
+        elapsed = time.monotonic() - started
+        print(f"{table}: {done[table]}/{totals[table]} ({sum(done.values()) / max(elapsed, 1e-9):.0f} rows/s)", flush=True)
+    return done
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--users', type=int, default=0, help='users to generate')
+    parser.add_argument('--purchases', type=int, default=0, help='purchases to generate (needs --users)')
+    parser.add_argument('--reviews', type=int, default=0, help='reviews to generate')
+    parser.add_argument('--contacts', type=int, default=0, help='contact submissions to generate')
+    parser.add_argument('--demo-sessions', type=int, default=0, help='demo sessions to generate')
+    parser.add_argument('--years', type=float, default=3, help='history to spread the data over')
+    parser.add_argument('--until', type=datetime.fromisoformat, default=None,
+                        help='end of the history (default now); pin it to reproduce a run exactly')
+    parser.add_argument('--seed', type=int, default=1, help='random seed; the same seed gives the same data')
+    parser.add_argument('--processes', type=int, default=multiprocessing.cpu_count(), help='COPY processes')
+    parser.add_argument('--no-subscriptions', action='store_true', help='skip deriving subscriptions')
+    parser.add_argument('--defer-indexes', action='store_true',
+                        help='drop the loaded tables\' secondary indexes first and rebuild them at the end')
+    args = parser.parse_args(argv)
+
+    if args.purchases and not args.users:
+        parser.error('--purchases needs --users to attribute them to')
+
+    db = app.get_db_connection()
+    try:
+        context = prepare(db, args, args.until or datetime.now())
+    finally:
+        db.close()
+
+    totals = {
+        'users': args.users,
+        'purchases': args.purchases,
+        'reviews': args.reviews,
+        'contacts': args.contacts,
+        'demo_sessions': args.demo_sessions,
+    }
+    started = time.monotonic()
+    if args.defer_indexes:
+        drop_secondary_indexes([table for table, rows in totals.items() if rows])
+    with multiprocessing.Pool(args.processes, initializer=open_connection) as pool:
+        # Users first - the other tables reference them
+        loaded = run(pool, chunks('users', args.users, context), totals)
+        tasks = []
+        for table in ('purchases', 'reviews', 'contacts', 'demo_sessions'):
+            tasks += chunks(table, totals[table], context)
+        # Interleave the tables so every process has work until the end
+        tasks.sort(key=lambda task: task[1])
+        loaded.update(run(pool, tasks, totals))
+
+        if args.defer_indexes:
+            # Building each index once over the loaded rows beats maintaining it per row,
+            # and the subscription sync below needs idx_purchases_subscription
+            app.create_indexes()
+
+        if args.purchases and not args.no_subscriptions:
+            totals['subscriptions'] = args.users
+            loaded.update(run(pool, chunks('subscriptions', args.users, context), totals))
+
+    db = app.get_db_connection()
+    try:
+        db.autocommit = True
+        cursor = db.cursor()
+        for table in loaded:
+            cursor.execute(f'ANALYZE {table}')
+    finally:
+        db.close()
+
+    elapsed = time.monotonic() - started
+    rows = sum(count for table, count in loaded.items() if table != 'subscriptions')
+    print(json.dumps({
+        'seed': args.seed,
+        'rows': loaded,
+        'seconds': round(elapsed, 1),
+        'rows_per_second': round(rows / max(elapsed, 1e-9)),
+        'first_user_id': context['user_base'] if args.users else None,
+    }), flush=True)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,84 @@
+"""Import users from a CSV or NDJSON file, as POST /api/users/import does
+
+Stages the file as an import and runs it in this process, a chunk at a time, rather than
+waiting for the user_imports job. --max-rows can lift USER_IMPORT_MAX_ROWS. Prints the import
+report as JSON; an interrupted import resumes with the user_imports job or
+--resume <import id>. --sample writes a synthetic CSV file to benchmark imports with.
+
+Usage:
+    python -m backend.import_users users.csv --site-url https://netdash.example.com/
+    python -m backend.import_users users.ndjson --max-rows 500000
+    python -m backend.import_users --resume 12
+    python -m backend.import_users --sample 100000 --passwords 0.1 > users.csv
+"""
+import argparse
+import csv
+import json
+import random
+import secrets
+import sys
+import time
+
+import app
+from backend.generate_data import user_name
+
+
+def write_sample(out, rows, password_share, seed):
+    """Unique users with names from the synthetic data set; a share of them come with a password"""
+    rng = random.Random(seed)
+    prefix = secrets.token_hex(4)  # reruns do not collide with an earlier sample
+    writer = csv.writer(out)
+    writer.writerow(app.USER_IMPORT_COLUMNS)
+    for n in range(rows):
+        first_name, last_name = user_name(n)
+        writer.writerow([
+            f'{first_name}.{last_name}.{prefix}.{n}@example.com'.lower(), first_name, last_name,
+            rng.choices(app.USER_IMPORT_ROLES, [70, 30])[0],
+            secrets.token_urlsafe(12) if rng.random() < password_share else '',
+        ])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('file', nargs='?', help='file to import')
+    parser.add_argument('--format', choices=['csv', 'ndjson'], help='default: from the file extension')
+    parser.add_argument('--site-url', default='http://localhost:10000/', help='base of the invite links')
+    parser.add_argument('--max-rows', type=int, default=app.USER_IMPORT_MAX_ROWS)
+    parser.add_argument('--resume', type=int, metavar='IMPORT_ID', help='run an import staged earlier')
+    parser.add_argument('--sample', type=int, metavar='ROWS', help='write a sample CSV to stdout instead')
+    parser.add_argument('--passwords', type=float, default=0.0, help='share of sample rows with a password')
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args(argv)
+
+    if args.sample is not None:
+        write_sample(sys.stdout, args.sample, args.passwords, args.seed)
+        return 0
+    if args.file is None and args.resume is None:
+        parser.error('a file to import, --resume or --sample is required')
+
+    started = time.monotonic()
+    db = app.get_db_connection()
+    try:
+        import_id = args.resume
+        if import_id is None:
+            fmt = args.format or ('csv' if args.file.endswith('.csv') else 'ndjson')
+            with open(args.file, 'rb') as stream:
+                import_id = app.stage_user_import(db, app.read_user_import(stream, fmt), args.site_url,
+                                                  None, args.max_rows)['id']
+            db.commit()
+        report = app.run_user_import(db, import_id)
+    except ValueError as e:
+        print(e, file=sys.stderr)
+        return 1
+    finally:
+        db.close()
+    if report is None:
+        print(f'Import {import_id} is already running', file=sys.stderr)
+        return 1
+    report['seconds'] = round(time.monotonic() - started, 2)
+    print(json.dumps(report, default=str))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,73 @@
+"""Run and inspect the scheduled background jobs
+
+The web workers elect one leader through an advisory lock, and the leader starts each due
+job as `python -m backend.jobs run <job>` in a process of its own, at a lower CPU priority.
+A run prints the job's result as JSON on its last line and exits non-zero if the job failed.
+The same commands work by hand:
+
+Usage:
+    python -m backend.jobs list                          # each job's schedule and latest run
+    python -m backend.jobs run purge_expired_tokens
+    python -m backend.jobs history purge_expired_tokens --limit 20
+"""
+import argparse
+import json
+import os
+import sys
+import traceback
+
+import psycopg2.extras
+
+# Set before the app is imported: a job process skips the schema setup the web workers do
+# at startup, and a run loads the app at its lower CPU priority already
+os.environ['INIT_DB'] = '0'
+if __name__ == '__main__' and sys.argv[1:2] == ['run']:
+    # Requests keep the CPU when a job competes with a web worker on the same machine. Only
+    # the job process itself: the pool processes a job starts re-import this module, and
+    # would lower their priority a second time
+    os.nice(int(os.getenv('SCHEDULER_NICENESS', '10')))
+
+import app
+
+
+def history(limit):
+    db = app.get_db_connection()
+    try:
+        return app.get_job_history(db.cursor(cursor_factory=psycopg2.extras.RealDictCursor), limit)
+    finally:
+        db.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest='command', required=True)
+    commands.add_parser('list', help="each job's schedule and latest run")
+    run = commands.add_parser('run', help='run one job now, in this process')
+    run.add_argument('job', choices=list(app.job_scheduler.jobs))
+    runs = commands.add_parser('history', help="a job's latest runs")
+    runs.add_argument('job', choices=list(app.job_scheduler.jobs))
+    runs.add_argument('--limit', type=int, default=10)
+    args = parser.parse_args(argv)
+
+    if args.command == 'list':
+        for job in history(1):
+            last = job.pop('runs')
+            print(json.dumps({**job, 'last_run': last[0] if last else None}, default=app.json_default))
+        return 0
+    if args.command == 'history':
+        job = next(job for job in history(args.limit) if job['name'] == args.job)
+        for run in job['runs']:
+            print(json.dumps(run, default=app.json_default))
+        return 0
+
+    try:
+        result = app.job_scheduler.jobs[args.job].func()
+    except Exception:
+        traceback.print_exc()
+        return 1
+    print(json.dumps(result, default=app.json_default))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,243 @@
+"""Online migration of purchases to monthly range partitions
+
+Builds a partitioned copy of purchases next to the live table and keeps it current with
+a trigger, copies the existing rows in small batches, then swaps the two tables in one
+short transaction. Reads and writes continue throughout; only the swap takes a lock.
+The old table is kept as purchases_unpartitioned until --drop-old.
+
+Usage:
+    python -m backend.partition_purchases
+    python -m backend.partition_purchases --drop-old
+"""
+import argparse
+import sys
+import time
+
+import psycopg2
+
+import app
+
+
+NEW_TABLE = 'purchases_partitioned'
+OLD_TABLE = 'purchases_unpartitioned'
+MIRROR_TRIGGER = 'purchases_mirror_partitioned'
+
+
+def relkind(cursor, table_name):
+    cursor.execute('SELECT relkind FROM pg_class WHERE oid = to_regclass(%s)', (table_name,))
+    row = cursor.fetchone()
+    return row[0] if row else None
+
+
+def purchase_columns(cursor):
+    cursor.execute('''
+        SELECT column_name FROM information_schema.columns
+        WHERE table_schema = current_schema() AND table_name = 'purchases'
+        ORDER BY ordinal_position
+    ''')
+    return [row[0] for row in cursor.fetchall()]
+
+
+def select_list(columns, source):
+    # The partition key cannot be NULL, while the old column allowed it
+    return ', '.join(
+        f'COALESCE({source}.purchase_date, CURRENT_TIMESTAMP)' if column == 'purchase_date' else f'{source}.{column}'
+        for column in columns
+    )
+
+
+def prepare(db):
+    """Create the partitioned table, its partitions and indexes, and the mirror trigger"""
+    cursor = db.cursor()
+    if relkind(cursor, NEW_TABLE) is not None:
+        print(f"{NEW_TABLE} already exists, resuming")
+        return
+
+    columns = purchase_columns(cursor)
+    cursor.execute(f'''
+        CREATE TABLE {NEW_TABLE} (LIKE purchases INCLUDING DEFAULTS INCLUDING CONSTRAINTS)
+        PARTITION BY RANGE (purchase_date)
+    ''')
+    cursor.execute(f'ALTER TABLE {NEW_TABLE} ALTER COLUMN purchase_date SET NOT NULL')
+    cursor.execute(f'ALTER TABLE {NEW_TABLE} ADD PRIMARY KEY (id, purchase_date)')
+
+    cursor.execute('''
+        SELECT pg_get_constraintdef(oid) FROM pg_constraint
+        WHERE conrelid = 'purchases'::regclass AND contype = 'f'
+    ''')
+    for (definition,) in cursor.fetchall():
+        cursor.execute(f'ALTER TABLE {NEW_TABLE} ADD {definition}')
+
+    cursor.execute('''
+        SELECT create_purchase_partitions(
+            COALESCE((SELECT MIN(purchase_date) FROM purchases), CURRENT_DATE)::date,
+            (CURRENT_DATE + %s * INTERVAL '1 month')::date,
+            %s
+        )
+    ''', (app.PURCHASE_PARTITIONS_AHEAD, NEW_TABLE))
+    print(f"Created {cursor.fetchone()[0]} partitions")
+
+    # The table is still empty, so plain CREATE INDEX is instant. The _partitioned suffix
+    # keeps the names free until the swap
+    for index_name, definition in app.SCHEMA_INDEXES.items():
+        table_name, index_columns = definition.split(' ', 1)
+        if table_name == 'purchases':
+            cursor.execute(f'CREATE INDEX {index_name}_partitioned ON {NEW_TABLE} {index_columns}')
+
+    # Mirror every change, in the writer's own transaction. updated_at and change_xid are
+    # copied as the old table's trigger set them
+    column_list = ', '.join(columns)
+    updates = ', '.join(f'{column} = EXCLUDED.{column}' for column in columns if column not in ('id', 'purchase_date'))
+    cursor.execute(f'''
+        CREATE OR REPLACE FUNCTION mirror_purchase() RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP IN ('UPDATE', 'DELETE') THEN
+                DELETE FROM {NEW_TABLE}
+                WHERE id = OLD.id AND purchase_date = COALESCE(OLD.purchase_date, CURRENT_TIMESTAMP)
+                  AND (TG_OP = 'DELETE' OR OLD.purchase_date IS DISTINCT FROM NEW.purchase_date);
+            END IF;
+            IF TG_OP IN ('INSERT', 'UPDATE') THEN
+                INSERT INTO {NEW_TABLE} ({column_list})
+                SELECT {select_list(columns, 'NEW')}
+                ON CONFLICT (id, purchase_date) DO UPDATE SET {updates};
+            END IF;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+    ''')
+    cursor.execute(f'''
+        CREATE TRIGGER {MIRROR_TRIGGER} AFTER INSERT OR UPDATE OR DELETE ON purchases
+        FOR EACH ROW EXECUTE FUNCTION mirror_purchase()
+    ''')
+    db.commit()
+    print(f"Prepared {NEW_TABLE} and the mirror trigger")
+
+
+def backfill(db, batch_size):
+    """Copy the existing rows in id order, one short transaction per batch"""
+    cursor = db.cursor()
+    columns = purchase_columns(cursor)
+    column_list = ', '.join(columns)
+    last_id, copied, started = 0, 0, time.monotonic()
+
+    while True:
+        # FOR KEY SHARE holds off a concurrent DELETE until the copy commits, so the mirror
+        # trigger's delete cannot run before the row it removes has been copied
+        cursor.execute(f'''
+            WITH batch AS (
+                SELECT * FROM purchases WHERE id > %s ORDER BY id LIMIT %s FOR KEY SHARE
+            ), copied AS (
+                INSERT INTO {NEW_TABLE} ({column_list})
+                SELECT {select_list(columns, 'batch')} FROM batch
+                ON CONFLICT (id, purchase_date) DO NOTHING
+            )
+            SELECT MAX(id), COUNT(*) FROM batch
+        ''', (last_id, batch_size))
+        max_id, count = cursor.fetchone()
+        db.commit()
+        if not count:
+            break
+        last_id = max_id
+        copied += count
+        print(f"Copied {copied} rows ({copied / (time.monotonic() - started):.0f}/s), up to id {last_id}", flush=True)
+
+    cursor.execute('SELECT (SELECT COUNT(*) FROM purchases), (SELECT COUNT(*) FROM %s)' % NEW_TABLE)
+    old_count, new_count = cursor.fetchone()
+    db.commit()
+    if old_count != new_count:
+        raise RuntimeError(f"Row counts differ after backfill: purchases {old_count}, {NEW_TABLE} {new_count}")
+    print(f"Backfill complete: {new_count} rows")
+
+
+def rename_indexes(cursor, table_name, rename):
+    cursor.execute('''
+        SELECT c.relname FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid
+        WHERE i.indrelid = %s::regclass
+    ''', (table_name,))
+    for (index_name,) in cursor.fetchall():
+        new_name = rename(index_name)
+        if new_name != index_name:
+            cursor.execute(f'ALTER INDEX {index_name} RENAME TO {new_name[:63]}')
+
+
+def swap(db, lock_timeout, attempts):
+    """Put the partitioned table in place of the old one in a single short transaction"""
+    cursor = db.cursor()
+    started = time.monotonic()
+    for attempt in range(1, attempts + 1):
+        try:
+            cursor.execute(f"SET LOCAL lock_timeout = '{lock_timeout}s'")
+            cursor.execute('LOCK TABLE purchases IN ACCESS EXCLUSIVE MODE')
+            break
+        except psycopg2.errors.LockNotAvailable:
+            db.rollback()
+            print(f"Could not lock purchases within {lock_timeout}s (attempt {attempt}/{attempts})")
+            time.sleep(1)
+    else:
+        raise RuntimeError('Gave up waiting for the lock on purchases')
+
+    cursor.execute(f'DROP TRIGGER {MIRROR_TRIGGER} ON purchases')
+    cursor.execute('DROP FUNCTION mirror_purchase()')
+    cursor.execute(f'ALTER TABLE purchases RENAME TO {OLD_TABLE}')
+    rename_indexes(cursor, OLD_TABLE, lambda name: f'{name}_unpartitioned')
+    cursor.execute(f'ALTER TABLE {NEW_TABLE} RENAME TO purchases')
+    rename_indexes(cursor, 'purchases', lambda name: (
+        'purchases_pkey' if name == f'{NEW_TABLE}_pkey' else name.removesuffix('_partitioned')
+    ))
+    cursor.execute("SELECT conname FROM pg_constraint WHERE conrelid = 'purchases'::regclass AND conname LIKE %s",
+                   (f'{NEW_TABLE}%',))
+    for (constraint_name,) in cursor.fetchall():
+        cursor.execute(f'ALTER TABLE purchases RENAME CONSTRAINT {constraint_name} TO '
+                       f'{constraint_name.replace(NEW_TABLE, "purchases", 1)}')
+    cursor.execute('ALTER SEQUENCE purchases_id_seq OWNED BY purchases.id')
+
+    # The old table's triggers stay with it; the new table gets its own from here on
+    cursor.execute('''
+        SELECT tgname, pg_get_triggerdef(oid) FROM pg_trigger
+        WHERE tgrelid = %s::regclass AND NOT tgisinternal
+    ''', (OLD_TABLE,))
+    for trigger_name, definition in cursor.fetchall():
+        cursor.execute(f'DROP TRIGGER {trigger_name} ON {OLD_TABLE}')
+        if trigger_name.endswith('_record_delete'):
+            definition = definition.replace('record_deleted_row()', "record_deleted_row('purchases')")
+        cursor.execute(definition.replace(f' ON public.{OLD_TABLE} ', ' ON purchases ').replace(f' ON {OLD_TABLE} ', ' ON purchases '))
+
+    db.commit()
+    print(f"Swapped in {(time.monotonic() - started) * 1000:.0f} ms: purchases is now partitioned by month")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--batch-size', type=int, default=10000, help='rows copied per transaction')
+    parser.add_argument('--lock-timeout', type=float, default=5, help='seconds to wait for the swap lock per attempt')
+    parser.add_argument('--attempts', type=int, default=10, help='swap lock attempts before giving up')
+    parser.add_argument('--drop-old', action='store_true', help=f'drop {OLD_TABLE} left by an earlier migration')
+    args = parser.parse_args(argv)
+
+    db = app.get_db_connection()
+    try:
+        cursor = db.cursor()
+        if args.drop_old:
+            cursor.execute(f'DROP TABLE IF EXISTS {OLD_TABLE}')
+            db.commit()
+            print(f"Dropped {OLD_TABLE}")
+            return 0
+
+        if relkind(cursor, 'purchases') == 'p':
+            print("purchases is already partitioned")
+            return 0
+
+        prepare(db)
+        backfill(db, args.batch_size)
+        swap(db, args.lock_timeout, args.attempts)
+    finally:
+        db.close()
+
+    # Build anything in SCHEMA_INDEXES the copy did not have, and the triggers the app expects
+    app.create_change_tracking()
+    app.create_indexes()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -101,14 +101,42 @@ INSERT INTO users (name, email, password_hash, role, first_name, last_name) VALU
 ('Bob Company', 'bob@company.com', 'bobpass', 'company_admin', 'Bob', 'Company');
 
 -- Table: Purchases
+-- Partitioned by month (purchases_YYYY_MM) so old months can be detached and dropped or archived
 CREATE TABLE IF NOT EXISTS purchases (
-  id SERIAL PRIMARY KEY,
+  id SERIAL,
   user_id INT REFERENCES users(id) ON DELETE CASCADE,
   plan_id INT REFERENCES plans(id) ON DELETE CASCADE,
   amount DECIMAL(10,2) NOT NULL,
   status VARCHAR(20) CHECK (status IN ('pending', 'completed', 'failed', 'refunded')) DEFAULT 'pending',
-  purchase_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-);
+  purchase_date TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+  PRIMARY KEY (id, purchase_date)
+) PARTITION BY RANGE (purchase_date);
+
+CREATE OR REPLACE FUNCTION create_purchase_partitions(from_date DATE, to_date DATE, parent TEXT DEFAULT 'purchases')
+RETURNS INT AS $$
+DECLARE
+    month DATE := date_trunc('month', from_date);
+    partition_name TEXT;
+    created INT := 0;
+BEGIN
+    IF (SELECT relkind FROM pg_class WHERE oid = to_regclass(parent)) IS DISTINCT FROM 'p' THEN
+        RETURN 0;
+    END IF;
+    WHILE month <= to_date LOOP
+        partition_name := 'purchases_' || to_char(month, 'YYYY_MM');
+        IF to_regclass(partition_name) IS NULL THEN
+            EXECUTE format('CREATE TABLE %I PARTITION OF %I FOR VALUES FROM (%L) TO (%L)',
+                           partition_name, parent, month, month + INTERVAL '1 month');
+            created := created + 1;
+        END IF;
+        month := month + INTERVAL '1 month';
+    END LOOP;
+    RETURN created;
+END;
+$$ LANGUAGE plpgsql;
+
+-- The app adds the coming months at startup and from the fulfillment worker
+SELECT create_purchase_partitions((CURRENT_DATE - INTERVAL '1 year')::date, (CURRENT_DATE + INTERVAL '3 months')::date);
 
 -- Table: Demo Sessions
 CREATE TABLE IF NOT EXISTS demo_sessions (
@@ -172,13 +200,84 @@ DO $$ BEGIN
     EXCEPTION WHEN duplicate_column THEN END;
 END $$;
 
--- Create email configuration table
+-- Email configuration: a single row (id 1); version goes up on every save
 CREATE TABLE IF NOT EXISTS email_config (
     id SERIAL PRIMARY KEY,
     smtp_server VARCHAR(255) DEFAULT 'smtp.gmail.com',
     smtp_port INT DEFAULT 587,
     smtp_username VARCHAR(255),
     smtp_password VARCHAR(255),
+    version INT NOT NULL DEFAULT 1,
     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
+ALTER TABLE email_config ADD COLUMN IF NOT EXISTS version INT NOT NULL DEFAULT 1;
+
+-- Password reset links; only a SHA-256 hash of each token is stored
+CREATE TABLE IF NOT EXISTS password_reset_tokens (
+    token_hash TEXT PRIMARY KEY,
+    user_id INT NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+    expires_at TIMESTAMP NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+
+-- Change tracking for delta sync (?since=) on the admin lists
+-- change_xid is the id of the transaction that last wrote the row; deletes leave a tombstone
+CREATE TABLE IF NOT EXISTS deleted_rows (
+    id BIGSERIAL PRIMARY KEY,
+    table_name TEXT NOT NULL,
+    row_id INT NOT NULL,
+    change_xid XID8 NOT NULL DEFAULT pg_current_xact_id(),
+    deleted_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE OR REPLACE FUNCTION track_row_change() RETURNS trigger AS $$
+BEGIN
+    NEW.updated_at := CURRENT_TIMESTAMP;
+    NEW.change_xid := pg_current_xact_id();
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION record_deleted_row() RETURNS trigger AS $$
+BEGIN
+    INSERT INTO deleted_rows (table_name, row_id) VALUES (COALESCE(TG_ARGV[0], TG_TABLE_NAME), OLD.id);
+    RETURN OLD;
+END;
+$$ LANGUAGE plpgsql;
+
+ALTER TABLE users ADD COLUMN IF NOT EXISTS change_xid XID8;
+ALTER TABLE reviews ADD COLUMN IF NOT EXISTS updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP;
+ALTER TABLE reviews ADD COLUMN IF NOT EXISTS change_xid XID8;
+ALTER TABLE contacts ADD COLUMN IF NOT EXISTS updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP;
+ALTER TABLE contacts ADD COLUMN IF NOT EXISTS change_xid XID8;
+ALTER TABLE purchases ADD COLUMN IF NOT EXISTS updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP;
+ALTER TABLE purchases ADD COLUMN IF NOT EXISTS change_xid XID8;
+
+CREATE OR REPLACE TRIGGER users_track_change BEFORE INSERT OR UPDATE ON users FOR EACH ROW EXECUTE FUNCTION track_row_change();
+CREATE OR REPLACE TRIGGER users_record_delete AFTER DELETE ON users FOR EACH ROW EXECUTE FUNCTION record_deleted_row();
+CREATE OR REPLACE TRIGGER reviews_track_change BEFORE INSERT OR UPDATE ON reviews FOR EACH ROW EXECUTE FUNCTION track_row_change();
+CREATE OR REPLACE TRIGGER reviews_record_delete AFTER DELETE ON reviews FOR EACH ROW EXECUTE FUNCTION record_deleted_row();
+CREATE OR REPLACE TRIGGER contacts_track_change BEFORE INSERT OR UPDATE ON contacts FOR EACH ROW EXECUTE FUNCTION track_row_change();
+CREATE OR REPLACE TRIGGER contacts_record_delete AFTER DELETE ON contacts FOR EACH ROW EXECUTE FUNCTION record_deleted_row();
+CREATE OR REPLACE TRIGGER purchases_track_change BEFORE INSERT OR UPDATE ON purchases FOR EACH ROW EXECUTE FUNCTION track_row_change();
+CREATE OR REPLACE TRIGGER purchases_record_delete AFTER DELETE ON purchases FOR EACH ROW EXECUTE FUNCTION record_deleted_row('purchases');
 
+-- Secondary indexes for the hot query paths
+-- CONCURRENTLY builds them without blocking writes; run this section outside a transaction block
+-- purchases is partitioned, which CONCURRENTLY does not support; it is empty on a fresh install
+CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS idx_users_lower_email_unique ON users (lower(email));
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_users_id_covering ON users (id) INCLUDE (name, email);
+CREATE INDEX IF NOT EXISTS idx_purchases_user_id ON purchases (user_id);
+CREATE INDEX IF NOT EXISTS idx_purchases_status ON purchases (status);
+CREATE INDEX IF NOT EXISTS idx_purchases_purchase_date ON purchases (purchase_date DESC) INCLUDE (id, user_id, plan_id, amount, status);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_reviews_created_at ON reviews (created_at DESC);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_reviews_is_approved ON reviews (is_approved, created_at DESC);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_contacts_status_created_at ON contacts (status, created_at DESC);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_demo_sessions_expiry_time ON demo_sessions (expiry_time);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_password_reset_tokens_expires_at ON password_reset_tokens (expires_at);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_users_change_xid ON users (change_xid);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_reviews_change_xid ON reviews (change_xid);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_contacts_change_xid ON contacts (change_xid);
+CREATE INDEX IF NOT EXISTS idx_purchases_change_xid ON purchases (change_xid);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_deleted_rows_table_change_xid ON deleted_rows (table_name, change_xid);
@@ -0,0 +1,199 @@
+"""Concurrency check for the state shared between request threads
+
+Drives the app in-process from --threads threads at once, as a gthread worker does, and
+checks the invariants a race would break:
+
+    reset tokens   every reset link works exactly once, however many requests race for it
+    remember me    only remember-me logins get a persistent session cookie, with the
+                   PERMANENT_SESSION_LIFETIME expiry, whatever other logins run alongside
+    email config   an email never reads a mix of two SMTP configurations while admins
+                   replace them; the original settings are saved back afterwards
+
+Works on its own users (thread-stress-N@stress.example.com), deleted again at the end.
+Exits 1 if any check fails.
+
+Usage:
+    python -m backend.thread_stress --threads 16
+"""
+import argparse
+import json
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+
+from werkzeug.security import generate_password_hash
+
+import app
+
+
+STRESS_EMAIL = 'thread-stress-%s@stress.example.com'
+STRESS_PASSWORD = 'stress-password'
+
+
+def create_users(count):
+    """Insert (or reset, after an interrupted run) the stress users; returns their (id, email)"""
+    db = app.get_db_connection()
+    try:
+        cursor = db.cursor()
+        cursor.execute('''
+            INSERT INTO users (email, password_hash, name, role)
+            SELECT format(%s, n), %s, 'Thread Stress', 'guest' FROM generate_series(1, %s) AS n
+            ON CONFLICT (email) DO UPDATE SET password_hash = EXCLUDED.password_hash, is_suspended = FALSE
+            RETURNING id, email
+        ''', (STRESS_EMAIL, generate_password_hash(STRESS_PASSWORD), count))
+        users = cursor.fetchall()
+        db.commit()
+        return users
+    finally:
+        db.close()
+
+
+def delete_users():
+    db = app.get_db_connection()
+    try:
+        cursor = db.cursor()
+        cursor.execute('DELETE FROM users WHERE email LIKE %s', (STRESS_EMAIL % '%',))
+        db.commit()
+    finally:
+        db.close()
+
+
+def check_reset_tokens(pool, users, tokens, racers):
+    """Issue tokens, then redeem each from `racers` requests at the same time"""
+    db = app.get_db_connection()
+    try:
+        cursor = db.cursor()
+        issued = [app.issue_reset_token(cursor, users[n % len(users)][0]) for n in range(tokens)]
+        db.commit()
+    finally:
+        db.close()
+
+    def redeem(token):
+        response = app.app.test_client().post(f'/api/reset-password/{token}', json={'password': STRESS_PASSWORD})
+        return token, response.status_code
+
+    # Copies of the same token are queued next to each other, so they run concurrently
+    statuses = list(pool.map(redeem, [token for token in issued for _ in range(racers)]))
+    redeemed = {}
+    unexpected = 0
+    for token, status in statuses:
+        if status == 200:
+            redeemed[token] = redeemed.get(token, 0) + 1
+        elif status != 400:
+            unexpected += 1
+    failures = unexpected + sum(1 for token in issued if redeemed.get(token) != 1)
+    return {'tokens': tokens, 'attempts': len(statuses), 'redeemed': sum(redeemed.values()), 'failures': failures}
+
+
+def check_remember_me(pool, users, logins):
+    """Log in with and without remember me at once and check each response's cookie"""
+    lifetime = app.app.permanent_session_lifetime
+
+    def login(n):
+        remember = n % 2 == 0
+        response = app.app.test_client().post('/api/login', json={
+            'email': users[n % len(users)][1], 'password': STRESS_PASSWORD, 'remember': remember
+        })
+        if response.status_code != 200:
+            return False
+        cookie = next((c for c in response.headers.getlist('Set-Cookie') if c.startswith('session=')), '')
+        expires = next((part.split('=', 1)[1] for part in cookie.split('; ') if part.startswith('Expires=')), None)
+        if not remember:
+            return expires is None
+        if expires is None:
+            return False
+        remaining = parsedate_to_datetime(expires) - datetime.now(timezone.utc)
+        return abs((remaining - lifetime).total_seconds()) < 60
+
+    results = list(pool.map(login, range(logins)))
+    return {'logins': logins, 'failures': results.count(False)}
+
+
+def check_email_config(pool, threads, updates):
+    """Replace the SMTP settings from half the threads while the others read them"""
+    db = app.get_db_connection()
+    try:
+        cursor = db.cursor()
+        cursor.execute("SELECT id FROM users WHERE role = 'platform_admin' AND NOT is_suspended ORDER BY id LIMIT 1")
+        admin = cursor.fetchone()
+    finally:
+        db.close()
+    if admin is None:
+        return {'skipped': 'no platform_admin user'}
+
+    original = app.smtp_settings.get()
+    configs = [
+        {'smtp_server': f'smtp{n}.example.com', 'smtp_port': 2500 + n,
+         'smtp_username': f'user{n}', 'smtp_password': f'password{n}'}
+        for n in range(2)
+    ]
+    allowed = {original} | {app.SmtpConfig(*config.values()) for config in configs}
+    done = threading.Event()
+
+    def write(n, config=None):
+        client = app.app.test_client()
+        with client.session_transaction() as session:
+            session['user_id'] = admin[0]
+            session['user_role'] = 'platform_admin'
+        return client.post('/api/email-config', json=config or configs[n % 2]).status_code == 200
+
+    def read(_):
+        reads = mixed = 0
+        while not done.is_set():
+            if app.smtp_settings.get() not in allowed:
+                mixed += 1
+            reads += 1
+            time.sleep(0)  # let the writers run
+        return reads, mixed
+
+    writers = max(threads // 2, 1)
+    readers = [pool.submit(read, n) for n in range(threads - writers)]
+    try:
+        with ThreadPoolExecutor(writers) as writer_pool:
+            written = list(writer_pool.map(write, range(updates)))
+    finally:
+        done.set()
+    reads = [reader.result() for reader in readers]
+    # Saved settings are shared by every worker, so put the original ones back
+    write(0, dict(zip(configs[0], original)))
+    return {
+        'updates': updates,
+        'reads': sum(r for r, _ in reads),
+        'failures': written.count(False) + sum(m for _, m in reads)
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--threads', type=int, default=16, help='request threads running at once')
+    parser.add_argument('--users', type=int, default=20, help='stress users to create')
+    parser.add_argument('--tokens', type=int, default=50, help='reset tokens to issue')
+    parser.add_argument('--racers', type=int, default=4, help='requests redeeming each token at once')
+    parser.add_argument('--logins', type=int, default=40, help='logins, half of them with remember me')
+    parser.add_argument('--config-updates', type=int, default=2000, help='email config updates')
+    args = parser.parse_args(argv)
+
+    started = time.monotonic()
+    users = create_users(args.users)
+    try:
+        with ThreadPoolExecutor(args.threads) as pool:
+            report = {
+                'threads': args.threads,
+                'reset_tokens': check_reset_tokens(pool, users, args.tokens, args.racers),
+                'remember_me': check_remember_me(pool, users, args.logins),
+                'email_config': check_email_config(pool, args.threads, args.config_updates),
+            }
+    finally:
+        delete_users()
+
+    report['seconds'] = round(time.monotonic() - started, 1)
+    report['ok'] = not any(check.get('failures') for check in report.values() if isinstance(check, dict))
+    print(json.dumps(report), flush=True)
+    return 0 if report['ok'] else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
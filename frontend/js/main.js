@@ -1,34 +1,31 @@
 document.addEventListener("DOMContentLoaded", () => {
-  fetchPlans();
-  fetchReviews();
-});
-
-function fetchPlans() {
-  fetch("api/plans.php")
+  // Plans and reviews arrive together from the landing bundle
+  fetch("/api/landing")
     .then(res => res.json())
-    .then(plans => {
-      const container = document.getElementById("plans");
-      container.innerHTML = plans.map(plan => `
-        <div class="plan">
-          <h3>${plan.name}</h3>
-          <p>${plan.price}</p>
-          <ul>${plan.features.map(f => `<li>${f}</li>`).join("")}</ul>
-        </div>
-      `).join("");
+    .then(landing => {
+      renderPlans(landing.plans);
+      renderReviews(landing.reviews);
     });
+});
+
+function renderPlans(plans) {
+  const container = document.getElementById("plans");
+  container.innerHTML = plans.map(plan => `
+    <div class="plan">
+      <h3>${plan.name}</h3>
+      <p>${plan.price}</p>
+      <ul>${plan.features.map(f => `<li>${f}</li>`).join("")}</ul>
+    </div>
+  `).join("");
 }
 
-function fetchReviews() {
-  fetch("api/reviews.php")
-    .then(res => res.json())
-    .then(reviews => {
-      const container = document.getElementById("reviews");
-      container.innerHTML = reviews.map(r => `
-        <div class="review">
-          <strong>${r.name}</strong>: ${r.review} (${r.rating}/5)
-        </div>
-      `).join("");
-    });
+function renderReviews(reviews) {
+  const container = document.getElementById("reviews");
+  container.innerHTML = reviews.map(r => `
+    <div class="review">
+      <strong>${r.name}</strong>: ${r.comment} (${r.rating}/5)
+    </div>
+  `).join("");
 }
 
 document.getElementById("reviewForm").addEventListener("submit", async function(e) {
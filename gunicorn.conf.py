@@ -0,0 +1,39 @@
+"""Gunicorn settings for NetDash
+
+Used by the Procfile and the Dockerfile (gunicorn -c gunicorn.conf.py app:app). Every
+value can be overridden from the environment.
+
+The default gevent workers serve many requests per process: a request waiting on
+Postgres or SMTP yields to the others instead of holding the whole process. Each
+worker shares DB_POOL_SIZE database connections between its requests.
+GUNICORN_WORKER_CLASS=gthread or sync switches back to one request per thread or process.
+"""
+import multiprocessing
+import os
+
+
+bind = f"0.0.0.0:{os.getenv('PORT', '10000')}"
+
+worker_class = os.getenv('GUNICORN_WORKER_CLASS', 'gevent')
+
+# Password hashing and JSON encoding still need a CPU, so gevent runs one process per core;
+# blocking workers need extra processes to cover the time they spend waiting
+cores = multiprocessing.cpu_count()
+workers = int(os.getenv('WEB_CONCURRENCY', cores if worker_class == 'gevent' else 2 * cores + 1))
+
+# Concurrent requests per gevent worker. Those past DB_POOL_SIZE queue for a connection
+worker_connections = int(os.getenv('GUNICORN_WORKER_CONNECTIONS', '1000'))
+
+if worker_class == 'gthread':
+    threads = int(os.getenv('GUNICORN_THREADS', '8'))
+
+# Longer than the usual 60s load balancer idle timeout, so the balancer never reuses a
+# connection the worker has just closed. Sync workers do not support keep-alive
+keepalive = int(os.getenv('GUNICORN_KEEPALIVE', '75'))
+
+timeout = int(os.getenv('GUNICORN_TIMEOUT', '30'))
+graceful_timeout = int(os.getenv('GUNICORN_GRACEFUL_TIMEOUT', '30'))
+
+# Not preloaded: app.py starts background threads and opens connections at import, which
+# must happen in each worker, not once in the master before forking
+preload_app = False